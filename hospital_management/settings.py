@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'patients',
     'doctors',
@@ -50,6 +51,9 @@ INSTALLED_APPS = [
     'suppliers',
     'categories',
     'products',
+    'jobs',
+    'versioning',
+    'stock',
     'rest_framework',
     'drf_yasg',
     'rest_framework.authtoken', # Enables token authentication
@@ -172,6 +176,42 @@ REST_FRAMEWORK = {
 }
 
 
+# Product reads are cached per process in local memory. Switch the catalogue
+# cache to django.core.cache.backends.filebased.FileBasedCache (with a
+# LOCATION directory) to share entries between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalogue': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalogue',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Cache alias and lifetime (in seconds) of cached product list/detail responses.
+# Entries are keyed by the catalogue version, so writes invalidate them at once;
+# the timeout only bounds memory held by old versions.
+CATALOGUE_CACHE_ALIAS = 'catalogue'
+CATALOGUE_CACHE_TIMEOUT = 60 * 5
+
+# Number of SKUs each process keeps in the barcode lookup LRU
+PRODUCT_SKU_CACHE_SIZE = 4096
+
+# How long (in seconds) POST /api/sales/ remembers an Idempotency-Key and its response
+POS_IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# Where `manage.py send_stock_alerts` delivers low-stock digests: e-mail
+# recipients and/or a webhook receiving the digest as JSON. With neither set,
+# alerts stay queued.
+STOCK_ALERT_EMAILS = []
+STOCK_ALERT_WEBHOOK_URL = ''
+STOCK_ALERT_WEBHOOK_TIMEOUT = 10
+# Most alerts sent in one digest
+STOCK_ALERT_DIGEST_SIZE = 500
+
+
 # For development, allowing all origins
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -31,6 +31,8 @@ urlpatterns = [
     path('api/categories/', include('categories.urls')),
     path('api/products/', include('products.urls')),
     path('api/patients/', include('patients.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/stock/', include('stock.urls')),
 
     # Swagger URLs
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
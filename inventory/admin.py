@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Item
+from .models import Item, Lot
 
 # Register your models here.
 
 admin.site.register(Item)
+admin.site.register(Lot)
@@ -0,0 +1,57 @@
+from django.db.models import Count, DecimalField, F, Min, Sum
+from django.db.models.functions import Coalesce
+
+# Expiry summary groupings: the item foreign key each one groups on and
+# the related field used as its label.
+EXPIRY_GROUPINGS = {
+    'supplier': ('item__supplier', 'item__supplier__name'),
+    'category': ('item__category', 'item__category__name'),
+}
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def stock_value():
+    """
+    Value of the units held by the aggregated lots, at their item's price.
+    """
+    return Coalesce(Sum(F('quantity') * F('item__unit_price'), output_field=MONEY), 0, output_field=MONEY)
+
+
+def expiry_summary(lots, group_by):
+    """
+    Count items, units and stock value per supplier or category.
+
+    Works on lots rather than items, so only the units that actually
+    expire in the window are counted, not everything the item holds.
+
+    Args:
+        lots: Lot queryset, usually already narrowed to an expiry window
+        group_by (str): One of the EXPIRY_GROUPINGS keys
+
+    Returns:
+        list: One dict per group, soonest expiry first
+    """
+    field, label = EXPIRY_GROUPINGS[group_by]
+    return list(
+        lots.order_by()
+        .values(group=F(field), label=F(label))
+        .annotate(
+            item_count=Count('item', distinct=True),
+            units=Sum('quantity'),
+            stock_value=stock_value(),
+            earliest_expiration=Min('expiration_date'),
+        )
+        .order_by('earliest_expiration', 'group')
+    )
+
+
+def expiry_totals(lots):
+    """
+    Totals across all groups of an expiry summary.
+    """
+    return lots.order_by().aggregate(
+        item_count=Count('item', distinct=True),
+        units=Coalesce(Sum('quantity'), 0),
+        stock_value=stock_value(),
+    )
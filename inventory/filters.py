@@ -0,0 +1,73 @@
+# Orderings the item list accepts, each ending in the primary key so that
+# rows sharing a value keep a stable order. Every leading column is indexed.
+ITEM_ORDERINGS = {
+    'name': ('name', 'id'),
+    '-name': ('-name', '-id'),
+    'quantity': ('quantity', 'id'),
+    '-quantity': ('-quantity', '-id'),
+    'expiration_date': ('expiration_date', 'id'),
+    '-expiration_date': ('-expiration_date', '-id'),
+    'id': ('id',),
+    '-id': ('-id',),
+}
+
+# Orderings on nullable columns, which a cursor cannot page through.
+NULLABLE_ORDERINGS = {'expiration_date', '-expiration_date'}
+
+
+def filter_items(queryset, expired=False, expires_within=None, expires_after=None,
+                 expires_before=None, in_stock=False, category=None, supplier=None,
+                 min_quantity=None, max_quantity=None, name=None, today=None):
+    """
+    Narrow an Item queryset to the given attributes and expiry window.
+
+    Args:
+        queryset: Item queryset to filter
+        expired (bool): Only items whose expiration date has passed
+        expires_within (int): Only items expiring in the next N days
+        expires_after (date): First expiration date to include
+        expires_before (date): Last expiration date to include
+        in_stock (bool): Only items with a positive quantity
+        category (int): Category ID
+        supplier (int): Supplier ID
+        min_quantity (int): Lowest quantity to include
+        max_quantity (int): Highest quantity to include
+        name (str): Case-insensitive name prefix
+        today (date): Reference date, defaults to the local date
+
+    Returns:
+        QuerySet: Filtered items
+    """
+    if expired:
+        queryset = queryset.expired(today)
+    if expires_within is not None:
+        queryset = queryset.expiring_within(expires_within, today)
+    if expires_after:
+        queryset = queryset.filter(expiration_date__gte=expires_after)
+    if expires_before:
+        queryset = queryset.filter(expiration_date__lte=expires_before)
+    if in_stock:
+        queryset = queryset.in_stock()
+    if category:
+        queryset = queryset.filter(category_id=category)
+    if supplier:
+        queryset = queryset.filter(supplier_id=supplier)
+    if min_quantity is not None:
+        queryset = queryset.filter(quantity__gte=min_quantity)
+    if max_quantity is not None:
+        queryset = queryset.filter(quantity__lte=max_quantity)
+    if name:
+        queryset = queryset.filter(name__istartswith=name)
+    return queryset
+
+
+def has_expiry_filter(params):
+    """
+    Whether validated list parameters narrow the items to an expiry window.
+    """
+    return bool(
+        params.get('expired')
+        or params.get('expires_within') is not None
+        or params.get('expires_after')
+        or params.get('expires_before')
+    )
@@ -0,0 +1,156 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Min, OuterRef, Q, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from stock.service import ITEM, shift_stock
+
+from .models import Item, Lot
+
+
+class InsufficientLotStock(Exception):
+    """
+    Raised when an item's usable lots hold less than a requested quantity.
+    """
+
+    def __init__(self, item, available):
+        self.item = item
+        self.available = available
+        super().__init__(
+            f"Insufficient stock for item {item.name}. Available: {available}"
+        )
+
+
+def usable_lots(item, today=None, include_expired=False):
+    """
+    An item's lots that can still be allocated from, in FEFO order.
+
+    Lots without an expiration date come last. Expired lots are skipped
+    unless ``include_expired`` is set.
+    """
+    lots = Lot.objects.filter(item=item, quantity__gt=0)
+    if not include_expired:
+        today = today or timezone.localdate()
+        lots = lots.filter(Q(expiration_date__gte=today) | Q(expiration_date__isnull=True))
+    return lots.order_by(F('expiration_date').asc(nulls_last=True), 'pk')
+
+
+def _sync_item(item, quantity_delta):
+    """
+    Move an item's quantity and shared stock record, and reset its expiry
+    to its soonest lot in stock.
+
+    ``item`` is the locked row, still at its old quantity.
+    """
+    soonest = (
+        Lot.objects.filter(item=OuterRef('pk'), quantity__gt=0)
+        .order_by()
+        .values('item')
+        .annotate(soonest=Min('expiration_date'))
+        .values('soonest')
+    )
+    Item.objects.filter(pk=item.pk).update(
+        quantity=F('quantity') + quantity_delta,
+        expiration_date=Subquery(soonest),
+    )
+    shift_stock(ITEM, {item.pk: quantity_delta}, [item])
+
+
+def allocate(item, quantity, today=None, include_expired=False):
+    """
+    Take stock from an item's lots, first-expiry-first-out.
+
+    The item row is locked, then the lots needed are picked by one query
+    over the ``lot_fefo_idx`` index: a running ``SUM() OVER`` in FEFO order
+    keeps only the lots whose preceding total is still short of the request,
+    and computes how much each one gives. All picked lots are then
+    decremented by one UPDATE bounded by the last picked lot's FEFO position:
+    the lots before it are emptied and it gives the remainder, so the
+    statement is the same size however many lots are picked.
+
+    Args:
+        item: Item instance or ID
+        quantity (int): Units to allocate, at least 1
+        today (date): Reference date for skipping expired lots
+        include_expired (bool): Allow allocating from expired lots
+
+    Returns:
+        list: ``(lot, taken)`` per lot drawn from, in FEFO order
+
+    Raises:
+        InsufficientLotStock: If the usable lots hold less than requested.
+            Nothing is allocated in that case.
+    """
+    item_id = getattr(item, 'pk', item)
+    with transaction.atomic():
+        locked = Item.objects.select_for_update().only(
+            'pk', 'name', 'quantity', 'reorder_point'
+        ).get(pk=item_id)
+        lots = usable_lots(item_id, today, include_expired)
+        running = Window(
+            Sum('quantity'),
+            order_by=[F('expiration_date').asc(nulls_last=True), F('pk').asc()],
+        )
+        picked = list(
+            lots.annotate(preceding=running - F('quantity'))
+            .filter(preceding__lt=quantity)
+            .annotate(taken=Least(F('quantity'), Value(quantity) - F('preceding')))
+        )
+        if sum(lot.taken for lot in picked) < quantity:
+            available = lots.aggregate(total=Coalesce(Sum('quantity'), 0))['total']
+            raise InsufficientLotStock(locked, available)
+
+        # Every picked lot but the last gives all it holds, so the picked
+        # lots are the usable lots up to the last one in FEFO order.
+        last = picked[-1]
+        if last.expiration_date is None:
+            drained = Q(expiration_date__isnull=False) | Q(pk__lt=last.pk)
+        else:
+            drained = Q(expiration_date__lt=last.expiration_date) | Q(
+                expiration_date=last.expiration_date, pk__lt=last.pk
+            )
+        updated = lots.filter(drained | Q(pk=last.pk, quantity__gte=last.taken)).update(
+            quantity=Case(
+                When(pk=last.pk, then=F('quantity') - last.taken),
+                default=Value(0),
+                output_field=models.PositiveIntegerField(),
+            )
+        )
+        if updated != len(picked):
+            # Only reachable when lots were changed without locking the item.
+            raise InsufficientLotStock(locked, lots.aggregate(total=Coalesce(Sum('quantity'), 0))['total'])
+        _sync_item(locked, -quantity)
+
+    for lot in picked:
+        lot.quantity -= lot.taken
+    return [(lot, lot.taken) for lot in picked]
+
+
+def receive_lot(item, quantity, expiration_date=None, lot_number='', received_at=None):
+    """
+    Record a newly received lot and add it to the item's stock.
+
+    Args:
+        item: Item instance
+        quantity (int): Units received
+        expiration_date (date): Expiry of the lot, if any
+        lot_number (str): Supplier's lot or batch number
+        received_at (datetime): When the lot arrived, defaults to now
+
+    Returns:
+        Lot: The created lot
+    """
+    with transaction.atomic():
+        locked = Item.objects.select_for_update().only(
+            'pk', 'name', 'quantity', 'reorder_point'
+        ).get(pk=item.pk)
+        lot = Lot.objects.create(
+            item=item,
+            quantity=quantity,
+            expiration_date=expiration_date,
+            lot_number=lot_number,
+            received_at=received_at or timezone.now(),
+        )
+        _sync_item(locked, quantity)
+    item.refresh_from_db(fields=['quantity', 'expiration_date'])
+    return lot
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('inventory', '0001_initial'),
+        ('suppliers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['expiration_date', 'quantity'], name='item_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_item_expiry_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot_number', models.CharField(blank=True, max_length=50)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('expiration_date', models.DateField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='inventory.item')),
+            ],
+            options={
+                'ordering': ['item', 'expiration_date', 'pk'],
+                'indexes': [models.Index(condition=models.Q(('quantity__gt', 0)), fields=['item', 'expiration_date', 'id'], name='lot_fefo_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('lot_number', ''), _negated=True), fields=('item', 'lot_number'), name='lot_unique_number_per_item')],
+            },
+        ),
+    ]
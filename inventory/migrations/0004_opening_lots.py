@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def create_opening_lots(apps, schema_editor):
+    """
+    Give every item in stock one lot holding its current quantity and
+    expiration date, so lot totals match Item.quantity from the start.
+    """
+    Item = apps.get_model('inventory', 'Item')
+    Lot = apps.get_model('inventory', 'Lot')
+    lots = (
+        Lot(item_id=item_id, quantity=quantity, expiration_date=expiration_date)
+        for item_id, quantity, expiration_date in Item.objects.filter(quantity__gt=0)
+        .values_list('id', 'quantity', 'expiration_date').iterator()
+    )
+    batch = []
+    for lot in lots:
+        batch.append(lot)
+        if len(batch) == 1000:
+            Lot.objects.bulk_create(batch)
+            batch = []
+    Lot.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_lot'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opening_lots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:12
+
+from django.db import migrations, models
+
+
+def create_name_prefix_index(apps, schema_editor):
+    """
+    Index the upper-cased name with pattern operators on PostgreSQL, so the
+    case-insensitive prefix filter (``UPPER(name::text) LIKE 'ABC%'``) is a
+    range scan under any collation.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX item_name_prefix_idx ON inventory_item '
+            '(UPPER(name::text) text_pattern_ops, id)'
+        )
+
+
+def drop_name_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS item_name_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('inventory', '0004_opening_lots'),
+        ('suppliers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['name', 'id'], name='item_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['quantity', 'id'], name='item_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['category', 'name', 'id'], name='item_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['supplier', 'name', 'id'], name='item_supplier_name_idx'),
+        ),
+        migrations.RunPython(create_name_prefix_index, drop_name_prefix_index),
+    ]
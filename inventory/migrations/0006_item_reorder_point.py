@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_item_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='reorder_point',
+            field=models.PositiveIntegerField(default=0, help_text='Quantity at or below which a low-stock alert is raised'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_item_reorder_point'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lot',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['expiration_date', 'item'], name='lot_expiry_idx'),
+        ),
+    ]
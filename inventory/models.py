@@ -1,8 +1,83 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from suppliers.models import Supplier
 from categories.models import Category
 
 
+class ItemQuerySet(models.QuerySet):
+    """
+    QuerySet for Item with expiry helpers.
+
+    Every expiry filter is a range on ``expiration_date`` plus a
+    ``quantity`` bound, which the ``item_expiry_idx`` index answers with a
+    single range scan.
+    """
+
+    def in_stock(self):
+        """
+        Items with a positive quantity on hand.
+        """
+        return self.filter(quantity__gt=0)
+
+    def expired(self, today=None):
+        """
+        Items that expired before ``today`` (defaults to the local date).
+        """
+        today = today or timezone.localdate()
+        return self.filter(expiration_date__lt=today)
+
+    def expiring_within(self, days, today=None):
+        """
+        Items that have not expired yet but will within ``days`` days.
+
+        Args:
+            days (int): Size of the window; 0 means items expiring today
+            today (date): First day of the window, defaults to the local date
+
+        Returns:
+            ItemQuerySet: Filtered items
+        """
+        today = today or timezone.localdate()
+        return self.filter(
+            expiration_date__gte=today,
+            expiration_date__lte=today + timedelta(days=days),
+        )
+
+
+class LotQuerySet(models.QuerySet):
+    """
+    QuerySet for Lot with the same expiry helpers as ``ItemQuerySet``.
+
+    Lot expiry filters are answered by the partial ``lot_expiry_idx``
+    index over lots still in stock.
+    """
+
+    def in_stock(self):
+        """
+        Lots with units left.
+        """
+        return self.filter(quantity__gt=0)
+
+    def expired(self, today=None):
+        """
+        Lots that expired before ``today`` (defaults to the local date).
+        """
+        today = today or timezone.localdate()
+        return self.filter(expiration_date__lt=today)
+
+    def expiring_within(self, days, today=None):
+        """
+        Lots that have not expired yet but will within ``days`` days.
+        """
+        today = today or timezone.localdate()
+        return self.filter(
+            expiration_date__gte=today,
+            expiration_date__lte=today + timedelta(days=days),
+        )
+
 
 class Item(models.Model):
     """
@@ -12,10 +87,68 @@ class Item(models.Model):
     description = models.TextField(blank=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     quantity = models.PositiveIntegerField(default=0)
+    reorder_point = models.PositiveIntegerField(
+        default=0, help_text="Quantity at or below which a low-stock alert is raised"
+    )
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True)
     expiration_date = models.DateField(null=True, blank=True)
 
+    objects = ItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expiration_date', 'quantity'], name='item_expiry_idx'),
+            # Keyset pagination orders, alone and within one category or supplier.
+            models.Index(fields=['name', 'id'], name='item_name_idx'),
+            models.Index(fields=['quantity', 'id'], name='item_quantity_idx'),
+            models.Index(fields=['category', 'name', 'id'], name='item_category_name_idx'),
+            models.Index(fields=['supplier', 'name', 'id'], name='item_supplier_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+
+class Lot(models.Model):
+    """
+    A batch of an item received together and sharing one expiration date.
+
+    ``Item.quantity`` is the sum of its lots' quantities and
+    ``Item.expiration_date`` the soonest expiry among lots still in stock;
+    both are maintained by ``inventory.lots``.
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='lots')
+    lot_number = models.CharField(max_length=50, blank=True)
+    quantity = models.PositiveIntegerField(default=0)
+    expiration_date = models.DateField(null=True, blank=True)
+    received_at = models.DateTimeField(default=timezone.now)
+
+    objects = LotQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['item', 'expiration_date', 'pk']
+        indexes = [
+            # Expired and expiring-soon stock across all items.
+            models.Index(
+                fields=['expiration_date', 'item'],
+                condition=Q(quantity__gt=0),
+                name='lot_expiry_idx',
+            ),
+            # FEFO order for the lots an item can still allocate from.
+            models.Index(
+                fields=['item', 'expiration_date', 'id'],
+                condition=Q(quantity__gt=0),
+                name='lot_fefo_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['item', 'lot_number'],
+                condition=~Q(lot_number=''),
+                name='lot_unique_number_per_item',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item} lot {self.lot_number or self.pk}"
@@ -0,0 +1,31 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ItemCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the inventory item list.
+
+    The ordering is chosen per request from ``filters.ITEM_ORDERINGS``;
+    name order with the primary key as tie-breaker is the default.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('name', 'id')
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+
+
+class ItemPagePagination(PageNumberPagination):
+    """
+    Page-number pagination for the inventory item list.
+
+    Used when the client asks for a page number, and for orderings on
+    nullable columns such as the expiration date, which a cursor cannot
+    encode.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -1,10 +1,140 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Item
+from .filters import ITEM_ORDERINGS
+from .models import Item, Lot
 
 class ItemSerializer(serializers.ModelSerializer):
     """
     Serializer for the Item model, handling serialization and validation.
+
+    An item's quantity and expiration date follow its lots: a new item's
+    quantity becomes its opening lot, and later changes go through lots.
     """
     class Meta:
         model = Item
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+    def validate(self, data):
+        """
+        Reject direct stock changes on existing items.
+        """
+        item = self.instance
+        if item is not None:
+            if 'quantity' in data and data['quantity'] != item.quantity:
+                raise serializers.ValidationError(
+                    {"quantity": "Quantity is maintained from lots; receive or allocate a lot instead."}
+                )
+            if ('expiration_date' in data and data['expiration_date'] != item.expiration_date
+                    and item.lots.exists()):
+                raise serializers.ValidationError(
+                    {"expiration_date": "Expiration date is maintained from lots."}
+                )
+        return data
+
+    def create(self, validated_data):
+        """
+        Create the item and record its starting quantity as an opening lot.
+        """
+        with transaction.atomic():
+            item = super().create(validated_data)
+            if item.quantity:
+                Lot.objects.create(
+                    item=item,
+                    quantity=item.quantity,
+                    expiration_date=item.expiration_date,
+                )
+        return item
+
+    def update(self, instance, validated_data):
+        """
+        Update an item, saving only the submitted columns.
+
+        The quantity is never written back, so a concurrent allocation is
+        not overwritten with the stale in-memory quantity.
+        """
+        validated_data.pop('quantity', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+
+class ItemFilterSerializer(serializers.Serializer):
+    """
+    Validates the query parameters used to filter inventory items.
+    """
+    expired = serializers.BooleanField(default=False)
+    expires_within = serializers.IntegerField(min_value=0, max_value=3650, required=False)
+    expires_after = serializers.DateField(required=False)
+    expires_before = serializers.DateField(required=False)
+    in_stock = serializers.BooleanField(default=False)
+    category = serializers.IntegerField(required=False)
+    supplier = serializers.IntegerField(required=False)
+    min_quantity = serializers.IntegerField(min_value=0, required=False)
+    max_quantity = serializers.IntegerField(min_value=0, required=False)
+    name = serializers.CharField(max_length=100, required=False)
+    ordering = serializers.ChoiceField(choices=tuple(ITEM_ORDERINGS), required=False)
+
+    def validate(self, data):
+        """
+        Reject combinations that can never match.
+        """
+        low, high = data.get('min_quantity'), data.get('max_quantity')
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError(
+                {"max_quantity": "Must not be below min_quantity."}
+            )
+        if data['expired'] and data.get('expires_within') is not None:
+            raise serializers.ValidationError(
+                {"expires_within": "Cannot be combined with expired."}
+            )
+        after, before = data.get('expires_after'), data.get('expires_before')
+        if after and before and after > before:
+            raise serializers.ValidationError(
+                {"expires_before": "Must not be before expires_after."}
+            )
+        return data
+
+
+class ExpiringSummaryQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the expiring-soon summary.
+    """
+    GROUP_BY_CHOICES = ('supplier', 'category')
+
+    days = serializers.IntegerField(min_value=0, max_value=3650, default=30)
+    group_by = serializers.ChoiceField(choices=GROUP_BY_CHOICES, default='supplier')
+
+
+class LotSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the Lot model. Lots are received with a quantity and
+    only drawn down by allocation afterwards.
+    """
+    quantity = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = Lot
+        fields = ['id', 'item', 'lot_number', 'quantity', 'expiration_date', 'received_at']
+        read_only_fields = ['item']
+        extra_kwargs = {'received_at': {'required': False}}
+        # The per-item uniqueness of lot_number is checked in validate_lot_number,
+        # because the item comes from the URL rather than the payload.
+        validators = []
+
+    def validate_lot_number(self, value):
+        """
+        Ensure a lot number is used once per item.
+        """
+        item = self.context['item']
+        if value and item.lots.filter(lot_number=value).exists():
+            raise serializers.ValidationError("This item already has a lot with this number.")
+        return value
+
+
+class LotAllocationSerializer(serializers.Serializer):
+    """
+    Validates a request to allocate stock from an item's lots.
+    """
+    quantity = serializers.IntegerField(min_value=1)
+    include_expired = serializers.BooleanField(default=False)
@@ -1,3 +1,287 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from categories.models import Category
+from suppliers.models import Supplier
+from .lots import allocate, receive_lot
+from .models import Item, Lot
+from .serializers import LotSerializer
+
+
+class ItemExpiryTests(APITestCase):
+    """
+    Tests for the expiry filters and the expired / expiring-soon endpoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='pharmacist', password='secret')
+        cls.today = timezone.localdate()
+        antibiotics = Category.objects.create(name='Antibiotics', description='')
+        vaccines = Category.objects.create(name='Vaccines', description='')
+        acme = Supplier.objects.create(name='Acme', registration_number='REG-1', email='acme@example.com', phone='1')
+        medi = Supplier.objects.create(name='Medi', registration_number='REG-2', email='medi@example.com', phone='2')
+
+        def item(name, days, quantity, supplier, category, price='2.00'):
+            expiry = cls.today + timedelta(days=days) if days is not None else None
+            created = Item.objects.create(
+                name=name,
+                quantity=quantity,
+                unit_price=price,
+                supplier=supplier,
+                category=category,
+                expiration_date=expiry,
+            )
+            if quantity:
+                Lot.objects.create(item=created, quantity=quantity, expiration_date=expiry)
+            return created
+
+        cls.expired = item('Expired', -5, 10, acme, antibiotics)
+        cls.expired_empty = item('Expired empty', -1, 0, acme, antibiotics)
+        cls.today_item = item('Today', 0, 3, acme, vaccines)
+        cls.soon = item('Soon', 20, 4, medi, antibiotics, price='5.00')
+        cls.later = item('Later', 45, 6, medi, vaccines)
+        cls.far = item('Far', 120, 1, acme, vaccines)
+        cls.no_expiry = item('No expiry', None, 8, medi, vaccines)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def list_names(self, **params):
+        response = self.client.get(reverse('item-list-create'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.data['results']]
+
+    def test_unfiltered_list_returns_everything(self):
+        self.assertEqual(len(self.list_names()), 7)
+
+    def test_expires_within_window(self):
+        self.assertEqual(self.list_names(expires_within=30), ['Today', 'Soon'])
+        self.assertEqual(self.list_names(expires_within=60), ['Today', 'Soon', 'Later'])
+
+    def test_expired_filter(self):
+        self.assertEqual(self.list_names(expired='true'), ['Expired', 'Expired empty'])
+        self.assertEqual(self.list_names(expired='true', in_stock='true'), ['Expired'])
+
+    def test_date_range_filter(self):
+        names = self.list_names(
+            expires_after=(self.today + timedelta(days=1)).isoformat(),
+            expires_before=(self.today + timedelta(days=100)).isoformat(),
+        )
+        self.assertEqual(names, ['Soon', 'Later'])
+
+    def test_invalid_filters_are_rejected(self):
+        url = reverse('item-list-create')
+        self.assertEqual(self.client.get(url, {'expires_within': -1}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'expired': 'true', 'expires_within': 30}).status_code, 400)
+
+    def test_expired_view_skips_empty_items(self):
+        response = self.client.get(reverse('item-expired'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.data['results']], ['Expired'])
+        self.assertEqual(response.data['totals']['units'], 10)
+        self.assertEqual(response.data['totals']['stock_value'], Decimal('20.00'))
+
+    def test_expiring_summary_by_supplier(self):
+        response = self.client.get(reverse('item-expiring-summary'), {'days': 60})
+        self.assertEqual(response.status_code, 200)
+        rows = {row['label']: row for row in response.data['results']}
+        self.assertEqual(set(rows), {'Acme', 'Medi'})
+        self.assertEqual(rows['Acme']['item_count'], 1)
+        self.assertEqual(rows['Acme']['earliest_expiration'], self.today)
+        self.assertEqual(rows['Medi']['units'], 10)
+        self.assertEqual(rows['Medi']['stock_value'], Decimal('32.00'))
+        self.assertEqual(response.data['totals']['item_count'], 3)
+
+    def test_expiring_summary_by_category(self):
+        response = self.client.get(reverse('item-expiring-summary'), {'group_by': 'category'})
+        rows = {row['label']: row['item_count'] for row in response.data['results']}
+        self.assertEqual(rows, {'Vaccines': 1, 'Antibiotics': 1})
+
+    def test_only_units_in_expiring_lots_are_counted(self):
+        # Soon holds 4 units expiring in 20 days; the new lot lasts a year.
+        receive_lot(self.soon, 500, expiration_date=self.today + timedelta(days=365))
+        response = self.client.get(reverse('item-expiring-summary'), {'days': 30})
+        rows = {row['label']: row for row in response.data['results']}
+        self.assertEqual((rows['Medi']['units'], rows['Medi']['stock_value']), (4, Decimal('20.00')))
+
+        receive_lot(self.expired, 200, expiration_date=self.today + timedelta(days=365))
+        response = self.client.get(reverse('item-expired'))
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['totals']['units'], 10)
+
+
+class LotAllocationTests(APITestCase):
+    """
+    Tests for receiving lots and FEFO allocation.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='dispenser', password='secret')
+        cls.today = timezone.localdate()
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.item = Item.objects.create(name='Amoxicillin')
+        self.expired = self.receive(5, -1, 'EXP')
+        self.later = self.receive(10, 90, 'LATE')
+        self.soon = self.receive(4, 10, 'SOON')
+        self.undated = self.receive(7, None, 'NODATE')
+
+    def receive(self, quantity, days, number):
+        expiry = self.today + timedelta(days=days) if days is not None else None
+        return receive_lot(self.item, quantity, expiration_date=expiry, lot_number=number)
+
+    def allocate(self, quantity, **extra):
+        return self.client.post(
+            reverse('item-allocate', args=[self.item.pk]), {'quantity': quantity, **extra}, format='json'
+        )
+
+    def test_receiving_updates_item_totals(self):
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 26)
+        self.assertEqual(self.item.expiration_date, self.today - timedelta(days=1))
+
+    def test_allocation_is_first_expiry_first_out(self):
+        response = self.allocate(9)
+        self.assertEqual(response.status_code, 200)
+        taken = [(row['lot_number'], row['taken']) for row in response.data['allocations']]
+        self.assertEqual(taken, [('SOON', 4), ('LATE', 5)])
+        self.assertEqual(response.data['remaining'], 17)
+        self.soon.refresh_from_db()
+        self.later.refresh_from_db()
+        self.assertEqual((self.soon.quantity, self.later.quantity), (0, 5))
+
+    def test_undated_lots_are_used_last(self):
+        allocations = allocate(self.item, 16)
+        self.assertEqual([(lot.lot_number, taken) for lot, taken in allocations],
+                         [('SOON', 4), ('LATE', 10), ('NODATE', 2)])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 10)
+        # Only the expired lot and the undated remainder are left.
+        self.assertEqual(self.item.expiration_date, self.today - timedelta(days=1))
+
+    def test_expired_lots_only_when_requested(self):
+        allocations = allocate(self.item, 2, include_expired=True)
+        self.assertEqual([(lot.lot_number, taken) for lot, taken in allocations], [('EXP', 2)])
+
+    def test_insufficient_stock_changes_nothing(self):
+        response = self.allocate(22)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['available'], 21)
+        self.assertEqual(sum(Lot.objects.filter(item=self.item).values_list('quantity', flat=True)), 26)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 26)
+
+    def test_allocation_picks_lots_in_one_query(self):
+        for n in range(50):
+            self.receive(1, 200 + n, f'BULK-{n}')
+        # Lock the item, pick lots, decrement lots, update the item and its
+        # stock record, plus the savepoint pair.
+        with self.assertNumQueries(7) as queries:
+            allocations = allocate(self.item, 40)
+        self.assertEqual(len(allocations), 2 + 26)
+        # The lot UPDATE does not grow with the number of lots picked.
+        lot_update = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "inventory_lot"')
+        )
+        self.assertEqual(lot_update.count('WHEN'), 1)
+        self.assertEqual(Lot.objects.filter(item=self.item, lot_number__startswith='BULK-', quantity=0).count(), 26)
+
+    def test_receive_lot_endpoint(self):
+        url = reverse('item-lot-list-create', args=[self.item.pk])
+        response = self.client.post(url, {'quantity': 3, 'lot_number': 'NEW'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        duplicate = self.client.post(url, {'quantity': 3, 'lot_number': 'NEW'}, format='json')
+        self.assertEqual(duplicate.status_code, 400)
+        lots = self.client.get(url, {'include_expired': 'false'}).data
+        self.assertEqual([lot['lot_number'] for lot in lots], ['SOON', 'LATE', 'NODATE', 'NEW'])
+
+    def test_concurrent_duplicate_lot_number_is_rejected(self):
+        url = reverse('item-lot-list-create', args=[self.item.pk])
+        # Another receipt takes the number between validation and insert.
+        with mock.patch.object(LotSerializer, 'validate_lot_number', lambda serializer, value: value):
+            response = self.client.post(url, {'quantity': 3, 'lot_number': 'SOON'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('lot_number', response.data)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 26)
+
+    def test_item_quantity_follows_lots(self):
+        response = self.client.post(reverse('item-list-create'), {'name': 'Gauze', 'quantity': 12}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Lot.objects.get(item_id=response.data['id']).quantity, 12)
+        update = self.client.put(
+            reverse('item-detail', args=[response.data['id']]), {'quantity': 3}, format='json'
+        )
+        self.assertEqual(update.status_code, 400)
+
+
+class ItemListTests(APITestCase):
+    """
+    Tests for pagination, filtering and ordering of the item list.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='storeroom', password='secret')
+        cls.gloves = Category.objects.create(name='Gloves', description='')
+        cls.syringes = Category.objects.create(name='Syringes', description='')
+        cls.acme = Supplier.objects.create(name='Acme', registration_number='REG-1', email='a@example.com', phone='1')
+        Item.objects.bulk_create([
+            Item(
+                name=f'{"Glove" if i % 2 else "Syringe"} {i:02d}',
+                category=cls.gloves if i % 2 else cls.syringes,
+                supplier=cls.acme if i % 3 == 0 else None,
+                quantity=i,
+            )
+            for i in range(30)
+        ])
+        cls.url = reverse('item-list-create')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def names(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.data['results']]
+
+    def test_cursor_pages_cover_every_item_once(self):
+        seen = []
+        response = self.client.get(self.url, {'page_size': 8})
+        while True:
+            seen.extend(self.names(response))
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, sorted(Item.objects.values_list('name', flat=True)))
+
+    def test_filters(self):
+        response = self.client.get(self.url, {
+            'category': self.gloves.pk, 'min_quantity': 5, 'max_quantity': 15, 'ordering': '-quantity',
+        })
+        self.assertEqual(self.names(response), ['Glove 15', 'Glove 13', 'Glove 11', 'Glove 09', 'Glove 07', 'Glove 05'])
+        response = self.client.get(self.url, {'supplier': self.acme.pk, 'name': 'syr'})
+        self.assertEqual(self.names(response), ['Syringe 00', 'Syringe 06', 'Syringe 12', 'Syringe 18', 'Syringe 24'])
+
+    def test_page_number_pagination(self):
+        response = self.client.get(self.url, {'page': 2, 'page_size': 10, 'ordering': 'quantity'})
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(response.data['results'][0]['quantity'], 10)
+
+    def test_invalid_ordering_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'ordering': 'description'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'min_quantity': 5, 'max_quantity': 1}).status_code, 400)
+
+    def test_page_query_count(self):
+        # Cursor pagination reads the page without a COUNT query.
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'page_size': 20, 'category': self.gloves.pk})
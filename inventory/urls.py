@@ -1,7 +1,18 @@
 from django.urls import path
-from .views  import ItemListCreateView, ItemDetailView
+from .views  import (
+    ItemAllocateView,
+    ItemDetailView,
+    ItemExpiredView,
+    ItemExpiringSummaryView,
+    ItemListCreateView,
+    ItemLotListCreateView,
+)
 
 urlpatterns = [
     path('items/', ItemListCreateView.as_view(), name='item-list-create'),
+    path('items/expired/', ItemExpiredView.as_view(), name='item-expired'),
+    path('items/expiring/', ItemExpiringSummaryView.as_view(), name='item-expiring-summary'),
     path('items/<int:pk>/', ItemDetailView.as_view(), name='item-detail'),
-]
\ No newline at end of file
+    path('items/<int:pk>/lots/', ItemLotListCreateView.as_view(), name='item-lot-list-create'),
+    path('items/<int:pk>/allocate/', ItemAllocateView.as_view(), name='item-allocate'),
+]
@@ -2,8 +2,21 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from .models import Item
-from .serializers import ItemSerializer
+from datetime import timedelta
+from django.db import IntegrityError
+from django.utils import timezone
+from .expiry import expiry_summary, expiry_totals
+from .filters import ITEM_ORDERINGS, NULLABLE_ORDERINGS, filter_items, has_expiry_filter
+from .lots import InsufficientLotStock, allocate, receive_lot, usable_lots
+from .models import Item, Lot
+from .pagination import ItemCursorPagination, ItemPagePagination
+from .serializers import (
+    ExpiringSummaryQuerySerializer,
+    ItemFilterSerializer,
+    ItemSerializer,
+    LotAllocationSerializer,
+    LotSerializer,
+)
 
 
 class ItemListCreateView(APIView):
@@ -14,21 +27,49 @@ class ItemListCreateView(APIView):
 
     def get(self, request):
         """
-        Retrieve a list of all inventory items.
+        Retrieve inventory items one page at a time.
 
         Parameters:
             request (Request): The HTTP request object.
+                              Supported query parameters:
+                              - expired (bool): Only items past their expiration date.
+                              - expires_within (int): Only items expiring in the next N days.
+                              - expires_after, expires_before (date): Inclusive expiration date range (YYYY-MM-DD).
+                              - in_stock (bool): Only items with a positive quantity.
+                              - category, supplier (int): Restrict to one category or supplier.
+                              - min_quantity, max_quantity (int): Inclusive quantity range.
+                              - name (str): Case-insensitive name prefix.
+                              - ordering (str): name, quantity, expiration_date or id, prefixed
+                                with "-" for descending order. Defaults to expiration_date when an
+                                expiry filter is given and to name otherwise.
+                              - cursor, page_size: Cursor pagination (default 50 per page, max 500).
+                              - page: Page-number pagination instead of a cursor. Always used when
+                                ordering by expiration_date.
 
         Returns:
-            Response: A JSON response containing a list of serialized item objects.
+            Response: A JSON response containing a page of serialized item objects.
                       Status code 200 OK on success.
+                      If the query parameters are invalid, returns errors with status code 400 Bad Request.
 
         Authentication:
             Requires a valid authentication token in the Authorization header.
         """
-        items = Item.objects.all()
-        serializer = ItemSerializer(items, many=True)
-        return Response(serializer.data)
+        query = ItemFilterSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = dict(query.validated_data)
+        ordering = params.pop('ordering', None)
+        if ordering is None:
+            ordering = 'expiration_date' if has_expiry_filter(params) else 'name'
+        items = filter_items(Item.objects.all(), **params)
+
+        if ordering in NULLABLE_ORDERINGS or 'page' in request.query_params:
+            paginator = ItemPagePagination()
+            items = items.order_by(*ITEM_ORDERINGS[ordering])
+        else:
+            paginator = ItemCursorPagination(ITEM_ORDERINGS[ordering])
+        page = paginator.paginate_queryset(items, request, view=self)
+        serializer = ItemSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         """
@@ -153,4 +194,206 @@ class ItemDetailView(APIView):
         if item is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
         item.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ItemExpiredView(APIView):
+    """
+    API view to list inventory items holding expired lots.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Retrieve items with expired lots still in stock, oldest expiry first.
+
+        Parameters:
+            request (Request): The HTTP request object.
+                              Supported query parameters:
+                              - page, page_size: Page-number pagination (default 50 per page, max 500).
+
+        Returns:
+            Response: A JSON response with the reference date, the totals of
+                      the expired lots and a page of serialized items.
+                      Status code 200 OK.
+
+        Authentication:
+            Requires a valid authentication token in the Authorization header.
+        """
+        today = timezone.localdate()
+        lots = Lot.objects.in_stock().expired(today)
+        items = Item.objects.filter(pk__in=lots.values('item')).order_by('expiration_date', 'pk')
+        paginator = ItemPagePagination()
+        page = paginator.paginate_queryset(items, request, view=self)
+        response = paginator.get_paginated_response(ItemSerializer(page, many=True).data)
+        response.data = {"as_of": today, "totals": expiry_totals(lots), **response.data}
+        return response
+
+
+class ItemExpiringSummaryView(APIView):
+    """
+    API view summarising in-stock lots that expire soon, per supplier or category.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Aggregate the lots expiring in the next ``days`` days.
+
+        Only the units in those lots are counted, not the rest of their
+        items' stock.
+
+        Parameters:
+            request (Request): The HTTP request object.
+                              Supported query parameters:
+                              - days (int): Size of the window in days (default 30, max 3650).
+                              - group_by (str): supplier or category (default supplier).
+
+        Returns:
+            Response: A JSON response with one entry per group (item count,
+                      units, stock value and earliest expiration) and the
+                      totals. Status code 200 OK.
+                      If the query parameters are invalid, returns errors with status code 400 Bad Request.
+
+        Authentication:
+            Requires a valid authentication token in the Authorization header.
+        """
+        query = ExpiringSummaryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        days, group_by = query.validated_data['days'], query.validated_data['group_by']
+        today = timezone.localdate()
+        lots = Lot.objects.in_stock().expiring_within(days, today)
+        return Response({
+            "days": days,
+            "from": today,
+            "until": today + timedelta(days=days),
+            "group_by": group_by,
+            "results": expiry_summary(lots, group_by),
+            "totals": expiry_totals(lots),
+        }, status=status.HTTP_200_OK)
+
+
+class ItemLotListCreateView(APIView):
+    """
+    API view to list an item's lots or receive a new lot.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """
+        Retrieve the lots of an item that still hold stock, in FEFO order.
+
+        Parameters:
+            request (Request): The HTTP request object.
+                              Supported query parameters:
+                              - include_expired (bool): Also list expired lots (default true).
+            pk (int): The primary key of the item.
+
+        Returns:
+            Response: A JSON response containing the serialized lots with status code 200 OK.
+                      If the item is not found, returns status code 404 Not Found.
+
+        Authentication:
+            Requires a valid authentication token in the Authorization header.
+        """
+        item = Item.objects.filter(pk=pk).first()
+        if item is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        include_expired = request.query_params.get('include_expired', 'true').lower() != 'false'
+        lots = usable_lots(item, include_expired=include_expired)
+        return Response(LotSerializer(lots, many=True).data)
+
+    def post(self, request, pk):
+        """
+        Receive a new lot of an item and add it to the item's quantity.
+
+        Parameters:
+            request (Request): The HTTP request object containing the lot data in JSON format.
+                              Expected fields:
+                              - quantity (int): Units received (required, at least 1).
+                              - expiration_date (date): Expiry of the lot in YYYY-MM-DD format (optional).
+                              - lot_number (str): Supplier's lot number, unique per item (optional).
+                              - received_at (datetime): When the lot arrived (optional, defaults to now).
+            pk (int): The primary key of the item.
+
+        Returns:
+            Response: A JSON response containing the serialized lot with status code 201 Created.
+                      If the item is not found, returns status code 404 Not Found.
+                      If the input data is invalid, returns errors with status code 400 Bad Request.
+
+        Authentication:
+            Requires a valid authentication token in the Authorization header.
+        """
+        item = Item.objects.filter(pk=pk).first()
+        if item is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        serializer = LotSerializer(data=request.data, context={'item': item})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            lot = receive_lot(item, **serializer.validated_data)
+        except IntegrityError:
+            # A concurrent receipt took the lot number after it was validated.
+            return Response(
+                {"lot_number": ["This item already has a lot with this number."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(LotSerializer(lot).data, status=status.HTTP_201_CREATED)
+
+
+class ItemAllocateView(APIView):
+    """
+    API view to take stock from an item's lots, first-expiry-first-out.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """
+        Allocate a quantity of an item from its soonest-expiring lots.
+
+        Parameters:
+            request (Request): The HTTP request object containing the allocation in JSON format.
+                              Expected fields:
+                              - quantity (int): Units to allocate (required, at least 1).
+                              - include_expired (bool): Allow expired lots (optional, default false).
+            pk (int): The primary key of the item.
+
+        Returns:
+            Response: A JSON response with the lots drawn from and the item's
+                      remaining quantity, with status code 200 OK.
+                      If the item is not found, returns status code 404 Not Found.
+                      If the input is invalid or the lots hold too little stock,
+                      returns errors with status code 400 Bad Request.
+
+        Authentication:
+            Requires a valid authentication token in the Authorization header.
+        """
+        if not Item.objects.filter(pk=pk).exists():
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        serializer = LotAllocationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            allocations = allocate(pk, **serializer.validated_data)
+        except InsufficientLotStock as exc:
+            return Response(
+                {"error": str(exc), "available": exc.available},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        item = Item.objects.only('quantity', 'expiration_date').get(pk=pk)
+        return Response({
+            "item": pk,
+            "quantity": serializer.validated_data['quantity'],
+            "remaining": item.quantity,
+            "expiration_date": item.expiration_date,
+            "allocations": [
+                {
+                    "lot": lot.pk,
+                    "lot_number": lot.lot_number,
+                    "expiration_date": lot.expiration_date,
+                    "taken": taken,
+                    "remaining": lot.quantity,
+                }
+                for lot, taken in allocations
+            ],
+        }, status=status.HTTP_200_OK)
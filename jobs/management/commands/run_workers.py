@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from jobs.process import init_worker, run_in_worker
+from jobs.worker import claim_jobs, requeue_stale_jobs, run_pending
+
+# How often the poll loop looks for jobs whose worker died mid-run.
+STALE_CHECK_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the queue with a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help="Worker processes; 0 runs jobs in this process (default: CPU count)",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Seconds to wait between polls when the queue is empty (default: 1)",
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help="Seconds after which a running job is assumed lost and queued again (default: 600)",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is empty instead of polling forever",
+        )
+
+    def handle(self, *args, **options):
+        self.next_stale_check = 0
+        self.requeue_stale(options)
+
+        if options['processes'] == 0:
+            self.run_inline(options)
+        else:
+            self.run_pool(options)
+
+    def requeue_stale(self, options):
+        """
+        Recover jobs left running by a dead worker, at most once per
+        ``STALE_CHECK_INTERVAL`` seconds.
+        """
+        if time.monotonic() < self.next_stale_check:
+            return
+        self.next_stale_check = time.monotonic() + STALE_CHECK_INTERVAL
+        try:
+            requeued, failed = requeue_stale_jobs(timedelta(seconds=options['stale_after']))
+        except DatabaseError as exc:
+            self.stderr.write(f"Could not requeue stale jobs: {exc}")
+            connections.close_all()
+            return
+        if requeued:
+            self.stdout.write(f"Queued {requeued} stale jobs again.")
+        if failed:
+            self.stdout.write(f"Marked {failed} stale jobs failed after their last attempt.")
+
+    def run_inline(self, options):
+        while True:
+            self.requeue_stale(options)
+            count = run_pending()
+            if count:
+                self.stdout.write(f"Ran {count} jobs.")
+            elif options['once']:
+                return
+            else:
+                time.sleep(options['poll_interval'])
+
+    def run_pool(self, options):
+        processes = options['processes']
+        # Workers are spawned rather than forked so they never share the
+        # parent's database sockets.
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        in_flight = set()
+        with ProcessPoolExecutor(processes, mp_context=context, initializer=init_worker) as pool:
+            try:
+                while True:
+                    self.requeue_stale(options)
+                    free = processes - len(in_flight)
+                    try:
+                        job_ids = claim_jobs(free) if free else []
+                    except DatabaseError as exc:
+                        # A dropped connection or lock timeout should not
+                        # take the supervisor down; poll again shortly.
+                        self.stderr.write(f"Could not claim jobs: {exc}")
+                        connections.close_all()
+                        job_ids = []
+                    for job_id in job_ids:
+                        in_flight.add(pool.submit(run_in_worker, job_id))
+
+                    if not in_flight:
+                        if options['once']:
+                            return
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, in_flight = wait(
+                        in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        exception = future.exception()
+                        if exception is not None:
+                            self.stderr.write(f"Worker crashed: {exception!r}")
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping; waiting for running jobs to finish.")
@@ -0,0 +1,28 @@
+"""
+Entry points for worker processes started by ``manage.py run_workers``.
+
+Spawned workers import this module before Django is set up, so it must not
+import models at module level.
+"""
+
+
+def init_worker():
+    """
+    Set up Django in a freshly spawned worker process.
+    """
+    import django
+    django.setup()
+
+
+def run_in_worker(job_id):
+    """
+    Run one claimed job, releasing the worker's database connection afterwards.
+    """
+    from django.db import connections
+
+    from .worker import run_job
+
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()
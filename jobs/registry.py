@@ -0,0 +1,68 @@
+from .models import Job
+
+_tasks = {}
+
+
+def task(name):
+    """
+    Register a function as a background task under ``name``.
+
+    The function receives the job payload as keyword arguments and may
+    return a JSON-serializable result, which is stored on the job.
+    """
+    def register(func):
+        if name in _tasks and _tasks[name] is not func:
+            raise ValueError(f"A task named {name} is already registered.")
+        _tasks[name] = func
+        return func
+    return register
+
+
+def get_task(name):
+    """
+    Look up a registered task.
+
+    Raises:
+        KeyError: If no task is registered under ``name``
+    """
+    return _tasks[name]
+
+
+def enqueue(name, max_attempts=3, created_by=None, **payload):
+    """
+    Queue a background job.
+
+    The job row is written in the caller's transaction, so workers only
+    see it once that transaction commits.
+
+    Args:
+        name (str): Registered task name
+        max_attempts (int): How many times the job may run before failing
+        created_by: User whose request queued the job, if any
+        **payload: JSON-serializable keyword arguments for the task
+
+    Returns:
+        Job: The queued job
+    """
+    get_task(name)
+    return Job.objects.create(task=name, payload=payload, max_attempts=max_attempts, created_by=created_by)
+
+
+def enqueue_many(name, payloads, max_attempts=3, created_by=None):
+    """
+    Queue one job per payload with a single ``bulk_create``.
+
+    Args:
+        name (str): Registered task name
+        payloads (list): Keyword arguments for each job
+        max_attempts (int): How many times each job may run before failing
+        created_by: User whose request queued the jobs, if any
+
+    Returns:
+        list: The queued jobs, in payload order
+    """
+    get_task(name)
+    return Job.objects.bulk_create([
+        Job(task=name, payload=payload, max_attempts=max_attempts, created_by=created_by)
+        for payload in payloads
+    ])
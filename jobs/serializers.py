@@ -0,0 +1,26 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for reporting a background job's progress.
+
+    The stored traceback is only shown when ``show_traceback`` is set in
+    the context; otherwise a failed job reports a short message.
+    """
+    FAILED_MESSAGE = "The job raised an error."
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'task', 'status', 'result', 'error', 'attempts',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if data['error'] and not self.context.get('show_traceback'):
+            data['error'] = self.FAILED_MESSAGE
+        return data
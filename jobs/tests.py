@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import Job
+from .registry import enqueue, task
+from .worker import STALE_ERROR, claim_jobs, requeue_stale_jobs, run_job
+
+calls = []
+
+
+@task('jobs.tests.record')
+def record(value):
+    calls.append(value)
+    return {'value': value}
+
+
+@task('jobs.tests.explode')
+def explode():
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    """
+    Tests for claiming, running and retrying background jobs.
+    """
+
+    def test_claimed_job_runs_and_stores_result(self):
+        job = enqueue('jobs.tests.record', value=7)
+        self.assertEqual(claim_jobs(10), [job.pk])
+        self.assertEqual(claim_jobs(10), [])
+        self.assertEqual(run_job(job.pk), 'SUCCEEDED')
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'value': 7})
+        self.assertEqual(job.attempts, 1)
+        self.assertIn(7, calls)
+
+    def test_failed_job_is_retried_then_fails(self):
+        job = enqueue('jobs.tests.explode', max_attempts=2)
+        claim_jobs(1)
+        self.assertEqual(run_job(job.pk), 'QUEUED')
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        claim_jobs(1)
+        self.assertEqual(run_job(job.pk), 'FAILED')
+        job.refresh_from_db()
+        self.assertIn('RuntimeError: boom', job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        retry = enqueue('jobs.tests.record', value=1, max_attempts=2)
+        exhausted = enqueue('jobs.tests.record', value=2, max_attempts=1)
+        fresh = enqueue('jobs.tests.record', value=3)
+        claim_jobs(3)
+        Job.objects.exclude(pk=fresh.pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), (1, 1))
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {retry.pk: 'QUEUED', exhausted.pk: 'FAILED', fresh.pk: 'RUNNING'})
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.error, STALE_ERROR)
+        self.assertIsNotNone(exhausted.finished_at)
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(KeyError):
+            enqueue('jobs.tests.missing')
+
+
+class JobDetailTests(APITestCase):
+    """
+    Tests for who may poll a job and how much of its error they see.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        users = get_user_model().objects
+        cls.owner = users.create_user(username='uploader', password='secret')
+        cls.other = users.create_user(username='bystander', password='secret')
+        cls.admin = users.create_user(username='operator', password='secret', role='admin')
+        cls.job = enqueue('jobs.tests.explode', max_attempts=1, created_by=cls.owner)
+        claim_jobs(1)
+        run_job(cls.job.pk)
+
+    def get(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get(reverse('jobs:job-detail', args=[self.job.pk]))
+
+    def test_owner_sees_a_short_error(self):
+        response = self.get(self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'FAILED')
+        self.assertNotIn('Traceback', response.data['error'])
+        self.assertNotIn('boom', response.data['error'])
+
+    def test_other_users_cannot_see_the_job(self):
+        self.assertEqual(self.get(self.other).status_code, 404)
+
+    def test_admin_sees_the_traceback(self):
+        response = self.get(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('RuntimeError: boom', response.data['error'])
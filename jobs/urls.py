@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import JobDetailView
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('<int:pk>/', JobDetailView.as_view(), name='job-detail'),
+]
@@ -0,0 +1,27 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.shortcuts import get_object_or_404
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobDetailView(APIView):
+    """
+    API view for polling the status of a background job.
+
+    Users only see the jobs their own requests queued. Admins see every
+    job, including the traceback of failed runs.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """
+        Retrieve a job's status and, once finished, its result or error.
+        """
+        is_admin = request.user.role == 'admin'
+        jobs = Job.objects.all() if is_admin else Job.objects.filter(created_by=request.user)
+        job = get_object_or_404(jobs, pk=pk)
+        serializer = JobSerializer(job, context={'show_traceback': is_admin})
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,110 @@
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+STALE_ERROR = "The worker running this job stopped before it finished."
+
+
+def claim_jobs(limit):
+    """
+    Atomically claim up to ``limit`` runnable jobs and mark them running.
+
+    ``SKIP LOCKED`` lets several worker processes poll the queue at once
+    without claiming the same job or waiting on each other.
+
+    Returns:
+        list: IDs of the claimed jobs
+    """
+    with transaction.atomic():
+        job_ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='QUEUED', run_after__lte=timezone.now())
+            .order_by('run_after', 'id')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if job_ids:
+            Job.objects.filter(pk__in=job_ids).update(
+                status='RUNNING',
+                started_at=timezone.now(),
+                attempts=F('attempts') + 1,
+            )
+    return job_ids
+
+
+def run_job(job_id):
+    """
+    Run one claimed job and record its outcome.
+
+    Failed jobs are queued again with exponential backoff until they have
+    used up ``max_attempts``.
+
+    Returns:
+        str: The job's final status
+    """
+    job = Job.objects.get(pk=job_id)
+    try:
+        result = get_task(job.task)(**job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = 'QUEUED'
+            job.run_after = timezone.now() + timedelta(seconds=2 ** job.attempts)
+        else:
+            job.status = 'FAILED'
+            job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'run_after', 'finished_at'])
+        return job.status
+
+    job.status = 'SUCCEEDED'
+    job.result = result
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    return job.status
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Queue jobs again whose worker died while running them.
+
+    A job that has already used up ``max_attempts`` is marked failed
+    instead, so a task that keeps killing its worker does not loop forever.
+
+    Args:
+        older_than (timedelta): How long a job may run before it is considered lost
+
+    Returns:
+        tuple: Number of jobs queued again and number marked failed
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status='RUNNING', started_at__lt=now - older_than)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='FAILED', error=STALE_ERROR, finished_at=now
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(status='QUEUED', run_after=now)
+    return requeued, failed
+
+
+def run_pending(limit=None):
+    """
+    Run queued jobs in the current process until none are runnable.
+
+    Meant for tests and for ``run_workers --processes 0``.
+
+    Returns:
+        int: Number of jobs run
+    """
+    count = 0
+    while limit is None or count < limit:
+        job_ids = claim_jobs(1)
+        if not job_ids:
+            break
+        run_job(job_ids[0])
+        count += 1
+    return count
@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from categories.models import Category
+from products.models import Product
+from pos.serializers import SaleSerializer
+
+
+class Command(BaseCommand):
+    """
+    Benchmark sale creation for a range of basket sizes.
+
+    Everything runs inside a transaction that is rolled back at the end,
+    so the benchmark leaves no data behind.
+    """
+    help = "Report queries and latency of creating a sale per basket size."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[1, 10, 40, 100],
+            help="Basket sizes (number of sale lines) to benchmark."
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help="Number of sales created per basket size."
+        )
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            cashier = get_user_model().objects.create_user(username='benchmark-sales-cashier')
+            category = Category.objects.create(name='Benchmark', description='Benchmark products')
+            products = Product.objects.bulk_create([
+                Product(
+                    category=category,
+                    name=f'Benchmark product {i}',
+                    sku=f'BENCH-SALE-{i:05d}',
+                    unit_price='1.00',
+                    stock_level=len(sizes) * repeat * 10,
+                )
+                for i in range(max(sizes))
+            ])
+
+            self.stdout.write(f"{'lines':>6} {'queries':>8} {'avg ms':>8} {'max ms':>8}")
+            for size in sizes:
+                details = [{'product': product.pk, 'quantity': 1} for product in products[:size]]
+                timings = []
+                query_count = 0
+                for _ in range(repeat):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        serializer = SaleSerializer(data={'details': details})
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save(cashier=cashier)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    query_count = len(queries)
+                self.stdout.write(
+                    f"{size:>6} {query_count:>8} "
+                    f"{sum(timings) / len(timings):>8.2f} {max(timings):>8.2f}"
+                )
+
+            transaction.set_rollback(True)
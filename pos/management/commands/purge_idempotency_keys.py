@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pos.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    Delete idempotency keys whose replay window has passed.
+    """
+    help = "Delete expired sale idempotency keys."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(f"Deleted {deleted} expired idempotency keys.")
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from pos.models import Sale
+from pos.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    """
+    Rebuild or backfill the daily sales rollup for a date range.
+    """
+    help = "Recompute DailySalesSummary rows from sales for a date range."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day to rebuild (YYYY-MM-DD). Defaults to the first sale.")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD). Defaults to the last sale.")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows fetched per round-trip.")
+
+    def parse(self, value, option):
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"--{option} must be a date in YYYY-MM-DD format.")
+        return day
+
+    def handle(self, *args, **options):
+        bounds = Sale.objects.aggregate(first=Min('date'), last=Max('date'))
+        if bounds['first'] is None and not (options['start'] and options['end']):
+            self.stdout.write("No sales to roll up.")
+            return
+
+        start = (
+            self.parse(options['start'], 'start') if options['start']
+            else timezone.localdate(bounds['first'])
+        )
+        end = (
+            self.parse(options['end'], 'end') if options['end']
+            else timezone.localdate(bounds['last'])
+        )
+        if start > end:
+            raise CommandError("--start must not be after --end.")
+
+        written = rebuild_rollup(start, end, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt sales rollup from {start} to {end}: {written} rows written."
+        ))
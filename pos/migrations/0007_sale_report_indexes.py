@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_patients_delete_patient'),
+        ('pos', '0006_alter_sale_total_amount_idempotencykey'),
+        ('products', '0003_product_needs_reorder_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['date', 'status'], name='sale_date_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saledetail',
+            index=models.Index(fields=['product', 'sale'], name='saledetail_product_sale_idx'),
+        ),
+    ]
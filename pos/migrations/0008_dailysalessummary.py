@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0007_sale_report_indexes'),
+        ('products', '0003_product_needs_reorder_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_method', models.CharField(blank=True, default='', help_text='Sale payment method; empty when the sale has none', max_length=20)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Line subtotals less the share of the sale discount', max_digits=14)),
+                ('discount', models.DecimalField(decimal_places=2, default=0, help_text='Share of the sale discounts apportioned to this product', max_digits=14)),
+                ('sale_count', models.IntegerField(default=0, help_text='Sales counted once each, against their lowest product ID; only meaningful when summed across products')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'payment_method', 'product'), name='unique_daily_sales_summary')],
+            },
+        ),
+    ]
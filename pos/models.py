@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth import get_user_model
 from products.models import Product
@@ -36,6 +37,11 @@ class Sale(models.Model):
         help_text="The patient associated with this sale; null if not specified"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'status'], name='sale_date_status_idx'),
+        ]
+
     def __str__(self):
         return f"Sale {self.id} on {self.date} ({self.status})"
 
@@ -49,6 +55,11 @@ class SaleDetail(models.Model):
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     subtotal = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'sale'], name='saledetail_product_sale_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         """
         Automatically calculate and set the subtotal before saving.
@@ -57,4 +68,75 @@ class SaleDetail(models.Model):
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.quantity} x {self.product.name} in Sale {self.sale.id}"
\ No newline at end of file
+        return f"{self.quantity} x {self.product.name} in Sale {self.sale.id}"
+
+
+class DailySalesSummary(models.Model):
+    """
+    Incrementally maintained daily totals per product and payment method.
+
+    Rows cover every sale that is not cancelled and are kept up to date by
+    ``pos.rollup`` when sales are created or change status or payment
+    method. ``manage.py rebuild_sales_rollup`` recomputes any date range.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    payment_method = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        help_text="Sale payment method; empty when the sale has none"
+    )
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Line subtotals less the share of the sale discount"
+    )
+    discount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Share of the sale discounts apportioned to this product"
+    )
+    sale_count = models.IntegerField(
+        default=0,
+        help_text="Sales counted once each, against their lowest product ID; "
+                  "only meaningful when summed across products"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'payment_method', 'product'],
+                name='unique_daily_sales_summary',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.date} ({self.payment_method or 'unspecified'})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a sale request sent with an ``Idempotency-Key`` header.
+
+    Retries carrying the same key replay the stored response instead of
+    creating the sale again. Keys are scoped to the user who sent them.
+    """
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of the request body")
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+
+    def __str__(self):
+        return f"Idempotency key {self.key} for {self.user}"
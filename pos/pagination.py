@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class SaleCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the sales list, newest sales first.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-date', '-id')
@@ -0,0 +1,158 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, DateField, F, Sum, Value
+from django.db.models.functions import Concat, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Sale, SaleDetail
+
+# Report groupings: the Sale field each one groups on, and the truncation
+# applied to it for calendar periods.
+GROUPINGS = {
+    'day': ('date', TruncDate),
+    'week': ('date', TruncWeek),
+    'month': ('date', TruncMonth),
+    'cashier': ('cashier', None),
+    'payment_method': ('payment_method', None),
+    'patient': ('patient', None),
+}
+
+
+def filter_sales(queryset, start=None, end=None, status=None, cashier=None, patient=None,
+                 include_cancelled=False):
+    """
+    Narrow a Sale queryset to a date range and the given attributes.
+
+    Dates are converted to datetime bounds in the current time zone so the
+    filter stays a range scan on ``Sale.date``.
+
+    Args:
+        queryset: Sale queryset to filter
+        start (date): First day to include
+        end (date): Last day to include
+        status (str): Sale status; cancelled sales are excluded when omitted
+            unless ``include_cancelled`` is set
+        cashier (int): Cashier (user) ID
+        patient (int): Patient ID
+        include_cancelled (bool): Keep cancelled sales when no status is given
+
+    Returns:
+        QuerySet: Filtered sales
+    """
+    if start:
+        queryset = queryset.filter(date__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        next_day = end + timedelta(days=1)
+        queryset = queryset.filter(date__lt=timezone.make_aware(datetime.combine(next_day, time.min)))
+    if status:
+        queryset = queryset.filter(status=status)
+    elif not include_cancelled:
+        queryset = queryset.exclude(status='CANCELLED')
+    if cashier:
+        queryset = queryset.filter(cashier_id=cashier)
+    if patient:
+        queryset = queryset.filter(patient_id=patient)
+    return queryset
+
+
+def _group_expression(group_by, prefix=''):
+    """
+    Build the grouping expression for a report, optionally across a relation.
+    """
+    field, truncate = GROUPINGS[group_by]
+    if truncate is None:
+        return F(prefix + field)
+    return truncate(prefix + field, output_field=DateField())
+
+
+def _group_labels(group_by):
+    """
+    Human-readable label expression for groupings keyed by a foreign key.
+    """
+    if group_by == 'cashier':
+        return F('cashier__username')
+    if group_by == 'patient':
+        return Concat('patient__first_name', Value(' '), 'patient__last_name')
+    return None
+
+
+def sales_summary(sales, group_by):
+    """
+    Aggregate revenue, discounts and item counts per group in the database.
+
+    Sale-level sums and line-level item counts are aggregated separately,
+    so joining the lines never multiplies sale totals.
+
+    Args:
+        sales: Filtered Sale queryset
+        group_by (str): One of the GROUPINGS keys
+
+    Returns:
+        list: One dict per group, ordered by group
+    """
+    rows = sales.annotate(group=_group_expression(group_by))
+    label = _group_labels(group_by)
+    if label is not None:
+        rows = rows.annotate(label=label)
+        rows = rows.values('group', 'label')
+    else:
+        rows = rows.values('group')
+    rows = rows.annotate(
+        sale_count=Count('id'),
+        revenue=Sum('total_amount'),
+        discount=Sum('discount'),
+    ).order_by('group')
+
+    item_counts = dict(
+        SaleDetail.objects.filter(sale__in=sales)
+        .annotate(group=_group_expression(group_by, prefix='sale__'))
+        .values('group')
+        .annotate(item_count=Sum('quantity'))
+        .values_list('group', 'item_count')
+    )
+
+    results = []
+    for row in rows:
+        row['item_count'] = item_counts.get(row['group'], 0)
+        results.append(row)
+    return results
+
+
+def sales_totals(sales):
+    """
+    Aggregate revenue, discounts and item counts over all filtered sales.
+
+    Args:
+        sales: Filtered Sale queryset
+
+    Returns:
+        dict: Totals for the whole report
+    """
+    totals = sales.aggregate(
+        sale_count=Count('id'),
+        revenue=Sum('total_amount'),
+        discount=Sum('discount'),
+    )
+    totals['item_count'] = (
+        SaleDetail.objects.filter(sale__in=sales).aggregate(total=Sum('quantity'))['total'] or 0
+    )
+    return totals
+
+
+def top_products(sales, limit=10):
+    """
+    Rank products by revenue across the filtered sales.
+
+    Args:
+        sales: Filtered Sale queryset
+        limit (int): Number of products to return
+
+    Returns:
+        list: Product rows with quantity and revenue, best sellers first
+    """
+    return list(
+        SaleDetail.objects.filter(sale__in=sales, product__isnull=False)
+        .values('product', 'product__name', 'product__sku')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('subtotal'))
+        .order_by('-revenue', 'product')[:limit]
+    )
@@ -0,0 +1,314 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Case, DateField, F, Sum, Value, When
+from django.db.models.functions import NullIf, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DailySalesSummary, Sale, SaleDetail
+from .reports import filter_sales
+
+CENT = Decimal('0.01')
+
+# Report groupings the rollup can answer, and the expression each groups on.
+ROLLUP_GROUPINGS = {
+    'day': lambda: F('date'),
+    'week': lambda: TruncWeek('date', output_field=DateField()),
+    'month': lambda: TruncMonth('date', output_field=DateField()),
+    'payment_method': lambda: NullIf('payment_method', Value('')),
+}
+
+
+def is_counted(sale):
+    """
+    Whether a sale contributes to the rollup.
+    """
+    return sale.status != 'CANCELLED'
+
+
+def rollup_key(sale):
+    """
+    The (date, payment_method) part of the rollup key for a sale.
+    """
+    return timezone.localdate(sale.date), sale.payment_method or ''
+
+
+def sale_contributions(discount, lines):
+    """
+    Split a sale into per-product rollup contributions.
+
+    The discount is apportioned over the products in proportion to their
+    subtotals, with any rounding remainder on the last product, so the
+    revenue of all products adds up to the sale's ``total_amount``. The
+    sale itself is counted against its lowest product ID.
+
+    Args:
+        discount (Decimal): Discount applied to the sale
+        lines (Iterable[tuple]): (product_id, quantity, subtotal) per sale line
+
+    Returns:
+        dict: Mapping of product ID to [quantity, revenue, discount, sale_count]
+    """
+    per_product = {}
+    for product_id, quantity, subtotal in lines:
+        if product_id is None:
+            continue
+        entry = per_product.setdefault(product_id, [0, Decimal('0'), Decimal('0'), 0])
+        entry[0] += quantity
+        entry[1] += subtotal
+
+    if not per_product:
+        return per_product
+
+    gross = sum(entry[1] for entry in per_product.values())
+    applied = min(Decimal(discount or 0), gross)
+    remaining = applied
+    product_ids = sorted(per_product)
+    for index, product_id in enumerate(product_ids):
+        entry = per_product[product_id]
+        if index == len(product_ids) - 1:
+            share = remaining
+        else:
+            share = (applied * entry[1] / gross).quantize(CENT)
+            remaining -= share
+        entry[1] -= share
+        entry[2] = share
+    per_product[product_ids[0]][3] = 1
+    return per_product
+
+
+def apply_to_rollup(day, payment_method, contributions, sign=1):
+    """
+    Add (``sign=1``) or remove (``sign=-1``) contributions for one day and
+    payment method.
+
+    Costs three queries whatever the number of products: missing rows are
+    inserted with ``ignore_conflicts``, their keys are read back, and all
+    counters are moved by a single ``CASE`` update.
+
+    Args:
+        day (date): Rollup date
+        payment_method (str): Payment method, '' when unspecified
+        contributions (dict): Output of ``sale_contributions``
+        sign (int): 1 to add, -1 to remove
+    """
+    if not contributions:
+        return
+
+    DailySalesSummary.objects.bulk_create(
+        [
+            DailySalesSummary(date=day, payment_method=payment_method, product_id=product_id)
+            for product_id in contributions
+        ],
+        ignore_conflicts=True,
+    )
+    row_ids = dict(
+        DailySalesSummary.objects.filter(
+            date=day, payment_method=payment_method, product_id__in=contributions
+        ).values_list('product_id', 'pk')
+    )
+
+    def delta(position, output_field):
+        return Case(
+            *(When(pk=row_ids[product_id], then=Value(sign * values[position]))
+              for product_id, values in contributions.items()),
+            default=Value(0),
+            output_field=output_field,
+        )
+
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    DailySalesSummary.objects.filter(pk__in=row_ids.values()).update(
+        quantity=F('quantity') + delta(0, models.IntegerField()),
+        revenue=F('revenue') + delta(1, amount),
+        discount=F('discount') + delta(2, amount),
+        sale_count=F('sale_count') + delta(3, models.IntegerField()),
+    )
+
+
+def record_sale(sale, details):
+    """
+    Add a newly created sale to the rollup.
+
+    Args:
+        sale: Sale instance
+        details (Iterable[SaleDetail]): The sale's lines
+    """
+    if not is_counted(sale):
+        return
+    contributions = sale_contributions(
+        sale.discount,
+        ((detail.product_id, detail.quantity, detail.subtotal) for detail in details),
+    )
+    apply_to_rollup(*rollup_key(sale), contributions)
+
+
+def record_sale_change(previous, sale):
+    """
+    Move a sale's contribution after its status or payment method changed.
+
+    Args:
+        previous: Sale instance as it was before the change
+        sale: Sale instance after the change
+    """
+    if is_counted(previous) == is_counted(sale) and rollup_key(previous) == rollup_key(sale):
+        return
+    contributions = sale_contributions(
+        sale.discount,
+        sale.details.values_list('product_id', 'quantity', 'subtotal'),
+    )
+    with transaction.atomic():
+        if is_counted(previous):
+            apply_to_rollup(*rollup_key(previous), contributions, sign=-1)
+        if is_counted(sale):
+            apply_to_rollup(*rollup_key(sale), contributions)
+
+
+def rebuild_rollup(start, end, batch_size=2000):
+    """
+    Recompute the rollup from sales for an inclusive date range.
+
+    Lines are streamed in sale order and totals are flushed one day at a
+    time, so memory stays bounded by the number of products sold per day.
+
+    Args:
+        start (date): First day to rebuild
+        end (date): Last day to rebuild
+        batch_size (int): Rows fetched per database round-trip
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    sales = filter_sales(Sale.objects.all(), start=start, end=end)
+    lines = (
+        SaleDetail.objects.filter(sale__in=sales)
+        .order_by('sale__date', 'sale_id')
+        .values_list(
+            'sale_id', 'sale__date', 'sale__payment_method', 'sale__discount',
+            'product_id', 'quantity', 'subtotal',
+        )
+        .iterator(chunk_size=batch_size)
+    )
+
+    written = 0
+    day_totals = defaultdict(lambda: [0, Decimal('0'), Decimal('0'), 0])
+    current_day = None
+    current_sale = None
+    sale_lines = []
+
+    def flush_sale():
+        if current_sale is None:
+            return
+        _, date, payment_method, discount = current_sale
+        for product_id, values in sale_contributions(discount, sale_lines).items():
+            totals = day_totals[(payment_method or '', product_id)]
+            for position, value in enumerate(values):
+                totals[position] += value
+
+    def flush_day():
+        nonlocal written
+        if current_day is None:
+            return
+        DailySalesSummary.objects.bulk_create(
+            [
+                DailySalesSummary(
+                    date=current_day,
+                    payment_method=payment_method,
+                    product_id=product_id,
+                    quantity=values[0],
+                    revenue=values[1],
+                    discount=values[2],
+                    sale_count=values[3],
+                )
+                for (payment_method, product_id), values in day_totals.items()
+            ],
+            batch_size=batch_size,
+        )
+        written += len(day_totals)
+        day_totals.clear()
+
+    with transaction.atomic():
+        DailySalesSummary.objects.filter(date__gte=start, date__lte=end).delete()
+        for sale_id, date, payment_method, discount, product_id, quantity, subtotal in lines:
+            if current_sale is None or current_sale[0] != sale_id:
+                flush_sale()
+                day = timezone.localdate(date)
+                if day != current_day:
+                    flush_day()
+                    current_day = day
+                current_sale = (sale_id, date, payment_method, discount)
+                sale_lines = []
+            sale_lines.append((product_id, quantity, subtotal))
+        flush_sale()
+        flush_day()
+    return written
+
+
+def rollup_rows(start=None, end=None):
+    """
+    Rollup rows for an inclusive date range.
+
+    Rows emptied by cancellations are skipped so reports only show groups
+    that still have sales.
+    """
+    rows = DailySalesSummary.objects.exclude(quantity=0)
+    if start:
+        rows = rows.filter(date__gte=start)
+    if end:
+        rows = rows.filter(date__lte=end)
+    return rows
+
+
+def rollup_summary(start, end, group_by):
+    """
+    Report revenue, discounts and item counts per group from the rollup.
+
+    Args:
+        start (date): First day to include, or None
+        end (date): Last day to include, or None
+        group_by (str): One of the ROLLUP_GROUPINGS keys
+
+    Returns:
+        list: One dict per group, ordered by group
+    """
+    return list(
+        rollup_rows(start, end)
+        .annotate(group=ROLLUP_GROUPINGS[group_by]())
+        .values('group')
+        .annotate(
+            sale_count=Sum('sale_count'),
+            revenue=Sum('revenue'),
+            discount=Sum('discount'),
+            item_count=Sum('quantity'),
+        )
+        .order_by('group')
+    )
+
+
+def rollup_totals(start, end):
+    """
+    Report totals for a date range from the rollup.
+    """
+    totals = rollup_rows(start, end).aggregate(
+        sale_count=Sum('sale_count'),
+        revenue=Sum('revenue'),
+        discount=Sum('discount'),
+        item_count=Sum('quantity'),
+    )
+    totals['sale_count'] = totals['sale_count'] or 0
+    totals['item_count'] = totals['item_count'] or 0
+    return totals
+
+
+def rollup_top_products(start, end, limit=10):
+    """
+    Rank products by revenue for a date range from the rollup.
+
+    Revenue here is before discounts, matching ``reports.top_products``.
+    """
+    return list(
+        rollup_rows(start, end)
+        .values('product', 'product__name', 'product__sku')
+        .annotate(quantity=Sum('quantity'), revenue=Sum(F('revenue') + F('discount')))
+        .order_by('-revenue', 'product')[:limit]
+    )
@@ -1,13 +1,56 @@
+from collections import Counter
+from django.db import transaction
 from rest_framework import serializers
 from .models import Sale, SaleDetail
+from . import rollup
 from products.models import Product
+from products.stock import InsufficientStock, decrement_stock, increment_stock
 from patients.models import Patients
 
+def product_pk(data):
+    """
+    Read a product primary key from request data.
+
+    Returns:
+        int: The key, or None for booleans, non-integral numbers and
+            strings that are not integers
+    """
+    if isinstance(data, bool):
+        return None
+    if isinstance(data, int):
+        return data
+    if isinstance(data, float):
+        return int(data) if data.is_integer() else None
+    if isinstance(data, str):
+        try:
+            return int(data)
+        except ValueError:
+            return None
+    return None
+
+
+class SaleProductField(serializers.PrimaryKeyRelatedField):
+    """
+    Product field that resolves against the products SaleSerializer preloads,
+    falling back to a regular lookup (and its error messages) otherwise.
+
+    Only integer keys are accepted: ``True`` or ``1.9`` would otherwise be
+    coerced to product 1.
+    """
+    def to_internal_value(self, data):
+        pk = product_pk(data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        products = self.context.get('products')
+        if products is not None and pk in products:
+            return products[pk]
+        return super().to_internal_value(pk)
+
 class SaleDetailSerializer(serializers.ModelSerializer):
     """
     Serializer for SaleDetail model, handling serialization and validation of individual products in a sale.
     """
-    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
+    product = SaleProductField(queryset=Product.objects.all())
     unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     subtotal = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, read_only=True)
 
@@ -51,51 +94,130 @@ class SaleSerializer(serializers.ModelSerializer):
         fields = ['id', 'date', 'total_amount', 'discount', 'status', 'payment_method', 'cashier', 'patient', 'details']
         read_only_fields = ['date', 'total_amount', 'cashier']
 
+    def to_internal_value(self, data):
+        """
+        Load every product referenced by the sale lines in one query before
+        the lines are validated.
+        """
+        details = data.get('details') if hasattr(data, 'get') else None
+        if isinstance(details, list):
+            product_ids = {
+                product_pk(detail.get('product')) for detail in details if isinstance(detail, dict)
+            }
+            product_ids.discard(None)
+            self.context['products'] = Product.objects.in_bulk(product_ids)
+        return super().to_internal_value(data)
+
     def validate(self, data):
         """
         Validate the sale data, ensuring details are provided and discount is non-negative.
         """
-        if not data.get('details'):
+        if self.instance is None and not data.get('details'):
             raise serializers.ValidationError({"details": "At least one sale detail is required."})
         if 'discount' in data and data['discount'] < 0:
             raise serializers.ValidationError({"discount": "Discount cannot be negative."})
+        if self.instance is None and data.get('status') == 'CANCELLED':
+            raise serializers.ValidationError({"status": "A new sale cannot be created as cancelled."})
         return data
 
     def create(self, validated_data):
         """
         Create a new sale, calculate total amount, and update inventory.
+
+        Runs in a single transaction with a fixed number of queries whatever
+        the basket size: the sale is inserted, its stock is taken through the
+        stock service (and recorded in the stock ledger), then all of its lines
+        are inserted in bulk.
         """
         details_data = validated_data.pop('details')
         discount = validated_data.pop('discount', 0)
-        sale = Sale.objects.create(
-            cashier=validated_data['cashier'],
-            patient=validated_data.get('patient'),
-            discount=discount,
-            status=validated_data.get('status', 'PENDING'),
-            payment_method=validated_data.get('payment_method')
-        )
-        total_amount = 0
 
+        quantities = Counter()
+        total_amount = 0
         for detail_data in details_data:
-            product = detail_data['product']
-            quantity = detail_data['quantity']
-            unit_price = detail_data['unit_price']
-            subtotal = detail_data['subtotal']
-
-            SaleDetail.objects.create(
-                sale=sale,
-                product=product,
-                quantity=quantity,
-                unit_price=unit_price,
-                subtotal=subtotal
-            )
-            product.stock_level -= quantity
-            if product.stock_level < 0:
-                raise serializers.ValidationError(f"Insufficient stock for product {product.name}")
-            product.save()
+            quantities[detail_data['product'].pk] += detail_data['quantity']
+            total_amount += detail_data['subtotal']
+
+        try:
+            with transaction.atomic():
+                sale = Sale.objects.create(
+                    cashier=validated_data['cashier'],
+                    patient=validated_data.get('patient'),
+                    discount=discount,
+                    status=validated_data.get('status', 'PENDING'),
+                    payment_method=validated_data.get('payment_method'),
+                    total_amount=max(total_amount - discount, 0)
+                )
+                decrement_stock(quantities, reason='SALE', reference=f'sale:{sale.pk}')
+                # bulk_create skips SaleDetail.save(), so the subtotals
+                # computed in SaleDetailSerializer.validate are stored as-is.
+                details = SaleDetail.objects.bulk_create([
+                    SaleDetail(
+                        sale=sale,
+                        product=detail_data['product'],
+                        quantity=detail_data['quantity'],
+                        unit_price=detail_data['unit_price'],
+                        subtotal=detail_data['subtotal']
+                    )
+                    for detail_data in details_data
+                ])
+                rollup.record_sale(sale, details)
+        except (InsufficientStock, Product.DoesNotExist) as exc:
+            raise serializers.ValidationError(str(exc))
+        return sale
 
-            total_amount += subtotal
+    def update(self, instance, validated_data):
+        """
+        Update a sale's status or payment method and keep stock and the daily
+        rollup in step.
+
+        Cancelling a sale gives its stock back in one bulk update and records
+        the movements in the stock ledger; a cancelled sale cannot be reopened.
+        The sale row is locked first so concurrent updates see each other's
+        changes and never move the same stock or contribution twice.
+        """
+        with transaction.atomic():
+            previous = Sale.objects.select_for_update().get(pk=instance.pk)
+            new_status = validated_data.get('status', previous.status)
+            if previous.status == 'CANCELLED' and new_status != 'CANCELLED':
+                raise serializers.ValidationError({"status": "A cancelled sale cannot be reopened."})
+
+            instance = super().update(instance, validated_data)
+
+            if previous.status != 'CANCELLED' and new_status == 'CANCELLED':
+                quantities = Counter()
+                for product_id, quantity in instance.details.values_list('product_id', 'quantity'):
+                    if product_id is not None:
+                        quantities[product_id] += quantity
+                increment_stock(quantities, reason='CANCELLATION', reference=f'sale:{instance.pk}')
+            rollup.record_sale_change(previous, instance)
+        return instance
+
+
+class SaleFilterSerializer(serializers.Serializer):
+    """
+    Validates the query parameters used to filter sales.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    status = serializers.ChoiceField(choices=Sale.STATUS_CHOICES, required=False)
+    cashier = serializers.IntegerField(required=False)
+    patient = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        """
+        Ensure the date range is not inverted.
+        """
+        if data.get('start') and data.get('end') and data['start'] > data['end']:
+            raise serializers.ValidationError({"end": "End date must not be before start date."})
+        return data
+
+
+class SaleReportQuerySerializer(SaleFilterSerializer):
+    """
+    Validates the query parameters of the sales report endpoint.
+    """
+    GROUP_BY_CHOICES = ('day', 'week', 'month', 'cashier', 'payment_method', 'patient')
 
-        sale.total_amount = max(total_amount - discount, 0)
-        sale.save()
-        return sale
\ No newline at end of file
+    group_by = serializers.ChoiceField(choices=GROUP_BY_CHOICES, default='day')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
@@ -1,3 +1,389 @@
-from django.test import TestCase
+import random
+import threading
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient, APITestCase
+
+from categories.models import Category
+from products.models import Product
+from products.stock import set_stock_level
+from .models import DailySalesSummary, Sale, SaleDetail
+from .serializers import SaleSerializer
+
+
+class SaleCreationTests(TestCase):
+    """
+    Tests for creating sales through SaleSerializer.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cashier = get_user_model().objects.create_user(username='till', password='secret')
+        category = Category.objects.create(name='Consumables', description='Ward stock')
+        cls.products = Product.objects.bulk_create([
+            Product(
+                category=category,
+                name=f'Product {i}',
+                sku=f'SKU-{i:04d}',
+                unit_price='2.50',
+                stock_level=10,
+            )
+            for i in range(40)
+        ])
+
+    def _create_sale(self, details):
+        serializer = SaleSerializer(data={'details': details, 'discount': '1.00'})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save(cashier=self.cashier)
+
+    def test_sale_totals_and_stock(self):
+        sale = self._create_sale([
+            {'product': self.products[0].pk, 'quantity': 2},
+            {'product': self.products[1].pk, 'quantity': 3},
+        ])
+        self.assertEqual(sale.total_amount, Decimal('11.50'))
+        self.assertEqual(
+            sale.details.aggregate(total=Sum('subtotal'))['total'], Decimal('12.50')
+        )
+        self.assertEqual(
+            list(Product.objects.filter(pk__in=[self.products[0].pk, self.products[1].pk])
+                 .order_by('pk').values_list('stock_level', flat=True)),
+            [8, 7],
+        )
+
+    def test_query_count_does_not_grow_with_basket_size(self):
+        counts = []
+        for size in (1, 40):
+            details = [{'product': product.pk, 'quantity': 1} for product in self.products[:size]]
+            with CaptureQueriesContext(connection) as queries:
+                self._create_sale(details)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_insufficient_stock_rolls_back_the_whole_sale(self):
+        Product.objects.filter(pk=self.products[1].pk).update(stock_level=1)
+        serializer = SaleSerializer(data={'details': [
+            {'product': self.products[0].pk, 'quantity': 1},
+            {'product': self.products[1].pk, 'quantity': 1},
+            {'product': self.products[1].pk, 'quantity': 1},
+        ]})
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save(cashier=self.cashier)
+        self.assertFalse(Sale.objects.exists())
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock_level, 10)
+
+    def test_product_deleted_after_validation_is_rejected(self):
+        doomed = Product.objects.create(
+            category=self.products[0].category, name='Recalled', sku='RECALL-1', unit_price='2.50', stock_level=5
+        )
+        serializer = SaleSerializer(data={'details': [
+            {'product': self.products[0].pk, 'quantity': 1},
+            {'product': doomed.pk, 'quantity': 1},
+        ]})
+        serializer.is_valid(raise_exception=True)
+        doomed_pk = doomed.pk
+        doomed.delete()
+        with self.assertRaisesMessage(serializers.ValidationError, f'Products no longer exist: {doomed_pk}'):
+            serializer.save(cashier=self.cashier)
+        self.assertFalse(Sale.objects.exists())
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock_level, 10)
+
+    def test_product_must_be_an_integer_key(self):
+        pk = self.products[0].pk
+        for value in (True, pk + 0.9, 'abc', [pk]):
+            serializer = SaleSerializer(data={'details': [{'product': value, 'quantity': 1}]})
+            self.assertFalse(serializer.is_valid(), value)
+            self.assertIn('product', serializer.errors['details'][0])
+        for value in (pk, str(pk), float(pk)):
+            serializer = SaleSerializer(data={'details': [{'product': value, 'quantity': 1}]})
+            self.assertTrue(serializer.is_valid(), value)
+            self.assertEqual(serializer.validated_data['details'][0]['product'], self.products[0])
+
+
+class SaleIdempotencyTests(APITestCase):
+    """
+    Tests for the Idempotency-Key header on POST /api/sales/.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cashier = get_user_model().objects.create_user(username='till', password='secret')
+        category = Category.objects.create(name='Consumables', description='Ward stock')
+        cls.product = Product.objects.create(
+            category=category, name='Gauze', sku='GAUZE', unit_price='3.00', stock_level=10
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.cashier)
+        self.url = reverse('sale-list-create')
+        self.payload = {'details': [{'product': self.product.pk, 'quantity': 2}]}
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        retry = self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Sale.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_level, 8)
+
+    def test_reusing_a_key_for_another_body_is_rejected(self):
+        self.client.post(self.url, self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        other = {'details': [{'product': self.product.pk, 'quantity': 1}]}
+        response = self.client.post(self.url, other, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_rejected_request_is_not_replayed(self):
+        too_many = {'details': [{'product': self.product.pk, 'quantity': 12}]}
+        response = self.client.post(self.url, too_many, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, 400)
+
+        set_stock_level(self.product, 20)
+        retry = self.client.post(self.url, too_many, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry.status_code, 201)
+        self.assertFalse(retry.has_header('Idempotent-Replayed'))
+        self.assertEqual(Sale.objects.count(), 1)
+
+
+class SaleListTests(APITestCase):
+    """
+    Tests for the paginated, filterable sales list.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cashier = get_user_model().objects.create_user(username='till', password='secret')
+        cls.other_cashier = get_user_model().objects.create_user(username='till-2', password='secret')
+        category = Category.objects.create(name='Consumables', description='Ward stock')
+        products = Product.objects.bulk_create([
+            Product(category=category, name=f'Product {i}', sku=f'SKU-{i:04d}',
+                    unit_price='1.00', stock_level=100)
+            for i in range(3)
+        ])
+        for i in range(12):
+            serializer = SaleSerializer(data={
+                'details': [{'product': product.pk, 'quantity': 1} for product in products],
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save(cashier=cls.cashier if i % 3 else cls.other_cashier)
+
+    def setUp(self):
+        self.client.force_authenticate(self.cashier)
+        self.url = reverse('sale-list-create')
+
+    def test_query_count_is_constant_per_page(self):
+        for page_size in (2, 12):
+            # One query for the page of sales, one to prefetch their lines.
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url, {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(len(response.data['results'][0]['details']), 3)
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'cashier': self.other_cashier.pk})
+        self.assertEqual(len(response.data['results']), 4)
+        response = self.client.get(self.url, {'status': 'COMPLETED'})
+        self.assertEqual(response.data['results'], [])
+        today = timezone.localdate().isoformat()
+        response = self.client.get(self.url, {'start': today, 'end': today})
+        self.assertEqual(len(response.data['results']), 12)
+        response = self.client.get(self.url, {'start': today, 'end': '2000-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SaleReportTests(APITestCase):
+    """
+    Tests for the database-side sales report.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.accountant = get_user_model().objects.create_user(
+            username='books', password='secret', role='accountant'
+        )
+        category = Category.objects.create(name='Consumables', description='Ward stock')
+        cls.gauze, cls.swab = Product.objects.bulk_create([
+            Product(category=category, name='Gauze', sku='GAUZE', unit_price='3.00', stock_level=50),
+            Product(category=category, name='Swab', sku='SWAB', unit_price='1.00', stock_level=50),
+        ])
+        for payment_method, details in (
+            ('CASH', [{'product': cls.gauze.pk, 'quantity': 2}, {'product': cls.swab.pk, 'quantity': 4}]),
+            ('CASH', [{'product': cls.swab.pk, 'quantity': 1}]),
+            ('INSURANCE', [{'product': cls.gauze.pk, 'quantity': 1}]),
+        ):
+            serializer = SaleSerializer(data={
+                'details': details, 'payment_method': payment_method, 'discount': '0.50'
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save(cashier=cls.accountant)
+        insurance_sale = Sale.objects.get(payment_method='INSURANCE')
+        serializer = SaleSerializer(insurance_sale, data={'status': 'CANCELLED'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    def setUp(self):
+        self.client.force_authenticate(self.accountant)
+
+    def test_group_by_payment_method(self):
+        response = self.client.get(reverse('sale-report'), {'group_by': 'payment_method'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        row = response.data['results'][0]
+        self.assertEqual(row['group'], 'CASH')
+        self.assertEqual(row['sale_count'], 2)
+        self.assertEqual(row['revenue'], Decimal('10.00'))
+        self.assertEqual(row['discount'], Decimal('1.00'))
+        self.assertEqual(row['item_count'], 7)
+        self.assertEqual(response.data['totals']['item_count'], 7)
+        self.assertEqual(
+            [product['product__sku'] for product in response.data['top_products']],
+            ['GAUZE', 'SWAB'],
+        )
+
+    def test_rollup_matches_live_aggregation(self):
+        url = reverse('sale-report')
+        from_rollup = self.client.get(url, {'group_by': 'day'}).data
+        live = self.client.get(url, {'group_by': 'day', 'cashier': self.accountant.pk}).data
+        self.assertEqual(from_rollup['source'], 'rollup')
+        self.assertEqual(live['source'], 'sales')
+        for key in ('revenue', 'discount', 'item_count', 'sale_count'):
+            self.assertEqual(from_rollup['results'][0][key], live['results'][0][key])
+            self.assertEqual(from_rollup['totals'][key], live['totals'][key])
+        self.assertEqual(from_rollup['top_products'], live['top_products'])
+
+    def test_rebuild_command_reproduces_incremental_rollup(self):
+        columns = ('date', 'product', 'payment_method', 'quantity', 'revenue', 'discount', 'sale_count')
+        incremental = sorted(DailySalesSummary.objects.values_list(*columns))
+        DailySalesSummary.objects.all().delete()
+        call_command('rebuild_sales_rollup', stdout=StringIO())
+        rebuilt = sorted(DailySalesSummary.objects.exclude(quantity=0).values_list(*columns))
+        self.assertEqual(rebuilt, [row for row in incremental if row[3]])
+
+    def test_group_by_day_and_status_filter(self):
+        response = self.client.get(reverse('sale-report'), {'status': 'CANCELLED'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['item_count'], 1)
+
+    def test_invalid_grouping_is_rejected(self):
+        response = self.client.get(reverse('sale-report'), {'group_by': 'year'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_report_requires_accountant_or_admin(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(username='clerk'))
+        response = self.client.get(reverse('sale-report'))
+        self.assertEqual(response.status_code, 403)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentSaleStockTests(TransactionTestCase):
+    """
+    Stress test running many checkouts against the same products at once.
+
+    Needs a database with row locks (PostgreSQL); SQLite serializes
+    writers and would only exercise its own locking.
+    """
+    threads = 8
+    attempts_per_thread = 20
+    initial_stock = 100
+
+    def setUp(self):
+        self.cashier = get_user_model().objects.create_user(username='till', password='secret')
+        category = Category.objects.create(name='Consumables', description='Ward stock')
+        self.products = [
+            Product.objects.create(
+                category=category,
+                name=f'Product {sku}',
+                sku=sku,
+                unit_price='2.00',
+                stock_level=self.initial_stock,
+                reorder_point=0,
+            )
+            for sku in ('GLOVE', 'SWAB')
+        ]
+
+    def _checkout(self, results):
+        try:
+            for _ in range(self.attempts_per_thread):
+                # Shuffle the lines so tills lock products in different request
+                # orders; the stock service must still lock them consistently.
+                details = [{'product': product.pk, 'quantity': 1} for product in self.products]
+                random.shuffle(details)
+                serializer = SaleSerializer(data={'details': details})
+                if not serializer.is_valid():
+                    results.append('rejected')
+                    continue
+                try:
+                    serializer.save(cashier=self.cashier)
+                    results.append('sold')
+                except serializers.ValidationError:
+                    results.append('rejected')
+        except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+            results.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_sales_never_lose_or_oversell_stock(self):
+        results = []
+        workers = [
+            threading.Thread(target=self._checkout, args=(results,))
+            for _ in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        self.assertEqual(errors, [])
+        sold = results.count('sold')
+        self.assertEqual(sold, self.initial_stock)
+
+        for product in self.products:
+            product.refresh_from_db()
+            quantity_sold = sum(
+                SaleDetail.objects.filter(product=product).values_list('quantity', flat=True)
+            )
+            self.assertEqual(quantity_sold, sold)
+            self.assertEqual(product.stock_level, self.initial_stock - quantity_sold)
+
+    def test_concurrent_retries_create_a_single_sale(self):
+        responses = []
+
+        def post():
+            client = APIClient()
+            client.force_authenticate(self.cashier)
+            try:
+                responses.append(client.post(
+                    reverse('sale-list-create'),
+                    {'details': [{'product': self.products[0].pk, 'quantity': 1}]},
+                    format='json',
+                    HTTP_IDEMPOTENCY_KEY='same-basket',
+                ).status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=post) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(responses, [201] * self.threads)
+        self.assertEqual(Sale.objects.count(), 1)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock_level, self.initial_stock - 1)
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views  import SaleListCreateView, SaleDetailView
+from .views  import SaleListCreateView, SaleDetailView, SaleReportView
 
 urlpatterns = [
     path('', SaleListCreateView.as_view(), name='sale-list-create'),
     path('<int:pk>/', SaleDetailView.as_view(), name='sale-detail'),
+    path('reports/', SaleReportView.as_view(), name='sale-report'),
 ]
\ No newline at end of file
@@ -1,9 +1,28 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
-from .models import Sale
-from .serializers import SaleSerializer
+from permissions.permissions import IsAccountantOrAdmin
+from .models import IdempotencyKey, Sale
+from .reports import filter_sales, sales_summary, sales_totals, top_products
+from . import rollup
+from .pagination import SaleCursorPagination
+from .serializers import SaleFilterSerializer, SaleReportQuerySerializer, SaleSerializer
+
+
+def request_fingerprint(data):
+    """
+    Hash a request body so retries can be told apart from key reuse.
+    """
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
 
 class SaleListCreateView(APIView):
     """
@@ -13,19 +32,90 @@ class SaleListCreateView(APIView):
 
     def get(self, request):
         """
-        Retrieve a list of all sales.
+        Retrieve sales, newest first, one cursor page at a time.
+
+        Supports query parameters:
+        - start, end: Inclusive date range (YYYY-MM-DD)
+        - status: Sale status (all statuses when omitted)
+        - cashier, patient: Restrict to one cashier or patient
+        - cursor, page_size: Cursor pagination (default 50 per page, max 500)
         """
-        sales = Sale.objects.all()
-        serializer = SaleSerializer(sales, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        query = SaleFilterSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        sales = filter_sales(
+            Sale.objects.prefetch_related('details'),
+            include_cancelled=True,
+            **query.validated_data
+        )
+        paginator = SaleCursorPagination()
+        page = paginator.paginate_queryset(sales, request, view=self)
+        serializer = SaleSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         """
         Create a new sale with details, update inventory, and associate with a patient (optional).
+
+        When the request carries an ``Idempotency-Key`` header, a successful
+        response is stored for POS_IDEMPOTENCY_KEY_TTL seconds and replayed for
+        retries with the same key, so a retried checkout never creates a second
+        sale. Error responses are not stored.
+        """
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return self.create_sale(request)
+        if len(key) > 255:
+            return Response(
+                {"error": "Idempotency-Key must be at most 255 characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request.data)
+        expires_at = timezone.now() + timedelta(seconds=settings.POS_IDEMPOTENCY_KEY_TTL)
+        with transaction.atomic():
+            # The row lock (or, for a new key, the unique constraint) makes a
+            # concurrent request with the same key wait for this one to commit.
+            record, created = IdempotencyKey.objects.select_for_update().get_or_create(
+                user=request.user,
+                key=key,
+                defaults={'fingerprint': fingerprint, 'expires_at': expires_at}
+            )
+            if not created:
+                if record.expires_at > timezone.now():
+                    if record.fingerprint != fingerprint:
+                        return Response(
+                            {"error": "Idempotency-Key was already used for a different request"},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                        )
+                    return Response(
+                        record.response_body,
+                        status=record.response_status,
+                        headers={'Idempotent-Replayed': 'true'}
+                    )
+                record.fingerprint = fingerprint
+                record.expires_at = expires_at
+
+            response = self.create_sale(request)
+            if status.is_success(response.status_code):
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save()
+            else:
+                # Rejected requests are not remembered, so a retry after the
+                # problem is fixed (e.g. a restock) is processed afresh.
+                record.delete()
+        return response
+
+    def create_sale(self, request):
+        """
+        Validate the request and create the sale.
         """
         serializer = SaleSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(cashier=request.user)
+            try:
+                serializer.save(cashier=request.user)
+            except serializers.ValidationError as exc:
+                return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -74,4 +164,59 @@ class SaleDetailView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class SaleReportView(APIView):
+    """
+    API view returning sales figures aggregated in the database.
+
+    Reports over non-cancelled sales grouped by period or payment method are
+    read from the daily rollup; anything the rollup is not keyed by (cashier,
+    patient, a specific status) is aggregated from the sales tables.
+    """
+    permission_classes = [IsAccountantOrAdmin]
+
+    def get(self, request):
+        """
+        Report revenue, discounts, item counts and top products.
+
+        Supports query parameters:
+        - start, end: Inclusive date range (YYYY-MM-DD)
+        - status: Sale status; cancelled sales are excluded when omitted
+        - cashier, patient: Restrict to one cashier or patient
+        - group_by: day, week, month, cashier, payment_method or patient (default day)
+        - limit: Number of top products to return (default 10)
+        """
+        query = SaleReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        start, end, group_by = params.get('start'), params.get('end'), params['group_by']
+
+        use_rollup = (
+            group_by in rollup.ROLLUP_GROUPINGS
+            and not any(params.get(name) for name in ('status', 'cashier', 'patient'))
+        )
+        if use_rollup:
+            return Response({
+                "group_by": group_by,
+                "source": "rollup",
+                "results": rollup.rollup_summary(start, end, group_by),
+                "totals": rollup.rollup_totals(start, end),
+                "top_products": rollup.rollup_top_products(start, end, params['limit']),
+            }, status=status.HTTP_200_OK)
+
+        sales = filter_sales(
+            Sale.objects.all(),
+            start=start,
+            end=end,
+            status=params.get('status'),
+            cashier=params.get('cashier'),
+            patient=params.get('patient'),
+        )
+        return Response({
+            "group_by": group_by,
+            "source": "sales",
+            "results": sales_summary(sales, group_by),
+            "totals": sales_totals(sales),
+            "top_products": top_products(sales, params['limit']),
+        }, status=status.HTTP_200_OK)
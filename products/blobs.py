@@ -0,0 +1,183 @@
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+
+from .models import ImageBlob, ProductImage
+
+
+def _shift_ref_counts(counts, sign):
+    """
+    Move the reference counts of several blobs with one ``CASE`` update.
+    """
+    return ImageBlob.objects.filter(name__in=counts).update(
+        ref_count=F('ref_count') + Case(
+            *(When(name=name, then=Value(sign * count)) for name, count in counts.items()),
+            default=Value(0),
+            output_field=models.IntegerField(),
+        )
+    )
+
+
+def _file_size(storage, name):
+    try:
+        return storage.size(name)
+    except OSError:
+        return 0
+
+
+def _lock_blobs(names):
+    """
+    Lock the blob rows for ``names`` in name order and return the names found.
+
+    Retains, releases and file deletions all take these locks, so a file is
+    only deleted while its row is locked and still unreferenced.
+    """
+    return set(
+        ImageBlob.objects.select_for_update()
+        .filter(name__in=names)
+        .order_by('name')
+        .values_list('name', flat=True)
+    )
+
+
+def retain_blobs(names):
+    """
+    Record new references to stored image files.
+
+    Call this in the transaction that creates the references, after the
+    files have been stored.
+
+    Args:
+        names (Iterable[str]): Storage names, repeated once per new reference
+
+    Raises:
+        FileNotFoundError: If a file was deleted as unreferenced between
+            being stored and being retained; the caller should store it again
+    """
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    storage = ProductImage._meta.get_field('image').storage
+    with transaction.atomic():
+        ImageBlob.objects.bulk_create(
+            [ImageBlob(name=name, size=_file_size(storage, name)) for name in counts],
+            ignore_conflicts=True,
+        )
+        locked = _lock_blobs(counts)
+        if len(locked) < len(counts):
+            # A concurrent release deleted these rows, and possibly their
+            # files, after the insert above was skipped as a conflict.
+            gone = [name for name in counts if name not in locked]
+            vanished = [name for name in gone if not storage.exists(name)]
+            if vanished:
+                raise FileNotFoundError(f"Stored image files were deleted meanwhile: {', '.join(vanished)}")
+            ImageBlob.objects.bulk_create(
+                [ImageBlob(name=name, size=_file_size(storage, name)) for name in gone],
+                ignore_conflicts=True,
+            )
+            _lock_blobs(gone)
+        _shift_ref_counts(counts, 1)
+
+
+def _delete_unreferenced_files(names):
+    """
+    Delete the files and blob rows of blobs that are still unreferenced.
+
+    Runs after commit and re-reads each blob under its row lock, so a file
+    retained again in the meantime is kept.
+    """
+    storage = ProductImage._meta.get_field('image').storage
+    with transaction.atomic():
+        _lock_blobs(names)
+        orphans = list(
+            ImageBlob.objects.filter(name__in=names, ref_count__lte=0).values_list('name', flat=True)
+        )
+        for name in orphans:
+            storage.delete(name)
+        ImageBlob.objects.filter(name__in=orphans).delete()
+
+
+def discard_blobs(names):
+    """
+    Delete files stored by a transaction that was rolled back, unless
+    something else references the same content.
+
+    Call this after the rollback. Inserting the blob rows first waits for
+    any concurrent transaction that is retaining the same file, and the
+    deletion then re-reads each blob under its lock.
+
+    Args:
+        names (Iterable[str]): Storage names the rolled-back transaction wrote
+    """
+    names = {name for name in names if name}
+    if not names:
+        return
+    storage = ProductImage._meta.get_field('image').storage
+    with transaction.atomic():
+        ImageBlob.objects.bulk_create(
+            [ImageBlob(name=name, size=_file_size(storage, name)) for name in names],
+            ignore_conflicts=True,
+        )
+    _delete_unreferenced_files(names)
+
+
+def release_blobs(names):
+    """
+    Drop references to stored image files, deleting files nobody uses any more.
+
+    Args:
+        names (Iterable[str]): Storage names, repeated once per dropped reference
+
+    Returns:
+        list: Names of the blobs that became unreferenced
+    """
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return []
+    with transaction.atomic():
+        _lock_blobs(counts)
+        _shift_ref_counts(counts, -1)
+        orphans = list(
+            ImageBlob.objects.filter(name__in=counts, ref_count__lte=0).values_list('name', flat=True)
+        )
+        if orphans:
+            transaction.on_commit(lambda: _delete_unreferenced_files(orphans))
+    return orphans
+
+
+def reconcile_blobs():
+    """
+    Reset every blob's reference count from the ProductImage table (both
+    originals and derivatives), add blobs for referenced files that have
+    none, and release blobs that are no longer referenced.
+
+    Returns:
+        tuple: (number of blobs added or corrected, names of released blobs)
+    """
+    actual = Counter()
+    for image in ProductImage.objects.only('image', 'derivatives').iterator():
+        actual.update(name for name in image.stored_names() if name)
+    storage = ProductImage._meta.get_field('image').storage
+    changed = 0
+    with transaction.atomic():
+        known = dict(ImageBlob.objects.select_for_update().values_list('name', 'ref_count'))
+        missing = [name for name in actual if name not in known and storage.exists(name)]
+        ImageBlob.objects.bulk_create([
+            ImageBlob(name=name, size=_file_size(storage, name), ref_count=actual[name]) for name in missing
+        ])
+        changed += len(missing)
+
+        stale = {
+            name: actual.get(name, 0) - ref_count
+            for name, ref_count in known.items()
+            if ref_count != actual.get(name, 0)
+        }
+        if stale:
+            _shift_ref_counts(stale, 1)
+            changed += len(stale)
+
+        orphans = list(ImageBlob.objects.filter(ref_count__lte=0).values_list('name', flat=True))
+        if orphans:
+            transaction.on_commit(lambda: _delete_unreferenced_files(orphans))
+    return changed, orphans
@@ -0,0 +1,140 @@
+import hashlib
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from versioning.versions import bump_table_version, table_version
+
+# TableVersion row bumped by every write that can change a product read:
+# products, their stock, images and categories.
+CATALOGUE_TABLE = 'products.catalogue'
+
+_stats = Counter()
+
+
+def catalogue_cache():
+    """
+    Cache backend holding serialized product reads.
+    """
+    return caches[settings.CATALOGUE_CACHE_ALIAS]
+
+
+def catalogue_version():
+    """
+    Return the current catalogue version number.
+    """
+    return table_version(CATALOGUE_TABLE)[0]
+
+
+def bump_catalogue_version():
+    """
+    Invalidate every cached product read once the current transaction commits.
+
+    Bumping after commit keeps the version row out of the writer's
+    transaction, so concurrent sales do not queue on it, and means a reader
+    can never cache pre-commit data under the new version.
+    """
+    transaction.on_commit(lambda: bump_table_version(CATALOGUE_TABLE))
+
+
+def sku_stamps(skus):
+    """
+    Return the shared lookup stamp of each SKU, creating any that are missing.
+
+    A stamp is a random token that changes whenever the product behind the
+    SKU changes, so every process can check its own cached lookups with
+    one cache round-trip instead of a database query. Stamps must be read
+    before the rows they guard.
+
+    Args:
+        skus (Iterable[str]): Normalized SKUs
+
+    Returns:
+        dict: Mapping of SKU to its stamp, or ``None`` if the cache dropped it
+    """
+    cache = catalogue_cache()
+    keys = {sku: f'sku-stamp:{sku}' for sku in skus}
+    stamps = cache.get_many(keys.values())
+    fresh = [key for key in keys.values() if key not in stamps]
+    for key in fresh:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+    if fresh:
+        # Another process may have added the stamp first; use whichever won.
+        stamps.update(cache.get_many(fresh))
+    return {sku: stamps.get(key) for sku, key in keys.items()}
+
+
+def invalidate_sku_lookups(skus):
+    """
+    Invalidate every process's cached lookups of the given SKUs once the
+    current transaction commits.
+    """
+    keys = [f'sku-stamp:{sku}' for sku in set(skus)]
+    if keys:
+        transaction.on_commit(lambda: catalogue_cache().delete_many(keys))
+
+
+def cache_key(request, scope):
+    """
+    Build the cache key for a product read.
+
+    The key covers the catalogue version, the view, the host (responses
+    contain absolute URLs) and the query parameters in a canonical order.
+    """
+    params = '&'.join(
+        f'{name}={value}'
+        for name in sorted(request.query_params)
+        for value in request.query_params.getlist(name)
+    )
+    digest = hashlib.sha256(f'{request.get_host()}?{params}'.encode()).hexdigest()
+    return f'catalogue:{catalogue_version()}:{scope}:{digest}'
+
+
+def cache_stats():
+    """
+    Return this process's catalogue cache hit and miss counters.
+
+    Returns:
+        dict: ``{'hits': int, 'misses': int}``
+    """
+    return {'hits': _stats['hits'], 'misses': _stats['misses']}
+
+
+def reset_cache_stats():
+    """
+    Reset this process's catalogue cache hit and miss counters.
+    """
+    _stats.clear()
+
+
+def cached_read(request, scope, build):
+    """
+    Return a product read from the cache, building it on a miss.
+
+    Only 200 responses are stored; any other response is passed through
+    with its status and built afresh next time.
+
+    Args:
+        request: DRF request being answered
+        scope (str): Which endpoint, e.g. ``list`` or ``detail:42``
+        build (callable): Returns the Response to send on a miss
+
+    Returns:
+        tuple: (Response, whether it came from the cache)
+    """
+    cache = catalogue_cache()
+    key = cache_key(request, scope)
+    data = cache.get(key)
+    if data is not None:
+        _stats['hits'] += 1
+        return Response(data), True
+
+    _stats['misses'] += 1
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=settings.CATALOGUE_CACHE_TIMEOUT)
+    return response, False
@@ -0,0 +1,147 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .blobs import release_blobs, retain_blobs
+from .catalogue import bump_catalogue_version
+from .models import Product
+
+# Longest edge, in pixels, of each derivative. Images are never upscaled.
+DERIVATIVE_SIZES = {
+    'thumb': 150,
+    'card': 400,
+    'full': 1200,
+}
+
+# Output formats: Pillow format name, file extension and encoder options.
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+DERIVATIVE_DIRECTORY = 'product_images/derivatives'
+
+
+def _encode(image, format_name):
+    """
+    Encode an image in one of the DERIVATIVE_FORMATS and return its bytes.
+    """
+    pil_format, _, options = DERIVATIVE_FORMATS[format_name]
+    if pil_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _store(storage, data, size_name, format_name):
+    """
+    Store derivative bytes under a content-hashed name, reusing an existing
+    file with identical content.
+    """
+    extension = DERIVATIVE_FORMATS[format_name][1]
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    name = f'{DERIVATIVE_DIRECTORY}/{digest}-{size_name}.{extension}'
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(data))
+    return name
+
+
+def strip_metadata(product_image):
+    """
+    Remove EXIF metadata (camera details, GPS position) from an uploaded
+    original, storing a cleaned copy in its place.
+
+    The EXIF orientation is applied to the pixels first, so the image still
+    displays the right way up once the tag is gone.
+
+    Args:
+        product_image: ProductImage instance with a stored image
+
+    Returns:
+        bool: Whether the file was rewritten
+    """
+    with product_image.image.open('rb') as source:
+        original = Image.open(source)
+        original.load()
+    pil_format = original.format
+    if not original.getexif():
+        return False
+
+    cleaned = ImageOps.exif_transpose(original)
+    buffer = BytesIO()
+    options = {'quality': 95} if pil_format == 'JPEG' else {}
+    cleaned.save(buffer, pil_format, **options)
+
+    # The storage names files by content, so the cleaned image gets a new
+    # name and the original is only deleted once nothing else shares it.
+    previous_name = product_image.image.name
+    upload_name = product_image.image.field.generate_filename(product_image, os.path.basename(previous_name))
+    saved_name = product_image.image.storage.save(upload_name, ContentFile(buffer.getvalue()))
+    if saved_name != previous_name:
+        with transaction.atomic():
+            type(product_image).objects.filter(pk=product_image.pk).update(image=saved_name)
+            retain_blobs([saved_name])
+            release_blobs([previous_name])
+            bump_catalogue_version()
+        product_image.image.name = saved_name
+    return True
+
+
+def build_derivatives(product_image):
+    """
+    Generate the resized WebP and JPEG derivatives of a product image.
+
+    Each derivative is stored under a name derived from a hash of its
+    content, so identical derivatives are written once and can be cached
+    by browsers and CDNs forever. Derivative files are reference-counted
+    in ``ImageBlob`` like originals; those of a previous build are
+    released.
+
+    Args:
+        product_image: ProductImage instance with a stored image
+
+    Returns:
+        dict: Mapping of size name to format name to
+            ``{'name', 'width', 'height'}``, also saved on the instance
+    """
+    storage = default_storage
+    with product_image.image.open('rb') as source:
+        original = Image.open(source)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+
+    derivatives = {}
+    for size_name, longest_edge in DERIVATIVE_SIZES.items():
+        resized = original.copy()
+        resized.thumbnail((longest_edge, longest_edge), Image.Resampling.LANCZOS)
+        derivatives[size_name] = {
+            format_name: {
+                'name': _store(storage, _encode(resized, format_name), size_name, format_name),
+                'width': resized.width,
+                'height': resized.height,
+            }
+            for format_name in DERIVATIVE_FORMATS
+        }
+
+    model = type(product_image)
+    with transaction.atomic():
+        # Lock the row to read the derivatives being replaced, so a forced
+        # rebuild releases exactly the files the image referenced.
+        previous = model.objects.select_for_update().filter(pk=product_image.pk).first()
+        if previous is None:
+            return derivatives
+        product_image.derivatives = derivatives
+        model.objects.filter(pk=product_image.pk).update(derivatives=derivatives)
+        # Retain before releasing, so files shared by both sets are kept.
+        retain_blobs(product_image.stored_names()[1:])
+        release_blobs(previous.stored_names()[1:])
+        Product.objects.filter(pk=product_image.product_id).update(updated_at=timezone.now())
+        bump_catalogue_version()
+    return derivatives
@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .catalogue import sku_stamps
+from .models import Product
+from .serializers import ProductCardSerializer
+
+
+class SkuCache:
+    """
+    Thread-safe, in-process LRU of card representations keyed by SKU.
+
+    Each entry remembers the SKU stamp it was built under and is ignored
+    once the stamp changes, so writes made by other processes are never
+    served stale while writes to other products leave it alone. Saves in
+    this process also evict directly.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sku, stamp):
+        if stamp is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(sku)
+            if entry is None or entry[0] != stamp:
+                return None
+            self._entries.move_to_end(sku)
+            return entry[1]
+
+    def set(self, sku, stamp, data):
+        if stamp is None:
+            return
+        with self._lock:
+            self._entries[sku] = (stamp, data)
+            self._entries.move_to_end(sku)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, *skus):
+        with self._lock:
+            for sku in skus:
+                self._entries.pop(normalize_sku(sku), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+sku_cache = SkuCache(getattr(settings, 'PRODUCT_SKU_CACHE_SIZE', 4096))
+
+
+def normalize_sku(sku):
+    """
+    Normalize a scanned SKU the way ``ProductSerializer.validate_sku`` stores it.
+    """
+    return sku.strip().upper()
+
+
+def lookup_skus(skus):
+    """
+    Resolve SKUs to card representations.
+
+    Costs one catalogue cache round-trip for the SKU stamps plus, only when
+    some SKUs are not cached, one ``sku IN (...)`` query on the unique SKU
+    index.
+
+    Args:
+        skus (Iterable[str]): SKUs as scanned
+
+    Returns:
+        dict: Mapping of normalized SKU to card data; unknown SKUs are absent
+    """
+    wanted = list(dict.fromkeys(normalize_sku(sku) for sku in skus if sku.strip()))
+    stamps = sku_stamps(wanted)
+    found = {}
+    missing = []
+    for sku in wanted:
+        data = sku_cache.get(sku, stamps[sku])
+        if data is None:
+            missing.append(sku)
+        else:
+            found[sku] = data
+
+    if missing:
+        products = Product.objects.filter(sku__in=missing).only(*ProductCardSerializer.Meta.fields)
+        for product in products:
+            data = ProductCardSerializer(product).data
+            sku_cache.set(product.sku, stamps[product.sku], data)
+            found[product.sku] = data
+    return found
@@ -0,0 +1,94 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from categories.models import Category
+from products.catalogue import cache_stats, catalogue_cache, reset_cache_stats
+from products.models import Product
+from products.views import ProductDetailView, ProductListCreateView
+
+
+class Command(BaseCommand):
+    """
+    Benchmark product reads with a cold and a warm catalogue cache.
+
+    Everything runs inside a transaction that is rolled back at the end,
+    so the benchmark leaves no data behind. The catalogue cache is cleared
+    before and after.
+    """
+    help = "Report queries and latency of product list/detail reads, cold versus warm cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products', type=int, default=500,
+            help="Number of products to create for the benchmark."
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help="Number of requests timed per case."
+        )
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        factory = APIRequestFactory()
+        cache = catalogue_cache()
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(username='benchmark-catalogue-reader')
+            category = Category.objects.create(name='Benchmark', description='Benchmark products')
+            products = Product.objects.bulk_create([
+                Product(
+                    category=category,
+                    name=f'Benchmark product {i:05d}',
+                    sku=f'BENCH-CAT-{i:05d}',
+                    unit_price='1.00',
+                    stock_level=i,
+                )
+                for i in range(options['products'])
+            ])
+
+            cases = [
+                ('list', ProductListCreateView.as_view(), '/api/products/', {}, {'page_size': 100}),
+                ('list card', ProductListCreateView.as_view(), '/api/products/', {},
+                 {'page_size': 100, 'view': 'card'}),
+                ('detail', ProductDetailView.as_view(), f'/api/products/{products[0].pk}/',
+                 {'pk': products[0].pk}, {}),
+            ]
+
+            def timed(view, path, kwargs, params):
+                request = factory.get(path, params)
+                force_authenticate(request, user=user)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = view(request, **kwargs)
+                    response.render()
+                    elapsed = (time.perf_counter() - started) * 1000
+                return elapsed, len(queries)
+
+            cache.clear()
+            reset_cache_stats()
+            self.stdout.write(
+                f"{'case':<10} {'cold ms':>8} {'cold q':>7} {'warm ms':>8} {'warm q':>7} {'speedup':>8}"
+            )
+            for name, view, path, kwargs, params in cases:
+                cold, warm = [], []
+                for _ in range(repeat):
+                    cache.clear()
+                    cold.append(timed(view, path, kwargs, params))
+                    warm.append(timed(view, path, kwargs, params))
+                cold_ms = sum(ms for ms, _ in cold) / repeat
+                warm_ms = sum(ms for ms, _ in warm) / repeat
+                self.stdout.write(
+                    f"{name:<10} {cold_ms:>8.2f} {cold[-1][1]:>7} {warm_ms:>8.2f} {warm[-1][1]:>7} "
+                    f"{cold_ms / warm_ms:>7.1f}x"
+                )
+
+            stats = cache_stats()
+            self.stdout.write(f"Cache hits: {stats['hits']}, misses: {stats['misses']}")
+            cache.clear()
+            reset_cache_stats()
+            transaction.set_rollback(True)
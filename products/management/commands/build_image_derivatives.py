@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from products.imaging import build_derivatives
+from products.models import ProductImage
+
+
+class Command(BaseCommand):
+    """
+    Generate resized derivatives for product images that do not have them.
+    """
+    help = "Build WebP/JPEG derivatives for existing product images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Rebuild derivatives for every image, not only those missing them."
+        )
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.all()
+        if not options['force']:
+            images = images.filter(derivatives={})
+
+        built = failed = 0
+        for image in images.iterator():
+            try:
+                build_derivatives(image)
+                built += 1
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f"Image {image.pk} ({image.image.name}): {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Built derivatives for {built} images, {failed} failed."))
@@ -0,0 +1,72 @@
+import os
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.blobs import reconcile_blobs
+from products.models import ProductImage
+
+CONTENT_ADDRESSED = re.compile(r'/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+class Command(BaseCommand):
+    """
+    Move product images stored under upload names to content-addressed
+    names, so duplicate uploads share one file.
+    """
+    help = "Deduplicate product image files and rebuild their reference counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report what would be moved without changing anything."
+        )
+
+    def handle(self, *args, **options):
+        field = ProductImage._meta.get_field('image')
+        storage = field.storage
+        moved = {}
+        missing = 0
+
+        images = ProductImage.objects.exclude(image='').only('pk', 'image').iterator()
+        for image in images:
+            old_name = image.image.name
+            if CONTENT_ADDRESSED.search(old_name):
+                continue
+            if old_name in moved:
+                new_name = moved[old_name]
+            elif not storage.exists(old_name):
+                missing += 1
+                self.stderr.write(f"Image {image.pk}: {old_name} is missing")
+                continue
+            elif options['dry_run']:
+                new_name = moved[old_name] = old_name
+            else:
+                with storage.open(old_name, 'rb') as content:
+                    upload_name = field.generate_filename(image, os.path.basename(old_name))
+                    new_name = moved[old_name] = storage.save(upload_name, content)
+            if not options['dry_run']:
+                ProductImage.objects.filter(pk=image.pk).update(image=new_name)
+
+        if options['dry_run']:
+            self.stdout.write(f"Would move {len(moved)} files; {missing} missing.")
+            return
+
+        with transaction.atomic():
+            changed, released = reconcile_blobs()
+        # Files under upload names are not tracked as blobs; remove the ones
+        # no image refers to any more.
+        still_used = set(ProductImage.objects.filter(image__in=moved).values_list('image', flat=True))
+        removed = 0
+        for old_name in moved:
+            if old_name not in still_used:
+                storage.delete(old_name)
+                removed += 1
+
+        distinct = len(set(moved.values()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {len(moved)} files into {distinct} distinct blobs and removed {removed} "
+            f"old files; corrected {changed} reference counts, released {len(released)} "
+            f"blobs, {missing} files missing."
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from products.transfer import FORMATS, export_products
+
+
+class Command(BaseCommand):
+    """
+    Write the product catalogue as CSV or JSON Lines.
+    """
+    help = "Export products in the format accepted by import_products."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=FORMATS, default='csv', dest='file_format',
+            help="File format (default: csv)."
+        )
+        parser.add_argument(
+            '--output',
+            help="File to write (default: standard output)."
+        )
+
+    def handle(self, *args, **options):
+        chunks = export_products(Product.objects.all(), options['file_format'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
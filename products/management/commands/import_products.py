@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.transfer import DEFAULT_CHUNK_SIZE, FORMATS, format_for_name, import_products
+
+
+class Command(BaseCommand):
+    """
+    Create or update products from a CSV or JSON Lines file.
+    """
+    help = "Import products from a CSV or JSON Lines file, matching existing products on SKU."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import.")
+        parser.add_argument(
+            '--format', choices=FORMATS, dest='file_format',
+            help="File format (default: from the file extension, else csv)."
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help=f"Rows written per batch (default: {DEFAULT_CHUNK_SIZE})."
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or format_for_name(options['path'])
+        try:
+            stream = open(options['path'], 'rb')
+        except OSError as exc:
+            raise CommandError(f"Cannot open {options['path']}: {exc}")
+        with stream:
+            summary = import_products(
+                stream, file_format, chunk_size=options['chunk_size'],
+                reference=f"import:{options['path']}",
+            )
+
+        for error in summary['errors']:
+            self.stderr.write(f"Line {error['line']} ({error['sku']}): {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']} products, updated {summary['updated']}, "
+            f"{len(summary['errors'])} rows rejected."
+        ))
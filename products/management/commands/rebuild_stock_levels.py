@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from products.catalogue import bump_catalogue_version, invalidate_sku_lookups
+from products.models import Product, StockMovement
+from stock.service import PRODUCT, sync_records
+
+
+class Command(BaseCommand):
+    """
+    Compare Product.stock_level with the stock ledger and optionally repair it.
+    """
+    help = "Report (and with --fix, correct) products whose stock_level disagrees with the ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help="Overwrite drifted stock levels with the ledger total."
+        )
+
+    def handle(self, *args, **options):
+        ledger_total = Coalesce(
+            Subquery(
+                StockMovement.objects.filter(product=OuterRef('pk'))
+                .values('product')
+                .annotate(total=Sum('quantity'))
+                .values('total')
+            ),
+            0,
+        )
+        drifted = list(
+            Product.objects.annotate(ledger_level=ledger_total)
+            .exclude(stock_level=F('ledger_level'))
+            .values_list('pk', 'sku', 'stock_level', 'ledger_level')
+        )
+        for pk, sku, stock_level, ledger_level in drifted:
+            self.stdout.write(f"{sku}: stock_level={stock_level} ledger={ledger_level}")
+
+        if options['fix'] and drifted:
+            with transaction.atomic():
+                locked = dict(
+                    Product.objects.select_for_update()
+                    .filter(pk__in=[row[0] for row in drifted])
+                    .order_by('pk')
+                    .values_list('pk', 'sku')
+                )
+                ids = list(locked)
+                Product.objects.filter(pk__in=ids).update(stock_level=ledger_total, updated_at=timezone.now())
+                bump_catalogue_version()
+                invalidate_sku_lookups(locked.values())
+                # QuerySet.update sends no signals; copy the repaired levels
+                # onto the shared stock records while the rows are locked.
+                sync_records(PRODUCT, ids, overwrite_quantity=True)
+            self.stdout.write(self.style.SUCCESS(f"Corrected {len(drifted)} products."))
+        elif not drifted:
+            self.stdout.write(self.style.SUCCESS("Stock levels match the ledger."))
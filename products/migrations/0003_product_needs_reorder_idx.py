@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('products', '0002_productimage_product_default_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock_level__lte', models.F('reorder_point'))), fields=['name'], name='product_needs_reorder_idx'),
+        ),
+    ]
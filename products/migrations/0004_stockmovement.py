@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    """
+    Seed the ledger with each product's current stock so that the sum of a
+    product's movements matches its stock_level from the start.
+    """
+    Product = apps.get_model('products', 'Product')
+    StockMovement = apps.get_model('products', 'StockMovement')
+    movements = (
+        StockMovement(product_id=product_id, quantity=stock_level, reason='OPENING')
+        for product_id, stock_level in Product.objects.filter(stock_level__gt=0)
+        .values_list('id', 'stock_level').iterator()
+    )
+    batch = []
+    for movement in movements:
+        batch.append(movement)
+        if len(batch) == 1000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_needs_reorder_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(help_text='Signed change in stock; negative when stock leaves')),
+                ('reason', models.CharField(choices=[('OPENING', 'Opening balance'), ('SALE', 'Sale'), ('CANCELLATION', 'Sale cancellation'), ('ADJUSTMENT', 'Manual adjustment'), ('RECEIPT', 'Stock receipt')], max_length=20)),
+                ('reference', models.CharField(blank=True, help_text='What caused the movement, e.g. sale:42', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(help_text='Product whose stock moved', on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='products.product')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['product', 'created_at'], name='stockmovement_product_time_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_stockmovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized copies of the image by size and format (see products.imaging)'),
+        ),
+    ]
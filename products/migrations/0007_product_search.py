@@ -0,0 +1,68 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:02
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create and fill the vendor-specific search index.
+
+    PostgreSQL gets GIN indexes on the stored search vector and on name
+    trigrams; SQLite gets an FTS5 table keyed by product ID. Other
+    databases search without an index.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX product_search_vector_idx ON products_product USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            'CREATE INDEX product_name_trgm_idx ON products_product USING gin (name gin_trgm_ops)'
+        )
+        schema_editor.execute(
+            "UPDATE products_product p SET search_vector = "
+            "setweight(to_tsvector('simple', coalesce(p.name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(p.sku, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(p.description, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(c.name, '')), 'C') "
+            "FROM categories_category c WHERE c.id = p.category_id"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE products_product_fts USING fts5('
+            "name, description, sku, category_name, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            'INSERT INTO products_product_fts (rowid, name, description, sku, category_name) '
+            'SELECT p.id, p.name, p.description, p.sku, c.name '
+            'FROM products_product p JOIN categories_category c ON c.id = p.category_id'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS product_search_vector_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS product_name_trgm_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS products_product_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('products', '0006_imageblob'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Full-text search vector, kept up to date by products.search', null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_sku_trigram_index(apps, schema_editor):
+    """
+    Index SKU trigrams on PostgreSQL, so the typo fallback of the product
+    search can OR its name and SKU arms as a BitmapOr of two index scans.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX product_sku_trgm_idx ON products_product USING gin (sku gin_trgm_ops)'
+        )
+
+
+def drop_sku_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS product_sku_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sku_trigram_index, drop_sku_trigram_index),
+    ]
@@ -1,6 +1,77 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import ExpressionWrapper, F, Q
+from django.utils import timezone
 from categories.models import Category
 from django.core.validators import MinValueValidator
+from .storage import product_image_storage
+
+
+# Products at or below their reorder point. Shared by the queryset filter
+# and the partial index so the planner can match one against the other.
+NEEDS_REORDER = Q(stock_level__lte=F('reorder_point'))
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    QuerySet for Product with database-side stock helpers.
+    """
+
+    def with_reorder_status(self):
+        """
+        Annotate each product with a database-computed ``reorder_due`` flag,
+        for ordering or aggregating on it in SQL.
+
+        The flag reflects the row as loaded; ``Product.needs_reorder`` is
+        computed from the instance's own fields instead, so it stays right
+        after ``stock_level`` or ``reorder_point`` is changed in memory.
+
+        Returns:
+            ProductQuerySet: Products annotated with ``reorder_due``
+        """
+        return self.annotate(
+            reorder_due=ExpressionWrapper(NEEDS_REORDER, output_field=models.BooleanField())
+        )
+
+    def for_fields(self, field_names):
+        """
+        Add only the joins and annotations that the given serializer fields
+        read. The search vector, which no serializer reads, is never loaded.
+
+        Args:
+            field_names (Iterable[str]): Names of the fields being serialized
+
+        Returns:
+            ProductQuerySet: QuerySet ready for serialization
+        """
+        field_names = set(field_names)
+        queryset = self.defer('search_vector')
+        related = []
+        if 'category_name' in field_names:
+            related.append('category')
+        if 'default_image' in field_names:
+            related.append('default_image')
+        if related:
+            queryset = queryset.select_related(*related)
+        if 'images' in field_names:
+            queryset = queryset.prefetch_related('images')
+        return queryset
+
+    def needs_reorder(self, flag=True):
+        """
+        Filter products on whether they need reordering.
+
+        Args:
+            flag (bool): True for products at or below their reorder point,
+                False for products above it
+
+        Returns:
+            ProductQuerySet: Filtered products
+        """
+        if flag:
+            return self.filter(NEEDS_REORDER)
+        return self.exclude(NEEDS_REORDER)
+
 
 class Product(models.Model):
     """
@@ -44,9 +115,23 @@ class Product(models.Model):
         related_name='default_for_product',
         help_text="Default image to display for this product"
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Full-text search vector, kept up to date by products.search"
+    )
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(
+                fields=['name'],
+                condition=NEEDS_REORDER,
+                name='product_needs_reorder_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -69,13 +154,20 @@ class ProductImage(models.Model):
     
     Stores up to 4 images per product.
     """
+    MAX_IMAGES = 4
+
     product = models.ForeignKey(
         Product,
         on_delete=models.CASCADE,
         related_name='images',
         help_text="Product this image belongs to"
     )
-    image = models.ImageField(upload_to='product_images/')
+    image = models.ImageField(upload_to='product_images/', storage=product_image_storage)
+    derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Resized copies of the image by size and format (see products.imaging)"
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -84,11 +176,92 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"Image for {self.product.name}"
 
+    def stored_names(self):
+        """
+        Storage names of every file this image references: the original and
+        each of its derivatives.
+        """
+        names = [self.image.name]
+        for formats in self.derivatives.values():
+            names.extend(derivative['name'] for derivative in formats.values())
+        return names
+
     def save(self, *args, **kwargs):
         """
         Override save to enforce maximum 4 images per product.
         """
-        max_images = 4
-        if self.product.images.count() >= max_images and not self.pk:
-            raise ValueError(f"Product can have a maximum of {max_images} images.")
-        super().save(*args, **kwargs)
\ No newline at end of file
+        if self.product.images.count() >= self.MAX_IMAGES and not self.pk:
+            raise ValueError(f"Product can have a maximum of {self.MAX_IMAGES} images.")
+        super().save(*args, **kwargs)
+
+
+class ImageBlob(models.Model):
+    """
+    Model representing one stored product image file and how many
+    ProductImage rows reference it.
+
+    Product images are stored by content hash, so products sharing a
+    packshot share one file. The file is deleted when the last reference
+    goes (see ``products.blobs``).
+    """
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name of the file")
+    size = models.BigIntegerField(default=0, help_text="File size in bytes")
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger entry recording one change to a product's stock.
+
+    ``Product.stock_level`` is a cached projection of the sum of a
+    product's movements; both are written together by ``products.stock``.
+    """
+    REASON_CHOICES = (
+        ('OPENING', 'Opening balance'),
+        ('SALE', 'Sale'),
+        ('CANCELLATION', 'Sale cancellation'),
+        ('ADJUSTMENT', 'Manual adjustment'),
+        ('RECEIPT', 'Stock receipt'),
+    )
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_movements',
+        help_text="Product whose stock moved"
+    )
+    quantity = models.IntegerField(help_text="Signed change in stock; negative when stock leaves")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    reference = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="What caused the movement, e.g. sale:42"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='stockmovement_product_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity:+d} {self.product_id} ({self.reason})"
+
+    def save(self, *args, **kwargs):
+        """
+        Override save to keep the ledger append-only.
+        """
+        if self.pk:
+            raise ValueError("Stock movements cannot be changed once recorded.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Override delete to keep the ledger append-only.
+        """
+        raise ValueError("Stock movements cannot be deleted.")
@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset pagination for product listings.
+
+    Orders by name with the primary key as a tie-breaker so the cursor
+    stays stable across products that share a name.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('name', 'id')
+
+
+class ProductSearchPagination(PageNumberPagination):
+    """
+    Page-number pagination for search results.
+
+    Search results are ordered by relevance, which a cursor cannot encode,
+    so they are paged by number instead.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,159 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Greatest
+
+from categories.models import Category
+
+# SQLite dev databases index products in this FTS5 table (see migration 0007).
+FTS_TABLE = 'products_product_fts'
+
+# Product fields the search index is built from.
+SEARCHED_FIELDS = {'name', 'description', 'sku', 'category'}
+
+# Most ranked matches read from the FTS5 table per search.
+MAX_FTS_RESULTS = 1000
+
+# Text search configuration for the stored vector. 'simple' does no
+# stemming, which suits drug names and SKUs better than a language config.
+SEARCH_CONFIG = 'simple'
+
+
+def search_terms(q):
+    """
+    Split a search string into word terms, dropping punctuation and operators.
+    """
+    return re.findall(r'\w+', q)
+
+
+def _search_vector():
+    """
+    Weighted search vector over name and SKU (A), description (B) and
+    category name (C).
+    """
+    from django.contrib.postgres.search import SearchVector
+
+    category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('sku', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(category_name, weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_index(product_ids):
+    """
+    Refresh the search index entries of the given products.
+
+    Runs one UPDATE of the stored ``search_vector`` column on PostgreSQL,
+    or replaces the products' rows in the FTS5 table on SQLite.
+
+    Args:
+        product_ids (Iterable[int]): Products to reindex
+    """
+    from .models import Product
+
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    if connection.vendor == 'postgresql':
+        Product.objects.filter(pk__in=product_ids).update(search_vector=_search_vector())
+    elif connection.vendor == 'sqlite':
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', product_ids)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, sku, category_name) '
+                'SELECT p.id, p.name, p.description, p.sku, c.name '
+                'FROM products_product p JOIN categories_category c ON c.id = p.category_id '
+                f'WHERE p.id IN ({placeholders})',
+                product_ids,
+            )
+
+
+def remove_from_search_index(product_ids):
+    """
+    Drop deleted products from the SQLite FTS5 table.
+
+    PostgreSQL keeps the vector on the product row, so nothing is needed there.
+    """
+    product_ids = list(product_ids)
+    if product_ids and connection.vendor == 'sqlite':
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', product_ids)
+
+
+def _postgres_search(queryset, q, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+
+    # Every term must match, as a prefix so "parac" finds paracetamol.
+    query = SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG
+    )
+    results = (
+        queryset.filter(search_vector=query)
+        .annotate(search_rank=SearchRank('search_vector', query))
+        .order_by('-search_rank', 'pk')
+    )
+    if results.exists():
+        return results
+
+    # Nothing matched: assume a typo and rank by trigram similarity, which
+    # the trigram indexes on name and sku answer through the % operator.
+    return (
+        queryset.filter(Q(name__trigram_similar=q) | Q(sku__trigram_similar=q))
+        .annotate(search_rank=Greatest(TrigramSimilarity('name', q), TrigramSimilarity('sku', q)))
+        .order_by('-search_rank', 'pk')
+    )
+
+
+def _sqlite_search(queryset, q, terms):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    with connection.cursor() as cursor:
+        # bm25 weights follow the column order: name, description, sku, category_name.
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, 10.0, 2.0, 10.0, 4.0) LIMIT %s',
+            [match, MAX_FTS_RESULTS],
+        )
+        ranked_ids = [row[0] for row in cursor.fetchall()]
+    if not ranked_ids:
+        return queryset.filter(Q(name__icontains=q) | Q(sku__icontains=q)).order_by('name', 'pk')
+    return queryset.filter(pk__in=ranked_ids).order_by(
+        Case(
+            *(When(pk=pk, then=Value(position)) for position, pk in enumerate(ranked_ids)),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def search_products(queryset, q):
+    """
+    Filter products by a search string and order them by relevance.
+
+    Matches name, SKU, description and category name. PostgreSQL uses the
+    stored, GIN-indexed ``search_vector`` ranked with ``ts_rank`` and falls
+    back to trigram similarity when nothing matches; SQLite uses an FTS5
+    table ranked with bm25; other databases fall back to substring matching.
+
+    Args:
+        queryset: Product queryset to search within
+        q (str): Search string
+
+    Returns:
+        QuerySet: Matching products, best match first
+    """
+    terms = search_terms(q)
+    if not terms:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, q, terms)
+    if connection.vendor == 'sqlite':
+        return _sqlite_search(queryset, q, terms)
+    return queryset.filter(
+        Q(name__icontains=q) | Q(sku__icontains=q)
+        | Q(description__icontains=q) | Q(category__name__icontains=q)
+    ).order_by('name', 'pk')
@@ -1,7 +1,11 @@
+from decimal import Decimal
 
+from django.db import transaction
 from rest_framework import serializers
 from .models import Product, ProductImage
+from .stock import record_opening_stock, set_stock_level
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 import base64
 
 # class ProductImageSerializer(serializers.ModelSerializer):
@@ -42,11 +46,21 @@ class ProductImageSerializer(serializers.ModelSerializer):
     """
     image = serializers.ImageField()  # For handling file uploads
     image_url = serializers.SerializerMethodField()  # For returning the absolute URL
+    derivatives = serializers.SerializerMethodField()  # Resized copies by size and format
+    srcset = serializers.SerializerMethodField()  # Ready-made srcset strings per format
 
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'image_url', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_at', 'image_url']
+        fields = ['id', 'image', 'image_url', 'derivatives', 'srcset', 'uploaded_at']
+        read_only_fields = ['id', 'uploaded_at', 'image_url', 'derivatives', 'srcset']
+
+    def _derivative_url(self, obj, name):
+        """
+        Build the absolute URL of a stored derivative.
+        """
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
     def get_image_url(self, obj):
         """
@@ -63,7 +77,81 @@ class ProductImageSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
-class ProductSerializer(serializers.ModelSerializer):
+    def get_derivatives(self, obj):
+        """
+        Return the URLs of the image's resized copies.
+
+        Args:
+            obj: ProductImage instance
+
+        Returns:
+            dict: Mapping of size name (thumb, card, full) to format name
+                (webp, jpeg) to URL; empty until derivatives are built
+        """
+        return {
+            size_name: {
+                format_name: self._derivative_url(obj, variant['name'])
+                for format_name, variant in formats.items()
+            }
+            for size_name, formats in obj.derivatives.items()
+        }
+
+    def get_srcset(self, obj):
+        """
+        Return ``srcset`` attribute values for the image's resized copies.
+
+        Args:
+            obj: ProductImage instance
+
+        Returns:
+            dict: Mapping of format name to a srcset string such as
+                ``"https://.../a-thumb.webp 150w, https://.../b-card.webp 400w"``
+        """
+        candidates = {}
+        for formats in obj.derivatives.values():
+            for format_name, variant in formats.items():
+                candidates.setdefault(format_name, {})[variant['width']] = variant['name']
+        return {
+            format_name: ', '.join(
+                f"{self._derivative_url(obj, name)} {width}w"
+                for width, name in sorted(by_width.items())
+            )
+            for format_name, by_width in candidates.items()
+        }
+
+
+def clean_sku(value):
+    """
+    Normalize a SKU to upper case and check its format.
+
+    Raises:
+        serializers.ValidationError: If SKU format is invalid
+    """
+    value = value.upper()
+    if len(value) < 4:
+        raise serializers.ValidationError(
+            "SKU must be at least 4 characters long."
+        )
+    return value
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that accepts an optional ``fields`` argument.
+
+    Fields not listed are dropped before serialization, so their
+    SerializerMethodFields and nested serializers never run.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class ProductSerializer(DynamicFieldsModelSerializer):
     """
     Serializer for the Product model.
     
@@ -114,12 +202,7 @@ class ProductSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: If SKU format is invalid
         """
-        value = value.upper()
-        if len(value) < 4:
-            raise serializers.ValidationError(
-                "SKU must be at least 4 characters long."
-            )
-        return value
+        return clean_sku(value)
     
     def validate(self, data):
         """
@@ -148,6 +231,45 @@ class ProductSerializer(serializers.ModelSerializer):
         
         return data
 
+    def create(self, validated_data):
+        """
+        Create a product and record its starting stock in the ledger.
+        """
+        with transaction.atomic():
+            product = super().create(validated_data)
+            record_opening_stock(product, reference='product created')
+        return product
+
+    def update(self, instance, validated_data):
+        """
+        Update a product, routing stock changes through the stock ledger.
+
+        Only the submitted columns are saved, so a concurrent sale's stock
+        decrement is never overwritten with the stale in-memory stock level.
+        The stock level is set first, so a changed reorder point is checked
+        against the new level.
+        """
+        stock_level = validated_data.pop('stock_level', None)
+        with transaction.atomic():
+            if stock_level is not None:
+                set_stock_level(instance, stock_level, reference='product update')
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+class ProductCardSerializer(DynamicFieldsModelSerializer):
+    """
+    Compact, read-only representation of a product.
+
+    Carries only what a POS terminal needs to ring up a sale.
+    """
+    class Meta:
+        model = Product
+        fields = ['id', 'sku', 'name', 'unit_price', 'stock_level']
+        read_only_fields = fields
+
+
 class ProductStockUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating only the stock level of a product.
@@ -176,9 +298,62 @@ class ProductStockUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Stock level cannot be negative."
             )
-        
-        if value <= self.instance.reorder_point:
-            print(f"WARNING: Product {self.instance.name} (SKU: {self.instance.sku}) "
-                  f"is below reorder point. Current stock: {value}")
-        
+        # Falling to the reorder point is reported by the low-stock alerts
+        # raised when the new level is written (see stock.service).
         return value
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    """
+    Serializer for validating one row of a product import file.
+
+    Checks the row on its own, without queries; categories and existing
+    SKUs are resolved for a whole chunk of rows by ``products.transfer``.
+    """
+    sku = serializers.CharField(max_length=50)
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    category = serializers.IntegerField(min_value=1)
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    stock_level = serializers.IntegerField(min_value=0, required=False, default=0)
+    reorder_point = serializers.IntegerField(min_value=0, required=False, default=10)
+    is_active = serializers.BooleanField(required=False, default=True)
+
+    def validate_sku(self, value):
+        """
+        Validate SKU format the same way as ProductSerializer.
+        """
+        return clean_sku(value)
+
+
+class StockCountSerializer(serializers.Serializer):
+    """
+    Serializer for one counted stock level in a stock-take.
+    """
+    sku = serializers.CharField(max_length=50)
+    stock_level = serializers.IntegerField(min_value=0)
+
+
+class BulkStockAdjustmentSerializer(serializers.Serializer):
+    """
+    Serializer for a batch of counted stock levels.
+    """
+    items = serializers.ListField(child=StockCountSerializer(), min_length=1, max_length=10000)
+    reference = serializers.CharField(max_length=60, required=False, allow_blank=True, default='')
+
+    def validate_items(self, items):
+        """
+        Normalize SKUs and reject SKUs counted more than once.
+        """
+        seen = set()
+        duplicates = set()
+        for item in items:
+            item['sku'] = item['sku'].strip().upper()
+            if item['sku'] in seen:
+                duplicates.add(item['sku'])
+            seen.add(item['sku'])
+        if duplicates:
+            raise serializers.ValidationError(
+                f"SKUs listed more than once: {', '.join(sorted(duplicates))}"
+            )
+        return items
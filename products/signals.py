@@ -0,0 +1,110 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from categories.models import Category
+
+from .blobs import release_blobs, retain_blobs
+from .catalogue import bump_catalogue_version, invalidate_sku_lookups
+from .lookup import sku_cache
+from .models import Product, ProductImage
+from .search import SEARCHED_FIELDS, remove_from_search_index, update_search_index
+
+
+@receiver(post_save, sender=ProductImage)
+def retain_product_image_blob(sender, instance, created, **kwargs):
+    """
+    Count a new product image as a reference to its stored file.
+
+    ``bulk_create`` does not send this signal; bulk callers retain blobs
+    themselves.
+    """
+    if created and not kwargs.get('raw'):
+        retain_blobs([instance.image.name])
+
+
+@receiver(post_delete, sender=ProductImage)
+def release_product_image_blob(sender, instance, **kwargs):
+    """
+    Drop a deleted product image's references to its original and
+    derivative files.
+    """
+    release_blobs(instance.stored_names())
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_product_on_image_change(sender, instance, **kwargs):
+    """
+    Bump the product's ``updated_at`` so its ETag and Last-Modified change
+    with its images.
+    """
+    if not kwargs.get('raw'):
+        Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalogue_cache(sender, **kwargs):
+    """
+    Invalidate cached product reads after a product, image or category changes.
+    """
+    if not kwargs.get('raw'):
+        bump_catalogue_version()
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_sku(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Note the stored SKU of a product that may be renamed, so lookups of the
+    old SKU can be dropped as well.
+    """
+    if raw or instance.pk is None or (update_fields is not None and 'sku' not in update_fields):
+        return
+    instance._previous_sku = Product.objects.filter(pk=instance.pk).values_list('sku', flat=True).first()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def evict_sku_lookup(sender, instance, **kwargs):
+    """
+    Drop a saved or deleted product from this process's SKU lookup cache
+    now, and from every process's once the transaction commits.
+    """
+    skus = {instance.sku, getattr(instance, '_previous_sku', None)} - {None}
+    sku_cache.evict(*skus)
+    invalidate_sku_lookups(skus)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    """
+    Refresh a product's search index entry when a searched field may have changed.
+    """
+    if kwargs.get('raw'):
+        return
+    if update_fields is not None and not SEARCHED_FIELDS.intersection(update_fields):
+        return
+    update_search_index([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    """
+    Drop a deleted product from the search index.
+    """
+    remove_from_search_index([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, **kwargs):
+    """
+    Refresh the search index entries of a renamed category's products.
+    """
+    if created or kwargs.get('raw'):
+        return
+    update_search_index(Product.objects.filter(category=instance).values_list('pk', flat=True))
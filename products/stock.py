@@ -0,0 +1,240 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Sum, When
+from django.utils import timezone
+
+from stock.service import PRODUCT, shift_stock
+
+from .catalogue import bump_catalogue_version, invalidate_sku_lookups
+from .models import Product, StockMovement
+
+
+class InsufficientStock(Exception):
+    """
+    Raised when a product does not hold enough stock for a requested movement.
+    """
+
+    def __init__(self, product):
+        self.product = product
+        super().__init__(
+            f"Insufficient stock for product {product.name}. Available: {product.stock_level}"
+        )
+
+
+def _first_short(products, quantities):
+    """
+    Return the first product holding less stock than requested, if any.
+    """
+    for product in products:
+        if product.stock_level < quantities[product.pk]:
+            return product
+    return None
+
+
+def _lock_products(product_ids):
+    """
+    Lock product rows in primary key order and return them.
+
+    Locking in a fixed order means concurrent callers always acquire their
+    locks in the same sequence and cannot deadlock.
+    """
+    return list(
+        Product.objects.select_for_update()
+        .filter(pk__in=product_ids)
+        .only('pk', 'sku', 'name', 'stock_level', 'reorder_point')
+        .order_by('pk')
+    )
+
+
+def _shift_stock(deltas, guard=None, products=()):
+    """
+    Apply signed stock changes to several products in one ``CASE`` update,
+    and the same changes to their shared stock records.
+
+    ``products`` are the locked rows, still at their old stock levels; the
+    stock service raises low-stock alerts from them and their SKU lookups
+    are invalidated.
+
+    Returns:
+        int: Number of product rows updated
+    """
+    rows = Product.objects.filter(guard if guard is not None else Q(pk__in=deltas))
+    bump_catalogue_version()
+    invalidate_sku_lookups(product.sku for product in products)
+    updated = rows.update(
+        stock_level=Case(
+            *(When(pk=pk, then=F('stock_level') + delta) for pk, delta in deltas.items()),
+            default=F('stock_level'),
+            output_field=models.PositiveIntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    shift_stock(PRODUCT, deltas, products)
+    return updated
+
+
+def _record_movements(deltas, reason, reference):
+    """
+    Append one ledger entry per product for the given signed changes.
+    """
+    now = timezone.now()
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            product_id=pk,
+            quantity=delta,
+            reason=reason,
+            reference=reference,
+            created_at=now,
+        )
+        for pk, delta in deltas.items()
+        if delta
+    ])
+
+
+def decrement_stock(quantities, reason='SALE', reference=''):
+    """
+    Atomically remove stock from one or more products.
+
+    Product rows are locked in primary key order, then all products are
+    decremented by a single conditional ``F()`` update
+    (``stock_level__gte=quantity`` per product) that only writes the stock
+    columns, and the movements are appended to the ledger.
+
+    Args:
+        quantities (dict): Mapping of product ID to the quantity to remove
+        reason (str): StockMovement reason to record
+        reference (str): What caused the movement, e.g. ``sale:42``
+
+    Raises:
+        Product.DoesNotExist: If any product was deleted meanwhile
+        InsufficientStock: If any product holds less than requested. No
+            stock is removed in either case.
+    """
+    with transaction.atomic():
+        products = _lock_products(quantities)
+        missing = set(quantities) - {product.pk for product in products}
+        if missing:
+            raise Product.DoesNotExist(
+                f"Products no longer exist: {', '.join(str(pk) for pk in sorted(missing))}"
+            )
+        short = _first_short(products, quantities)
+        if short is not None:
+            raise InsufficientStock(short)
+
+        guard = Q()
+        for product in products:
+            guard |= Q(pk=product.pk, stock_level__gte=quantities[product.pk])
+        deltas = {product.pk: -quantities[product.pk] for product in products}
+        if _shift_stock(deltas, guard, products) != len(products):
+            # Only reachable on backends without row locks, where another
+            # writer got in between the read and the conditional update.
+            products = Product.objects.filter(pk__in=quantities).only('pk', 'name', 'stock_level')
+            raise InsufficientStock(_first_short(products, quantities) or products[0])
+        _record_movements(deltas, reason, reference)
+
+
+def increment_stock(quantities, reason, reference=''):
+    """
+    Atomically add stock to one or more products.
+
+    Args:
+        quantities (dict): Mapping of product ID to the quantity to add
+        reason (str): StockMovement reason to record, e.g. ``CANCELLATION``
+        reference (str): What caused the movement, e.g. ``sale:42``
+    """
+    with transaction.atomic():
+        products = _lock_products(quantities)
+        deltas = {product.pk: quantities[product.pk] for product in products}
+        if deltas:
+            _shift_stock(deltas, products=products)
+            _record_movements(deltas, reason, reference)
+
+
+def set_stock_level(product, stock_level, reason='ADJUSTMENT', reference=''):
+    """
+    Set a product's stock to an absolute level, recording the difference.
+
+    Args:
+        product: Product instance; its ``stock_level`` is refreshed in place
+        stock_level (int): New stock level
+        reason (str): StockMovement reason to record
+        reference (str): What caused the movement
+
+    Returns:
+        int: The signed change that was applied
+
+    Raises:
+        Product.DoesNotExist: If the product was deleted meanwhile
+    """
+    with transaction.atomic():
+        locked = _lock_products([product.pk])
+        if not locked:
+            raise Product.DoesNotExist(f"Product {product.pk} no longer exists.")
+        locked = locked[0]
+        delta = stock_level - locked.stock_level
+        if delta:
+            _shift_stock({product.pk: delta}, products=[locked])
+            _record_movements({product.pk: delta}, reason, reference)
+        product.stock_level = stock_level
+    return delta
+
+
+def set_stock_levels(levels, reason='ADJUSTMENT', reference=''):
+    """
+    Set many products' stock to absolute levels in one transaction.
+
+    Products are locked in primary key order, every changed level is
+    written by a single ``CASE`` update and the differences are appended
+    to the ledger with one ``bulk_create``.
+
+    Args:
+        levels (dict): Mapping of product ID to its new stock level
+        reason (str): StockMovement reason to record
+        reference (str): What caused the movements, e.g. ``stocktake:7``
+
+    Returns:
+        list: ``(product, previous level)`` per locked product, in primary
+            key order; each product's ``stock_level`` is the new level
+    """
+    with transaction.atomic():
+        products = _lock_products(levels)
+        deltas = {
+            product.pk: levels[product.pk] - product.stock_level
+            for product in products
+            if levels[product.pk] != product.stock_level
+        }
+        if deltas:
+            _shift_stock(deltas, products=products)
+            _record_movements(deltas, reason, reference)
+        results = []
+        for product in products:
+            results.append((product, product.stock_level))
+            product.stock_level = levels[product.pk]
+    return results
+
+
+def record_opening_stock(product, reference=''):
+    """
+    Record the stock a newly created product starts with.
+
+    Args:
+        product: Newly saved Product instance
+        reference (str): What created the product
+    """
+    _record_movements({product.pk: product.stock_level}, 'OPENING', reference)
+
+
+def stock_at(product, moment):
+    """
+    Rebuild a product's stock level at a point in time from the ledger.
+
+    Args:
+        product: Product instance or ID
+        moment (datetime): Point in time to evaluate
+
+    Returns:
+        int: Stock level at ``moment``
+    """
+    total = StockMovement.objects.filter(
+        product=product, created_at__lte=moment
+    ).aggregate(total=Sum('quantity'))['total']
+    return total or 0
@@ -0,0 +1,60 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files after a SHA-256 hash of their content.
+
+    Uploads are hashed while they are streamed to a temporary file, which is
+    then moved to ``<directory>/<aa>/<digest><ext>``. Saving bytes that are
+    already stored returns the existing name instead of writing a renamed
+    copy, so each distinct image is kept once. Whether a stored file is
+    still referenced is tracked by ``products.models.ImageBlob``.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save; identical content
+        # must map to the same name rather than a suffixed copy.
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        os.makedirs(self.path(directory or '.'), exist_ok=True)
+
+        digest = hashlib.sha256()
+        handle, temporary_path = tempfile.mkstemp(dir=self.path(directory or '.'), suffix='.upload')
+        try:
+            with os.fdopen(handle, 'wb') as spool:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    spool.write(chunk)
+
+            hexdigest = digest.hexdigest()
+            name = os.path.join(directory, hexdigest[:2], f'{hexdigest}{extension}').replace('\\', '/')
+            if self.exists(name):
+                os.remove(temporary_path)
+            else:
+                os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+                file_move_safe(temporary_path, self.path(name), allow_overwrite=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(self.path(name), self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        return name
+
+
+def product_image_storage():
+    """
+    Storage used for uploaded product images.
+    """
+    return ContentAddressedStorage()
@@ -0,0 +1,26 @@
+from jobs.registry import task
+
+from .imaging import build_derivatives, strip_metadata
+from .models import ProductImage
+from .uploads import assign_default_images
+
+
+@task('products.process_image')
+def process_product_image(image_id):
+    """
+    Strip metadata from an uploaded product image, build its derivatives and
+    make it the product's default image if the product has none.
+    """
+    try:
+        image = ProductImage.objects.get(pk=image_id)
+    except ProductImage.DoesNotExist:
+        return {'image_id': image_id, 'skipped': 'deleted'}
+
+    stripped = strip_metadata(image)
+    derivatives = build_derivatives(image)
+    assign_default_images([image.product_id])
+    return {
+        'image_id': image_id,
+        'metadata_stripped': stripped,
+        'derivatives': sorted(derivatives),
+    }
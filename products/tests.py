@@ -1,3 +1,1033 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from categories.models import Category
+from jobs.models import Job
+from jobs.worker import run_pending
+from stock.models import StockRecord
+from .catalogue import cache_stats, cached_read, catalogue_cache, catalogue_version, reset_cache_stats
+from .lookup import sku_cache
+from .models import ImageBlob, Product, ProductImage, StockMovement
+from .stock import decrement_stock, set_stock_level, set_stock_levels, stock_at
+from .transfer import import_products
+from .uploads import save_bulk_images
+
+
+class ProductListQueryCountTests(APITestCase):
+    """
+    Regression tests pinning the number of queries used by the product listing.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='cashier', password='secret')
+        category = Category.objects.create(name='Analgesics', description='Pain relief')
+        for i in range(30):
+            product = Product.objects.create(
+                category=category,
+                name=f'Product {i:02d}',
+                sku=f'SKU-{i:04d}',
+                unit_price='1.50',
+                stock_level=i,
+            )
+            images = [
+                ProductImage.objects.create(product=product, image=f'product_images/{i}-{n}.png')
+                for n in range(2)
+            ]
+            product.default_image = images[0]
+            product.save()
+
+    def setUp(self):
+        catalogue_cache().clear()
+        self.client.force_authenticate(self.user)
+
+    def test_query_count_is_independent_of_page_size(self):
+        url = reverse('inventory:product-list-create')
+        for page_size in (5, 30):
+            # The catalogue version, the page of products and their images.
+            with self.assertNumQueries(3):
+                response = self.client.get(url, {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(len(response.data['results'][0]['images']), 2)
+
+    def test_cursor_walks_every_product_once(self):
+        url = reverse('inventory:product-list-create')
+        seen = []
+        response = self.client.get(url, {'page_size': 7})
+        while True:
+            seen.extend(product['sku'] for product in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(len(set(seen)), 30)
+
+    def test_card_view_skips_joins_and_method_fields(self):
+        url = reverse('inventory:product-list-create')
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'view': 'card', 'page_size': 10})
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'sku', 'name', 'unit_price', 'stock_level'},
+        )
+
+    def test_fields_parameter_limits_detail_payload(self):
+        product = Product.objects.get(sku='SKU-0003')
+        url = reverse('inventory:product-detail', args=[product.pk])
+        # Two small validator lookups for the ETag, the catalogue version,
+        # then the product itself.
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'fields': 'sku,category_name'})
+        self.assertEqual(response.data, {'sku': 'SKU-0003', 'category_name': 'Analgesics'})
+
+    def test_unknown_fields_are_rejected(self):
+        product = Product.objects.get(sku='SKU-0003')
+        response = self.client.get(
+            reverse('inventory:product-detail', args=[product.pk]), {'fields': 'sku,bogus,colour'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'fields': ['Unknown fields: bogus, colour']})
+
+        response = self.client.get(
+            reverse('inventory:product-list-create'), {'view': 'card', 'fields': 'sku,category_name'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'fields': ['Unknown fields: category_name']})
+
+
+class ProductReorderFilterTests(APITestCase):
+    """
+    Tests for finding products at or below their reorder point in SQL.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='storekeeper', password='secret')
+        category = Category.objects.create(name='Infusions', description='IV fluids')
+        for sku, stock_level in (('SALINE', 3), ('DEXTROSE', 5), ('RINGER', 9)):
+            Product.objects.create(
+                category=category, name=sku.title(), sku=sku, unit_price='1.00',
+                stock_level=stock_level, reorder_point=5,
+            )
+
+    def setUp(self):
+        catalogue_cache().clear()
+        self.client.force_authenticate(self.user)
+
+    def test_queryset_filters_on_the_reorder_point(self):
+        self.assertEqual(
+            sorted(Product.objects.needs_reorder().values_list('sku', flat=True)), ['DEXTROSE', 'SALINE']
+        )
+        self.assertEqual(list(Product.objects.needs_reorder(False).values_list('sku', flat=True)), ['RINGER'])
+
+    def test_property_follows_stock_changes_after_annotation(self):
+        annotated = Product.objects.with_reorder_status().get(sku='RINGER')
+        self.assertFalse(annotated.reorder_due)
+        annotated.stock_level = 0
+        # The annotation reflects the row as loaded; the property compares
+        # the instance's own fields.
+        self.assertFalse(annotated.reorder_due)
+        self.assertTrue(annotated.needs_reorder)
+        self.assertEqual(
+            list(Product.objects.with_reorder_status().order_by('-reorder_due', 'sku')
+                 .values_list('sku', 'reorder_due')),
+            [('DEXTROSE', True), ('SALINE', True), ('RINGER', False)],
+        )
+
+    def test_list_endpoint_filter(self):
+        url = reverse('inventory:product-list-create')
+        response = self.client.get(url, {'needs_reorder': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['sku'], row['needs_reorder']) for row in response.data['results']],
+            [('DEXTROSE', True), ('SALINE', True)],
+        )
+        response = self.client.get(url, {'needs_reorder': 'false'})
+        self.assertEqual([row['sku'] for row in response.data['results']], ['RINGER'])
+
+
+class StockLedgerTests(APITestCase):
+    """
+    Tests for the stock ledger and stock restoration on cancellation.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='pharmacist', password='secret')
+        cls.category = Category.objects.create(name='Antibiotics', description='Prescription only')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('inventory:product-list-create'), {
+            'category': self.category.pk,
+            'name': 'Amoxicillin 500mg',
+            'sku': 'amox-500',
+            'unit_price': '4.20',
+            'stock_level': 20,
+            'reorder_point': 5,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.product = Product.objects.get(pk=response.data['id'])
+
+    def assertLedgerMatchesStock(self):
+        self.product.refresh_from_db()
+        total = sum(self.product.stock_movements.values_list('quantity', flat=True))
+        self.assertEqual(total, self.product.stock_level)
+
+    def test_cancelling_a_sale_restores_stock(self):
+        response = self.client.post(reverse('sale-list-create'), {
+            'details': [{'product': self.product.pk, 'quantity': 3}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_level, 17)
+
+        sale_url = reverse('sale-detail', args=[response.data['id']])
+        response = self.client.patch(sale_url, {'status': 'CANCELLED'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_level, 20)
+        self.assertEqual(
+            list(self.product.stock_movements.values_list('reason', 'quantity')),
+            [('OPENING', 20), ('SALE', -3), ('CANCELLATION', 3)],
+        )
+        self.assertLedgerMatchesStock()
+
+        response = self.client.patch(sale_url, {'status': 'COMPLETED'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_stock_patch_records_an_adjustment(self):
+        url = reverse('inventory:product-stock-update', args=[self.product.pk])
+        response = self.client.patch(url, {'stock_level': 12})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stock_level'], 12)
+        self.assertEqual(self.product.stock_movements.last().quantity, -8)
+        self.assertLedgerMatchesStock()
+
+    def test_stock_patch_on_concurrently_deleted_product_is_404(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        Product.objects.filter(pk=stale.pk).delete()
+        with self.assertRaises(Product.DoesNotExist):
+            set_stock_level(stale, 5)
+
+        url = reverse('inventory:product-stock-update', args=[stale.pk])
+        with mock.patch('products.views.ProductStockUpdateView.get_object', return_value=stale):
+            response = self.client.patch(url, {'stock_level': 5})
+        self.assertEqual(response.status_code, 404)
+
+    def test_stock_at_rebuilds_past_levels(self):
+        before_sale = timezone.now()
+        decrement_stock({self.product.pk: 5}, reference='test')
+        self.assertEqual(stock_at(self.product, before_sale), 20)
+        self.assertEqual(stock_at(self.product, timezone.now()), 15)
+
+    def test_rebuild_command_repairs_drift_and_stock_records(self):
+        Product.objects.filter(pk=self.product.pk).update(stock_level=99)
+        StockRecord.objects.filter(kind=StockRecord.PRODUCT, ref_id=self.product.pk).update(quantity=99)
+        version = catalogue_version()
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_stock_levels', '--fix', stdout=out)
+        self.assertIn('AMOX-500: stock_level=99 ledger=20', out.getvalue())
+        self.assertLedgerMatchesStock()
+        # Cached product reads no longer serve the drifted level.
+        self.assertGreater(catalogue_version(), version)
+
+        out = StringIO()
+        call_command('merge_stock', '--check', '--kind', 'product', stdout=out)
+        self.assertIn('product: stock records match.', out.getvalue())
+
+
+class ProductImageUploadTests(APITestCase):
+    """
+    Tests for product image uploads and their resized derivatives.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='storefront', password='secret')
+        category = Category.objects.create(name='Devices', description='Medical devices')
+        cls.product = Product.objects.create(
+            category=category, name='Thermometer', sku='THERMO', unit_price='9.99', stock_level=40
+        )
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        catalogue_cache().clear()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, size=(1600, 800), color='red', exif=None):
+        buffer = BytesIO()
+        if exif is None:
+            Image.new('RGB', size, color).save(buffer, 'PNG')
+            upload = SimpleUploadedFile('packshot.png', buffer.getvalue(), content_type='image/png')
+        else:
+            Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif)
+            upload = SimpleUploadedFile('packshot.jpg', buffer.getvalue(), content_type='image/jpeg')
+        return self.client.post(
+            reverse('inventory:product-image-create', args=[self.product.pk]),
+            {'image': upload},
+            format='multipart',
+        )
+
+    def processed_image(self, response):
+        self.assertEqual(response.status_code, 202)
+        run_pending()
+        job = self.client.get(response.data['status_url'])
+        self.assertEqual(job.data['status'], 'SUCCEEDED')
+        return ProductImage.objects.get(pk=response.data['image']['id'])
+
+    def test_upload_queues_processing_job(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, 'QUEUED')
+        self.assertEqual(job.payload, {'image_id': response.data['image']['id']})
+        self.assertEqual(response.data['image']['derivatives'], {})
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.default_image_id)
+
+    def test_job_builds_derivatives_and_srcset(self):
+        image = self.processed_image(self.upload())
+        self.assertEqual(set(image.derivatives), {'thumb', 'card', 'full'})
+        self.assertEqual(image.derivatives['thumb']['webp']['width'], 150)
+        self.assertEqual(image.derivatives['full']['jpeg']['height'], 600)
+
+        images = self.client.get(reverse('inventory:product-detail', args=[self.product.pk])).data['images']
+        self.assertEqual(set(images[0]['srcset']), {'webp', 'jpeg'})
+        self.assertIn(' 400w', images[0]['srcset']['webp'])
+        self.assertTrue(images[0]['derivatives']['card']['jpeg'].endswith('-card.jpg'))
+
+    def test_job_sets_default_image_once(self):
+        first = self.processed_image(self.upload())
+        self.processed_image(self.upload(color='blue'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.default_image_id, first.pk)
+
+    def test_job_strips_exif(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'CameraMaker'
+        image = self.processed_image(self.upload(exif=exif))
+        with image.image.open('rb') as stored:
+            self.assertFalse(Image.open(stored).getexif())
+
+    def test_identical_derivatives_share_files(self):
+        first = self.processed_image(self.upload())
+        second = self.processed_image(self.upload())
+        self.assertEqual(first.derivatives, second.derivatives)
+
+    def test_derivative_files_are_deleted_with_their_last_image(self):
+        first = self.processed_image(self.upload())
+        second = self.processed_image(self.upload())
+        names = first.stored_names()[1:]
+        self.assertEqual(len(names), 6)
+        self.assertEqual(set(ImageBlob.objects.filter(name__in=names).values_list('ref_count', flat=True)), {2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_forced_rebuild_keeps_one_reference_per_derivative(self):
+        image = self.processed_image(self.upload())
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('build_image_derivatives', '--force', stdout=StringIO())
+        names = image.stored_names()[1:]
+        self.assertEqual(set(ImageBlob.objects.filter(name__in=names).values_list('ref_count', flat=True)), {1})
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+
+
+class ProductImageBulkUploadTests(APITestCase):
+    """
+    Tests for uploading images for many products in one request.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='onboarding', password='secret')
+        category = Category.objects.create(name='Dressings', description='Wound care')
+        cls.gauze = Product.objects.create(
+            category=category, name='Gauze', sku='GAUZE', unit_price='1.50', stock_level=10
+        )
+        cls.tape = Product.objects.create(
+            category=category, name='Tape', sku='TAPE', unit_price='0.80', stock_level=10
+        )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client.force_authenticate(self.user)
+
+    def png(self, name, color='green'):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 40), color).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def post(self, data):
+        return self.client.post(reverse('inventory:product-image-bulk-create'), data, format='multipart')
+
+    def test_multipart_upload_keyed_by_sku(self):
+        ProductImage.objects.bulk_create(
+            [ProductImage(product=self.tape, image=f'product_images/old-{i}.png') for i in range(3)]
+        )
+        # Savepoint, lock-and-count, image insert, blob savepoint, insert,
+        # lock, count update and release, default-image update, job insert
+        # and release.
+        with self.assertNumQueries(11):
+            response = self.post({
+                'GAUZE': [self.png('a.png'), self.png('b.png')],
+                'TAPE': [self.png('c.png'), self.png('d.png')],
+                'NOPE': self.png('e.png'),
+            })
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(sorted(row['sku'] for row in response.data['created']), ['GAUZE', 'GAUZE', 'TAPE'])
+        self.assertEqual(
+            sorted((row['sku'], row['file']) for row in response.data['errors']),
+            [('NOPE', 'e.png'), ('TAPE', 'd.png')],
+        )
+        self.assertEqual(self.tape.images.count(), 4)
+
+        self.gauze.refresh_from_db()
+        self.assertEqual(self.gauze.default_image_id, response.data['created'][0]['image_id'])
+        self.assertEqual(Job.objects.filter(task='products.process_image', status='QUEUED').count(), 3)
+
+    def test_skus_are_normalized_for_fields_and_archive_entries(self):
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, 'w') as bundle:
+            bundle.writestr('tape/front.png', self.png('front.png', 'red').read())
+        response = self.post({
+            ' gauze ': self.png('a.png'),
+            'archive': SimpleUploadedFile('catalogue.zip', archive.getvalue(), content_type='application/zip'),
+        })
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(sorted(row['sku'] for row in response.data['created']), ['GAUZE', 'TAPE'])
+        self.assertEqual(response.data['errors'], [])
+
+    def stored_files(self):
+        return {
+            os.path.relpath(os.path.join(directory, name), self.media_root).replace(os.sep, '/')
+            for directory, _, names in os.walk(self.media_root)
+            for name in names
+        }
+
+    def test_failed_upload_deletes_only_its_own_files(self):
+        save_bulk_images([('GAUZE', self.png('a.png', 'blue'))])
+        kept = self.stored_files()
+        self.assertEqual(len(kept), 1)
+
+        with mock.patch('products.uploads.enqueue_many', side_effect=RuntimeError('queue down')), \
+                self.assertRaises(RuntimeError):
+            save_bulk_images([('GAUZE', self.png('b.png', 'blue')), ('TAPE', self.png('c.png', 'red'))])
+
+        self.assertEqual(self.stored_files(), kept)
+        self.assertEqual(list(ImageBlob.objects.values_list('name', 'ref_count')), [(kept.pop(), 1)])
+        self.assertEqual(ProductImage.objects.count(), 1)
+
+    def test_zip_archive_upload(self):
+        def image_bytes(color):
+            buffer = BytesIO()
+            Image.new('RGB', (40, 40), color).save(buffer, 'PNG')
+            return buffer.getvalue()
+
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, 'w') as bundle:
+            bundle.writestr('GAUZE/front.png', image_bytes('red'))
+            bundle.writestr('GAUZE/back.png', image_bytes('blue'))
+            bundle.writestr('TAPE.png', image_bytes('white'))
+            bundle.writestr('notes.txt', 'not an image')
+        upload = SimpleUploadedFile('catalogue.zip', archive.getvalue(), content_type='application/zip')
+
+        response = self.post({'archive': upload})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(sorted(row['sku'] for row in response.data['created']), ['GAUZE', 'GAUZE', 'TAPE'])
+        self.assertEqual(response.data['errors'], [{'file': 'notes.txt', 'error': "Not an image file."}])
+        self.assertEqual(run_pending(), 3)
+        self.assertTrue(all(image.derivatives for image in ProductImage.objects.all()))
+
+    def archive(self, names):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as bundle:
+            for name in names:
+                bundle.writestr(name, b'x' * 100)
+        return SimpleUploadedFile('catalogue.zip', buffer.getvalue(), content_type='application/zip')
+
+    def test_archive_over_file_cap_is_rejected_before_extracting(self):
+        archive = self.archive([f'GAUZE/{i}.png' for i in range(3)] + ['readme.txt'])
+        with mock.patch('products.views.BULK_UPLOAD_MAX_FILES', 2), \
+                mock.patch('products.uploads.TemporaryUploadedFile') as temporary:
+            response = self.post({'archive': archive})
+        self.assertEqual(response.status_code, 400)
+        temporary.assert_not_called()
+        self.assertEqual(ProductImage.objects.count(), 0)
+
+    def test_archive_over_unpacked_size_is_rejected_before_extracting(self):
+        archive = self.archive(['GAUZE/front.png', 'TAPE.png'])
+        with mock.patch('products.uploads.ARCHIVE_MAX_SIZE', 150), \
+                mock.patch('products.uploads.TemporaryUploadedFile') as temporary:
+            response = self.post({'archive': archive})
+        self.assertEqual(response.status_code, 400)
+        temporary.assert_not_called()
+
+    def test_corrupt_archive_closes_extracted_files(self):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as bundle:
+            bundle.writestr('GAUZE/front.png', b'x' * 100)
+            bundle.writestr('TAPE.png', b'y' * 100)
+        data = bytearray(buffer.getvalue())
+        # Flip a byte of the second entry's content so its CRC check fails.
+        data[data.index(b'y' * 100)] = ord('z')
+        archive = SimpleUploadedFile('catalogue.zip', bytes(data), content_type='application/zip')
+
+        closed = []
+        close = TemporaryUploadedFile.close
+
+        def tracking_close(upload):
+            closed.append(upload.name)
+            return close(upload)
+
+        with mock.patch.object(TemporaryUploadedFile, 'close', tracking_close):
+            response = self.post({'archive': archive})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('front.png', closed)
+        self.assertIn('TAPE.png', closed)
+
+    def test_invalid_image_is_reported(self):
+        bogus = SimpleUploadedFile('bogus.png', b'not really a png', content_type='image/png')
+        response = self.post({'GAUZE': bogus})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['created'], [])
+        self.assertEqual(response.data['errors'][0]['file'], 'bogus.png')
+
+
+class ContentAddressedImageTests(APITestCase):
+    """
+    Tests for storing product images once per distinct content.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='catalogue', password='secret')
+        category = Category.objects.create(name='Laptops', description='Office hardware')
+        cls.products = [
+            Product.objects.create(
+                category=category, name=f'Laptop {i}', sku=f'LAPTOP-{i}', unit_price='999.00', stock_level=3
+            )
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client.force_authenticate(self.user)
+
+    def packshot(self, name='Macbook_Air_2022.png'):
+        buffer = BytesIO()
+        Image.new('RGB', (60, 30), 'silver').save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def test_identical_uploads_share_one_blob(self):
+        for product in self.products:
+            response = self.client.post(
+                reverse('inventory:product-image-create', args=[product.pk]),
+                {'image': self.packshot()},
+                format='multipart',
+            )
+            self.assertEqual(response.status_code, 202)
+
+        first, second = ProductImage.objects.order_by('pk')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^product_images/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(first.image.storage.exists(blob.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertFalse(first.image.storage.exists(blob.name))
+
+    def test_file_retained_before_deferred_delete_is_kept(self):
+        response = self.client.post(
+            reverse('inventory:product-image-create', args=[self.products[0].pk]),
+            {'image': self.packshot()},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 202)
+        image = ProductImage.objects.get()
+        storage = image.image.storage
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            image.delete()
+        # The same content is referenced again before the release's file
+        # deletion runs; the deletion re-reads the locked blob and skips it.
+        ProductImage.objects.create(product=self.products[1], image=image.image.name)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(ImageBlob.objects.get(name=image.image.name).ref_count, 1)
+        self.assertTrue(storage.exists(image.image.name))
+
+    def test_dedupe_command_moves_legacy_files(self):
+        storage = ProductImage._meta.get_field('image').storage
+        content = self.packshot().read()
+        legacy = []
+        for product, name in zip(self.products, ['Macbook_Air_2022.png', 'Macbook_Air_2022_VSqilSM.png']):
+            path = os.path.join(self.media_root, 'product_images', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as legacy_file:
+                legacy_file.write(content)
+            legacy.append(ProductImage.objects.bulk_create(
+                [ProductImage(product=product, image=f'product_images/{name}')]
+            )[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('dedupe_product_images', stdout=StringIO())
+
+        names = set(ProductImage.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(ImageBlob.objects.get().ref_count, 2)
+        self.assertTrue(storage.exists(names.pop()))
+        self.assertFalse(storage.exists(legacy[0].image.name))
+        self.assertFalse(storage.exists(legacy[1].image.name))
+
+
+class ProductConditionalRequestTests(APITestCase):
+    """
+    Tests for ETag and Last-Modified handling on product and catalogue endpoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='terminal', password='secret')
+        cls.category = Category.objects.create(name='Syringes', description='Single use')
+        cls.product = Product.objects.create(
+            category=cls.category, name='Syringe 5ml', sku='SYR-5', unit_price='0.40', stock_level=100
+        )
+
+    def setUp(self):
+        catalogue_cache().clear()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('inventory:product-detail', args=[self.product.pk])
+
+    def test_matching_etag_returns_304_before_serializing(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        # Only the product's updated_at and the categories version are read.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.patch(
+            reverse('inventory:product-stock-update', args=[self.product.pk]),
+            {'stock_level': 90},
+            format='json',
+        )
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_category_and_query(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertNotEqual(self.client.get(self.url, {'view': 'card'})['ETag'], etag)
+
+        self.category.name = 'Syringes & needles'
+        self.category.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_category_list_is_conditional(self):
+        url = reverse('category-list-create')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Category.objects.create(name='Gloves', description='Nitrile')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class CatalogueCacheTests(APITestCase):
+    """
+    Tests for the versioned cache in front of product reads.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='reader', password='secret')
+        category = Category.objects.create(name='Vitamins', description='Supplements')
+        cls.product = Product.objects.create(
+            category=category, name='Vitamin C', sku='VIT-C', unit_price='3.00', stock_level=12
+        )
+
+    def setUp(self):
+        catalogue_cache().clear()
+        reset_cache_stats()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_reads_are_served_from_cache(self):
+        url = reverse('inventory:product-list-create')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['results'][0]['sku'], 'VIT-C')
+        self.assertEqual(self.client.get(url, {'view': 'card'})['X-Cache'], 'MISS')
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 2})
+
+    def test_stock_change_invalidates_cached_reads(self):
+        url = reverse('inventory:product-detail', args=[self.product.pk])
+        self.assertEqual(self.client.get(url).data['stock_level'], 12)
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock({self.product.pk: 5})
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['stock_level'], 7)
+
+    def test_category_rename_invalidates_cached_reads(self):
+        url = reverse('inventory:product-list-create')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.filter(pk=self.product.category_id).get().save()
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+    def test_only_successful_reads_are_cached(self):
+        request = Request(APIRequestFactory().get('/api/inventory/products/'))
+        builds = []
+
+        def build():
+            builds.append(1)
+            return Response({'error': 'Unavailable'}, status=503)
+
+        for _ in range(2):
+            response, hit = cached_read(request, 'list', build)
+            self.assertEqual((response.status_code, hit), (503, False))
+        self.assertEqual(len(builds), 2)
+
+
+class ProductSearchTests(APITestCase):
+    """
+    Tests for ranked product search with ``?q=``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='pharmacist', password='secret')
+        analgesics = Category.objects.create(name='Analgesics', description='Pain relief')
+        cls.antibiotics = Category.objects.create(name='Antibiotics', description='Infections')
+        cls.paracetamol = Product.objects.create(
+            category=analgesics, name='Paracetamol 500mg', sku='PARA-500', unit_price='2.50',
+            description='Tablets for fever and mild pain',
+        )
+        cls.ibuprofen = Product.objects.create(
+            category=analgesics, name='Ibuprofen 200mg', sku='IBU-200', unit_price='3.10',
+            description='Anti-inflammatory, can be combined with paracetamol',
+        )
+        cls.amoxicillin = Product.objects.create(
+            category=cls.antibiotics, name='Amoxicillin 250mg', sku='AMOX-250', unit_price='6.00',
+        )
+
+    def setUp(self):
+        catalogue_cache().clear()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('inventory:product-list-create')
+
+    def skus(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [product['sku'] for product in response.data['results']]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.skus(q='paracetamol'), ['PARA-500', 'IBU-200'])
+
+    def test_prefix_sku_and_category_matches(self):
+        self.assertEqual(self.skus(q='amox'), ['AMOX-250'])
+        self.assertEqual(self.skus(q='IBU-200'), ['IBU-200'])
+        self.assertEqual(self.skus(q='antibiotics'), ['AMOX-250'])
+
+    def test_search_combines_with_filters_and_pages_by_number(self):
+        response = self.client.get(self.url, {'q': 'mg', 'category': self.antibiotics.pk, 'page_size': 1})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['sku'], 'AMOX-250')
+
+    def test_index_follows_product_and_category_changes(self):
+        self.amoxicillin.name = 'Co-amoxiclav 625mg'
+        self.amoxicillin.save()
+        self.assertEqual(self.skus(q='amoxiclav'), ['AMOX-250'])
+
+        self.antibiotics.name = 'Antibacterials'
+        self.antibiotics.save()
+        catalogue_cache().clear()
+        self.assertEqual(self.skus(q='antibacterials'), ['AMOX-250'])
+
+        self.amoxicillin.delete()
+        catalogue_cache().clear()
+        self.assertEqual(self.skus(q='amoxiclav'), [])
+
+
+class ProductSkuLookupTests(APITestCase):
+    """
+    Tests for resolving scanned SKUs.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='till', password='secret')
+        category = Category.objects.create(name='Antiseptics', description='Skin care')
+        cls.product = Product.objects.create(
+            category=category, name='Iodine 10%', sku='IOD-10', unit_price='4.20', stock_level=8
+        )
+        Product.objects.create(
+            category=category, name='Alcohol swabs', sku='SWAB-100', unit_price='1.10', stock_level=50
+        )
+
+    def setUp(self):
+        sku_cache.clear()
+        catalogue_cache().clear()
+        self.client.force_authenticate(self.user)
+
+    def test_lookup_returns_card_and_is_cached(self):
+        url = reverse('inventory:product-sku-lookup', args=['iod-10'])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'id': self.product.pk, 'sku': 'IOD-10', 'name': 'Iodine 10%',
+            'unit_price': '4.20', 'stock_level': 8,
+        })
+        # Only the SKU stamp is read from the shared cache once the SKU is cached.
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['sku'], 'IOD-10')
+
+    def test_unknown_sku_is_404(self):
+        response = self.client.get(reverse('inventory:product-sku-lookup', args=['NOPE-1']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_save_evicts_cached_sku(self):
+        url = reverse('inventory:product-sku-lookup', args=['IOD-10'])
+        self.client.get(url)
+        self.product.unit_price = '4.50'
+        self.product.save()
+        self.assertEqual(self.client.get(url).data['unit_price'], '4.50')
+
+    def test_renamed_sku_is_no_longer_found(self):
+        url = reverse('inventory:product-sku-lookup', args=['IOD-10'])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.sku = 'IOD-10B'
+            self.product.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_cached_sku_survives_a_sale_of_another_product(self):
+        iodine = reverse('inventory:product-sku-lookup', args=['IOD-10'])
+        self.client.get(iodine)
+        swabs = Product.objects.get(sku='SWAB-100')
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock({swabs.pk: 5}, reference='sale:1')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(iodine).data['stock_level'], 8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock({self.product.pk: 3}, reference='sale:2')
+        self.assertEqual(self.client.get(iodine).data['stock_level'], 5)
+
+    def test_batch_lookup(self):
+        response = self.client.get(
+            reverse('inventory:product-sku-batch-lookup'), {'skus': 'SWAB-100,nope-2,iod-10,SWAB-100'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['sku'] for product in response.data['products']], ['SWAB-100', 'IOD-10'])
+        self.assertEqual(response.data['missing'], ['NOPE-2'])
+
+
+class ProductTransferTests(APITestCase):
+    """
+    Tests for bulk product import and export.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(username='formulary', password='secret', role='admin')
+        cls.category = Category.objects.create(name='Antimalarials', description='Malaria')
+        cls.existing = Product.objects.create(
+            category=cls.category, name='Coartem', sku='COART-20', unit_price='5.00', stock_level=30
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def import_file(self, name, content):
+        upload = SimpleUploadedFile(name, content if isinstance(content, bytes) else content.encode())
+        return self.client.post(reverse('inventory:product-import'), {'file': upload}, format='multipart')
+
+    def test_csv_import_upserts_and_reports_row_errors(self):
+        content = (
+            'sku,name,description,category,unit_price,stock_level,reorder_point,is_active\n'
+            f'coart-20,Coartem 20/120,Artemether,{self.category.pk},5.50,999,,true\n'
+            f'QUIN-300,Quinine 300mg,,{self.category.pk},2.00,40,5,\n'
+            f'BAD,Too short,,{self.category.pk},1.00,1,,\n'
+            'NOCAT-1,Orphan,,999999,1.00,1,,\n'
+            f'QUIN-300,Duplicate,,{self.category.pk},2.00,1,,\n'
+        )
+        response = self.import_file('formulary.csv', content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertEqual(sorted(error['line'] for error in response.data['errors']), [4, 5, 6])
+
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, 'Coartem 20/120')
+        self.assertEqual(str(self.existing.unit_price), '5.50')
+        self.assertEqual(self.existing.stock_level, 30)
+
+        quinine = Product.objects.get(sku='QUIN-300')
+        self.assertEqual((quinine.stock_level, quinine.reorder_point), (40, 5))
+        self.assertEqual(stock_at(quinine, timezone.now()), 40)
+
+    def test_non_utf8_file_is_rejected(self):
+        content = (
+            'sku,name,description,category,unit_price,stock_level,reorder_point,is_active\n'
+            f'PARA-500,Paracétamol 500mg,,{self.category.pk},0.40,100,,\n'
+        ).encode('latin-1')
+        response = self.import_file('formulary.csv', content)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 0))
+        self.assertIn('UTF-8', response.data['errors'][0]['errors']['row'][0])
+        self.assertFalse(Product.objects.filter(sku='PARA-500').exists())
+
+    def test_unreadable_tail_is_reported_after_earlier_chunks(self):
+        rows = [
+            json.dumps({'sku': f'ART-{i}', 'name': 'Artesunate', 'category': self.category.pk, 'unit_price': '1.00'})
+            for i in range(300)
+        ]
+        content = ('\n'.join(rows) + '\n').encode() + 'Artésunate\n'.encode('latin-1')
+        upload = SimpleUploadedFile('formulary.jsonl', content)
+        summary = import_products(upload.file, 'jsonl', chunk_size=50)
+        # Decoding runs a block ahead, so rows sharing a block with the bad
+        # byte are skipped too; everything read before them is kept.
+        self.assertGreater(summary['created'], 0)
+        self.assertEqual(len(summary['errors']), 1)
+        self.assertEqual(summary['errors'][0]['line'], summary['created'] + 1)
+        self.assertEqual(Product.objects.filter(sku__startswith='ART-').count(), summary['created'])
+
+    def test_jsonl_import_via_command(self):
+        path = os.path.join(tempfile.mkdtemp(), 'formulary.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w') as jsonl:
+            jsonl.write(json.dumps({
+                'sku': 'PRIM-15', 'name': 'Primaquine', 'category': self.category.pk, 'unit_price': '3.00',
+            }) + '\n')
+            jsonl.write('not json\n')
+        out, err = StringIO(), StringIO()
+        call_command('import_products', path, stdout=out, stderr=err)
+        self.assertIn('Created 1 products, updated 0, 1 rows rejected.', out.getvalue())
+        self.assertTrue(Product.objects.filter(sku='PRIM-15').exists())
+
+    def test_export_streams_importable_rows(self):
+        response = self.client.get(reverse('inventory:product-export'), {'file_format': 'jsonl'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [{
+            'sku': 'COART-20', 'name': 'Coartem', 'description': '', 'category': self.category.pk,
+            'unit_price': '5.00', 'stock_level': 30, 'reorder_point': 10, 'is_active': True,
+        }])
+
+        response = self.client.get(reverse('inventory:product-export'))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'sku,name,description,category'))
+
+
+class BulkStockAdjustmentTests(APITestCase):
+    """
+    Tests for applying a stock-take to many products at once.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='stocktaker', password='secret')
+        category = Category.objects.create(name='Consumables', description='Ward consumables')
+        cls.products = Product.objects.bulk_create([
+            Product(
+                category=category, name=f'Item {i}', sku=f'ITEM-{i:03d}', unit_price='1.00',
+                stock_level=20, reorder_point=10,
+            )
+            for i in range(50)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_stocktake_updates_in_one_statement_and_summarises(self):
+        items = [{'sku': f'item-{i:03d}', 'stock_level': 20 if i % 2 else i} for i in range(50)]
+        items.append({'sku': 'GHOST-1', 'stock_level': 3})
+        url = reverse('inventory:product-bulk-stock-update')
+        # SKU lookup, savepoint, row locks, one CASE update on products and one
+        # on their stock records, one low-stock alert insert, one ledger
+        # insert, release.
+        with self.assertNumQueries(8):
+            response = self.client.post(url, {'items': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Odd items and ITEM-020 were counted at their current level.
+        self.assertEqual((response.data['changed'], response.data['unchanged']), (24, 26))
+        self.assertEqual(response.data['unknown'], ['GHOST-1'])
+        self.assertEqual(
+            [row['sku'] for row in response.data['below_reorder']],
+            [f'ITEM-{i:03d}' for i in range(0, 11, 2)],
+        )
+        self.assertEqual(Product.objects.get(sku='ITEM-004').stock_level, 4)
+        self.assertEqual(
+            StockMovement.objects.filter(reason='ADJUSTMENT', reference=f'stocktake:user:{self.user.pk}').count(),
+            24,
+        )
+
+    def test_product_deleted_before_the_lock_is_unknown(self):
+        def delete_then_set(levels, **kwargs):
+            Product.objects.filter(sku='ITEM-002').delete()
+            return set_stock_levels(levels, **kwargs)
+
+        with mock.patch('products.views.set_stock_levels', side_effect=delete_then_set):
+            response = self.client.post(
+                reverse('inventory:product-bulk-stock-update'),
+                {'items': [{'sku': 'ITEM-001', 'stock_level': 5}, {'sku': 'ITEM-002', 'stock_level': 5}]},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['changed'], response.data['unchanged']), (1, 0))
+        self.assertEqual(response.data['unknown'], ['ITEM-002'])
+
+    def test_duplicate_skus_are_rejected(self):
+        response = self.client.post(
+            reverse('inventory:product-bulk-stock-update'),
+            {'items': [{'sku': 'ITEM-001', 'stock_level': 1}, {'sku': 'item-001', 'stock_level': 2}]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Product.objects.get(sku='ITEM-001').stock_level, 20)
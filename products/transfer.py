@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from categories.models import Category
+from stock.service import PRODUCT, sync_records
+
+from .catalogue import bump_catalogue_version, invalidate_sku_lookups
+from .models import Product, StockMovement
+from .search import update_search_index
+from .serializers import ProductImportRowSerializer
+
+# Columns read on import and written on export, in file order.
+COLUMNS = [
+    'sku', 'name', 'description', 'category', 'unit_price',
+    'stock_level', 'reorder_point', 'is_active',
+]
+
+# Columns an import overwrites on products that already exist. Stock is
+# left alone: it is owned by the stock ledger, not by catalogue files.
+UPDATE_FIELDS = ['name', 'description', 'category', 'unit_price', 'reorder_point', 'is_active', 'updated_at']
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def format_for_name(filename, default='csv'):
+    """
+    Guess the file format from a file name's extension.
+    """
+    if filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def _csv_rows(text):
+    reader = csv.DictReader(text)
+    for row in reader:
+        # Blank cells count as missing so optional columns get their defaults.
+        yield reader.line_num, {key: value for key, value in row.items() if key and value != ''}
+
+
+def _jsonl_rows(text):
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, f"Invalid JSON: {exc.msg}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Each line must be a JSON object."
+
+
+def read_rows(stream, file_format):
+    """
+    Yield ``(line number, row dict)`` pairs from a binary stream.
+
+    Rows are decoded one at a time, so the file is never held in memory.
+    Lines that do not parse are yielded as ``(line number, error)``. A file
+    that is not UTF-8 text, or not valid CSV, yields one error for the line
+    after the last one read and stops there.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    line_number = 0
+    try:
+        for line_number, row in (_csv_rows if file_format == 'csv' else _jsonl_rows)(text):
+            yield line_number, row
+    except UnicodeDecodeError:
+        yield line_number + 1, "File must be UTF-8 encoded text; the rest of the file was skipped."
+    except csv.Error as exc:
+        yield line_number + 1, f"Malformed CSV ({exc}); the rest of the file was skipped."
+
+
+def _import_chunk(rows, reference):
+    """
+    Validate and upsert one chunk of rows.
+
+    Uses a fixed number of queries per chunk: categories are resolved with
+    one ``in_bulk``, rows are written by one ``bulk_create`` with
+    ``update_conflicts`` on ``sku``, and new products get their opening
+    stock recorded in one more ``bulk_create``.
+
+    Returns:
+        tuple: (created count, updated count, list of error dicts)
+    """
+    errors = []
+    valid = {}
+    for line_number, row in rows:
+        if isinstance(row, str):
+            errors.append({'line': line_number, 'sku': None, 'errors': {'row': [row]}})
+            continue
+        serializer = ProductImportRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({'line': line_number, 'sku': row.get('sku'), 'errors': serializer.errors})
+            continue
+        data = serializer.validated_data
+        if data['sku'] in valid:
+            errors.append({
+                'line': line_number, 'sku': data['sku'],
+                'errors': {'sku': ["Duplicate SKU; an earlier line in this chunk already sets it."]},
+            })
+            continue
+        valid[data['sku']] = (line_number, data)
+
+    categories = Category.objects.in_bulk({data['category'] for _, data in valid.values()})
+    for sku, (line_number, data) in list(valid.items()):
+        if data['category'] not in categories:
+            errors.append({'line': line_number, 'sku': sku, 'errors': {'category': ["Unknown category."]}})
+            del valid[sku]
+    if not valid:
+        return 0, 0, errors
+
+    with transaction.atomic():
+        existing = set(Product.objects.filter(sku__in=valid).values_list('sku', flat=True))
+        now = timezone.now()
+        Product.objects.bulk_create(
+            [
+                Product(
+                    sku=sku,
+                    name=data['name'],
+                    description=data['description'],
+                    category_id=data['category'],
+                    unit_price=data['unit_price'],
+                    stock_level=data['stock_level'],
+                    reorder_point=data['reorder_point'],
+                    is_active=data['is_active'],
+                    created_at=now,
+                    updated_at=now,
+                )
+                for sku, (_, data) in valid.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['sku'],
+            update_fields=UPDATE_FIELDS,
+        )
+        product_ids = dict(Product.objects.filter(sku__in=valid).values_list('sku', 'pk'))
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=product_ids[sku],
+                quantity=data['stock_level'],
+                reason='OPENING',
+                reference=reference,
+                created_at=now,
+            )
+            for sku, (_, data) in valid.items()
+            if sku not in existing and data['stock_level']
+        ])
+        sync_records(PRODUCT, product_ids.values())
+        update_search_index(product_ids.values())
+        bump_catalogue_version()
+        invalidate_sku_lookups(valid)
+
+    return len(valid) - len(existing), len(existing), errors
+
+
+def import_products(stream, file_format, chunk_size=DEFAULT_CHUNK_SIZE, reference='import'):
+    """
+    Create or update products from a CSV or JSON Lines stream.
+
+    Rows are read and written one chunk at a time, and each chunk commits
+    on its own, so a bad row only affects itself. Existing products (by
+    SKU) get their catalogue fields updated but keep their stock level;
+    new products start with the file's ``stock_level`` as opening stock.
+
+    Args:
+        stream: Binary file-like object
+        file_format (str): 'csv' or 'jsonl'
+        chunk_size (int): Rows validated and written per batch
+        reference (str): Ledger reference for opening stock
+
+    Returns:
+        dict: ``created`` and ``updated`` counts and per-row ``errors``
+    """
+    summary = {'created': 0, 'updated': 0, 'errors': []}
+    rows = read_rows(stream, file_format)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        created, updated, errors = _import_chunk(chunk, reference)
+        summary['created'] += created
+        summary['updated'] += updated
+        summary['errors'].extend(errors)
+    return summary
+
+
+def export_products(queryset, file_format, batch_size=2000):
+    """
+    Yield a product export chunk by chunk.
+
+    Rows are read with a server-side iterator and encoded as they go, so
+    memory stays flat however large the catalogue is.
+
+    Args:
+        queryset: Products to export
+        file_format (str): 'csv' or 'jsonl'
+        batch_size (int): Rows fetched per database round-trip
+
+    Yields:
+        str: Lines of the export file
+    """
+    rows = queryset.order_by('pk').values_list(
+        'sku', 'name', 'description', 'category_id', 'unit_price',
+        'stock_level', 'reorder_point', 'is_active',
+    ).iterator(chunk_size=batch_size)
+
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    for row in rows:
+        record = dict(zip(COLUMNS, row))
+        record['unit_price'] = str(record['unit_price'])
+        yield json.dumps(record) + '\n'
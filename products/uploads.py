@@ -0,0 +1,227 @@
+import os
+import zipfile
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+
+from jobs.registry import enqueue_many
+
+from .blobs import discard_blobs, retain_blobs
+from .catalogue import bump_catalogue_version
+from .lookup import normalize_sku
+from .models import Product, ProductImage
+
+# Most images accepted by one bulk upload, largest single file in an archive,
+# and most bytes an archive may unpack to.
+BULK_UPLOAD_MAX_FILES = 500
+ARCHIVE_ENTRY_MAX_SIZE = 20 * 1024 * 1024
+ARCHIVE_MAX_SIZE = 500 * 1024 * 1024
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+
+
+def sku_for_entry(name):
+    """
+    Work out the SKU an archive entry belongs to.
+
+    Entries are keyed by their top-level folder (``SKU/front.jpg``) or, at
+    the archive root, by their file name (``SKU.jpg``).
+    """
+    parts = name.split('/')
+    if len(parts) > 1:
+        return normalize_sku(parts[0])
+    return normalize_sku(os.path.splitext(parts[0])[0])
+
+
+class ArchiveTooLarge(Exception):
+    """
+    Raised when an archive holds more images, or unpacks to more bytes,
+    than one bulk upload accepts.
+    """
+
+
+def _copy_entry(source, target, size):
+    """
+    Copy an archive entry, refusing to write more than its declared size.
+    """
+    left = size
+    while True:
+        chunk = source.read(min(COPY_CHUNK_SIZE, left + 1))
+        if not chunk:
+            return
+        left -= len(chunk)
+        if left < 0:
+            raise zipfile.BadZipFile("Archive entry is larger than its declared size.")
+        target.write(chunk)
+
+
+def archive_entries(archive, max_files=BULK_UPLOAD_MAX_FILES):
+    """
+    Unpack the images in a zip archive to temporary files on disk.
+
+    The archive's directory is checked first: nothing is extracted when it
+    lists more images than ``max_files`` or more than ``ARCHIVE_MAX_SIZE``
+    bytes of them. Each entry is then streamed to its own temporary file so
+    neither the archive nor its images are held in memory.
+
+    Args:
+        archive: Uploaded zip file
+        max_files (int): Most images the archive may hold
+
+    Returns:
+        tuple: (list of (sku, TemporaryUploadedFile), list of error dicts)
+
+    Raises:
+        zipfile.BadZipFile: If the upload is not a valid zip archive
+        ArchiveTooLarge: If the archive holds too many or too large images
+    """
+    entries, errors = [], []
+    with zipfile.ZipFile(archive) as bundle:
+        for entry in bundle.infolist():
+            name = entry.filename
+            if entry.is_dir() or name.startswith('__MACOSX/') or os.path.basename(name).startswith('.'):
+                continue
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                errors.append({'file': name, 'error': "Not an image file."})
+                continue
+            if entry.file_size > ARCHIVE_ENTRY_MAX_SIZE:
+                errors.append({'file': name, 'error': "File is too large."})
+                continue
+            entries.append(entry)
+        if len(entries) > max_files:
+            raise ArchiveTooLarge(f"At most {BULK_UPLOAD_MAX_FILES} images can be uploaded at once.")
+        if sum(entry.file_size for entry in entries) > ARCHIVE_MAX_SIZE:
+            raise ArchiveTooLarge(f"archive must unpack to at most {ARCHIVE_MAX_SIZE // (1024 * 1024)} MB.")
+
+        uploads = []
+        try:
+            for entry in entries:
+                upload = TemporaryUploadedFile(
+                    os.path.basename(entry.filename), 'application/octet-stream', entry.file_size, None
+                )
+                uploads.append((sku_for_entry(entry.filename), upload))
+                with bundle.open(entry) as source:
+                    _copy_entry(source, upload.file, entry.file_size)
+                upload.file.seek(0)
+        except BaseException:
+            for _, upload in uploads:
+                upload.close()
+            raise
+    return uploads, errors
+
+
+def assign_default_images(product_ids):
+    """
+    Touch the listed products after their images changed and give each one
+    without a default image its earliest image, in one UPDATE.
+
+    Returns:
+        int: Number of products updated
+    """
+    first_image = ProductImage.objects.filter(product=OuterRef('pk')).order_by('uploaded_at', 'pk')
+    bump_catalogue_version()
+    return Product.objects.filter(pk__in=product_ids).update(
+        default_image=Coalesce(F('default_image'), Subquery(first_image.values('pk')[:1])),
+        updated_at=timezone.now(),
+    )
+
+
+def _lock_with_image_counts(skus):
+    """
+    Lock the products with the given SKUs and count their images in one query.
+
+    The count is a correlated subquery rather than a GROUP BY so the row
+    lock can be taken in the same statement.
+    """
+    image_count = (
+        ProductImage.objects.filter(product=OuterRef('pk'))
+        .order_by()
+        .values('product')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return {
+        product.sku: product
+        for product in Product.objects.select_for_update(of=('self',))
+        .filter(sku__in=skus)
+        .only('pk', 'sku')
+        .annotate(image_count=Coalesce(Subquery(image_count, output_field=IntegerField()), Value(0)))
+        .order_by('pk')
+    }
+
+
+def save_bulk_images(uploads, created_by=None):
+    """
+    Validate and store images for many products at once.
+
+    Costs a fixed number of queries however many products are involved:
+    one to lock the products and count their images, one ``bulk_create``
+    for the images, three to record their stored files, one UPDATE for
+    default images and one ``bulk_create`` for the processing jobs. Files beyond a product's
+    ``ProductImage.MAX_IMAGES`` limit are rejected, not stored, and files
+    stored before a failure are deleted again once the transaction has
+    rolled back.
+
+    Args:
+        uploads (list): (sku, uploaded file) pairs; SKUs are normalized here
+        created_by: User the processing jobs are queued for
+
+    Returns:
+        tuple: (list of created dicts, list of error dicts)
+    """
+    errors = []
+    by_sku = defaultdict(list)
+    image_field = serializers.ImageField()
+    for sku, upload in uploads:
+        sku = normalize_sku(sku)
+        try:
+            by_sku[sku].append(image_field.run_validation(upload))
+        except serializers.ValidationError as exc:
+            errors.append({'sku': sku, 'file': upload.name, 'error': ' '.join(exc.detail)})
+        except DjangoValidationError as exc:
+            errors.append({'sku': sku, 'file': upload.name, 'error': ' '.join(exc.messages)})
+
+    images = []
+    try:
+        with transaction.atomic():
+            products = _lock_with_image_counts(by_sku)
+            for sku, files in by_sku.items():
+                product = products.get(sku)
+                if product is None:
+                    errors.extend({'sku': sku, 'file': f.name, 'error': "Unknown SKU."} for f in files)
+                    continue
+                room = max(ProductImage.MAX_IMAGES - product.image_count, 0)
+                images.extend(ProductImage(product=product, image=f) for f in files[:room])
+                errors.extend(
+                    {
+                        'sku': sku,
+                        'file': f.name,
+                        'error': f"Product can have a maximum of {ProductImage.MAX_IMAGES} images.",
+                    }
+                    for f in files[room:]
+                )
+
+            images = ProductImage.objects.bulk_create(images)
+            retain_blobs(image.image.name for image in images)
+            assign_default_images({image.product_id for image in images})
+            jobs = enqueue_many(
+                'products.process_image', [{'image_id': image.pk} for image in images], created_by=created_by
+            )
+    except BaseException:
+        # bulk_create stored the files before the rows were rolled back.
+        discard_blobs(image.image.name for image in images if image.image._committed)
+        raise
+
+    created = [
+        {'sku': image.product.sku, 'image_id': image.pk, 'job_id': job.pk}
+        for image, job in zip(images, jobs)
+    ]
+    return created, errors
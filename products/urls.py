@@ -3,7 +3,13 @@ from .views import (
     ProductListCreateView,
     ProductDetailView,
     ProductStockUpdateView,
-    ProductImageCreateView
+    ProductImageCreateView,
+    ProductImageBulkCreateView,
+    ProductSkuLookupView,
+    ProductSkuBatchLookupView,
+    ProductImportView,
+    ProductExportView,
+    ProductBulkStockUpdateView
 )
 
 app_name = 'inventory'
@@ -12,5 +18,11 @@ urlpatterns = [
     path('', ProductListCreateView.as_view(), name='product-list-create'),
     path('<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
     path('<int:pk>/stock/', ProductStockUpdateView.as_view(), name='product-stock-update'),
+    path('stock/bulk/', ProductBulkStockUpdateView.as_view(), name='product-bulk-stock-update'),
+    path('import/', ProductImportView.as_view(), name='product-import'),
+    path('export/', ProductExportView.as_view(), name='product-export'),
+    path('by-sku/', ProductSkuBatchLookupView.as_view(), name='product-sku-batch-lookup'),
+    path('by-sku/<str:sku>/', ProductSkuLookupView.as_view(), name='product-sku-lookup'),
+    path('images/bulk/', ProductImageBulkCreateView.as_view(), name='product-image-bulk-create'),
     path('<int:pk>/images/', ProductImageCreateView.as_view(), name='product-image-create'),
 ]
\ No newline at end of file
@@ -1,38 +1,109 @@
 # ```python
-from rest_framework import status
+import zipfile
+from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Category, Product, ProductImage
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from jobs.registry import enqueue
+from permissions.permissions import IsAdminUser, IsStaffUser
+from versioning.versions import make_etag, table_version
+from .models import Category, Product
 from .serializers import (
     ProductSerializer,
+    ProductCardSerializer,
     ProductStockUpdateSerializer,
-    ProductImageSerializer
+    ProductImageSerializer,
+    BulkStockAdjustmentSerializer
 )
+from .catalogue import cached_read
+from .lookup import lookup_skus, normalize_sku
+from .pagination import ProductCursorPagination, ProductSearchPagination
+from .search import search_products
+from .transfer import FORMATS, export_products, format_for_name, import_products
+from .stock import set_stock_level, set_stock_levels
+from .uploads import BULK_UPLOAD_MAX_FILES, ArchiveTooLarge, archive_entries, save_bulk_images
+
+
+def get_product_representation(request):
+    """
+    Resolve the serializer class and fields requested by the client.
+
+    Supports query parameters:
+    - view: 'card' for the compact ProductCardSerializer
+    - fields: Comma-separated list of fields to include
+
+    Args:
+        request: HTTP request object
+
+    Returns:
+        tuple: (serializer class, list of field names to serialize)
+
+    Raises:
+        serializers.ValidationError: If ``fields`` names a field the
+            representation does not have (answered with a 400)
+    """
+    serializer_class = ProductSerializer
+    if request.query_params.get('view') == 'card':
+        serializer_class = ProductCardSerializer
+
+    field_names = list(serializer_class.Meta.fields)
+    requested = request.query_params.get('fields')
+    if requested:
+        wanted = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in dict.fromkeys(wanted) if name not in field_names]
+        if unknown:
+            raise serializers.ValidationError({'fields': [f"Unknown fields: {', '.join(unknown)}"]})
+        field_names = [name for name in field_names if name in wanted]
+    return serializer_class, field_names
+
 
 class ProductListCreateView(APIView):
     """
     API view for listing all products and creating new ones.
     
-    GET: List all products
+    GET: List products, one cursor page at a time
     POST: Create a new product
     """
     
     def get(self, request):
         """
-        List all products with optional filtering.
+        List products with optional filtering and cursor pagination.
         
         Supports query parameters:
+        - q: Search name, SKU, description and category name; results are
+          ranked by relevance and paged by number (``page``) instead of cursor
         - category: Filter by category ID
         - needs_reorder: Filter products that need reordering (true/false)
+        - cursor: Opaque cursor taken from the previous page's next/previous link
+        - page_size: Number of products per page (default 50, max 500)
+        - view: 'card' for the compact representation
+        - fields: Comma-separated list of fields to include
+        
+        Pages are served from the catalogue cache when possible; the
+        ``X-Cache`` header says whether this response was a hit.
         
         Args:
             request: HTTP request object
             
         Returns:
-            Response: JSON response with filtered products
+            Response: JSON response with a page of filtered products
         """
-        products = Product.objects.all()
+        response, hit = cached_read(request, 'list', lambda: self.list_products(request))
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    def list_products(self, request):
+        """
+        Build a page of products from the database.
+        """
+        serializer_class, field_names = get_product_representation(request)
+        products = Product.objects.for_fields(field_names)
 
         category_id = request.query_params.get('category')
         if category_id:
@@ -41,12 +112,21 @@ class ProductListCreateView(APIView):
         needs_reorder = request.query_params.get('needs_reorder')
         if needs_reorder:
             if needs_reorder.lower() == 'true':
-                products = [p for p in products if p.needs_reorder]
+                products = products.needs_reorder()
             elif needs_reorder.lower() == 'false':
-                products = [p for p in products if not p.needs_reorder]
+                products = products.needs_reorder(False)
         
-        serializer = ProductSerializer(products, many=True, context={'request': request})
-        return Response(serializer.data)
+        q = request.query_params.get('q', '').strip()
+        if q:
+            products = search_products(products, q)
+            paginator = ProductSearchPagination()
+        else:
+            paginator = ProductCursorPagination()
+        page = paginator.paginate_queryset(products, request, view=self)
+        serializer = serializer_class(
+            page, many=True, fields=field_names, context={'request': request}
+        )
+        return paginator.get_paginated_response(serializer.data)
     
     def post(self, request):
         """
@@ -70,6 +150,45 @@ class ProductListCreateView(APIView):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+def product_validators(request, pk):
+    """
+    Return what a product's detail representation depends on.
+
+    The product's ``updated_at`` covers its own fields and its images
+    (image changes touch the product); the categories table version covers
+    the nested category name. Looked up once per request.
+
+    Returns:
+        tuple: (updated_at, category version, category updated_at), or None
+            if the product does not exist
+    """
+    if not hasattr(request, '_product_validators'):
+        updated_at = Product.objects.filter(pk=pk).order_by('pk').values_list('updated_at', flat=True).first()
+        request._product_validators = (
+            (updated_at, *table_version('categories.category')) if updated_at else None
+        )
+    return request._product_validators
+
+
+def product_detail_etag(request, pk):
+    validators = product_validators(request, pk)
+    if validators is None:
+        return None
+    return make_etag(pk, *validators, request.get_host(), request.META.get('QUERY_STRING', ''))
+
+
+def product_detail_last_modified(request, pk):
+    validators = product_validators(request, pk)
+    if validators is None:
+        return None
+    updated_at, _, category_updated_at = validators
+    return max(updated_at, category_updated_at) if category_updated_at else updated_at
+
+
+@method_decorator(
+    condition(etag_func=product_detail_etag, last_modified_func=product_detail_last_modified),
+    name='get',
+)
 class ProductDetailView(APIView):
     """
     API view for retrieving, updating, and deleting a specific product.
@@ -79,12 +198,13 @@ class ProductDetailView(APIView):
     DELETE: Delete a product
     """
     
-    def get_object(self, pk):
+    def get_object(self, pk, queryset=None):
         """
         Helper method to get product object with given primary key.
         
         Args:
             pk: Primary key of the product
+            queryset: Optional Product queryset to look the product up in
             
         Returns:
             Product: The product object
@@ -92,21 +212,36 @@ class ProductDetailView(APIView):
         Raises:
             Http404: If product does not exist
         """
-        return get_object_or_404(Product, pk=pk)
+        return get_object_or_404(queryset if queryset is not None else Product, pk=pk)
     
     def get(self, request, pk):
         """
         Retrieve a product.
+
+        Supports the same ``view`` and ``fields`` query parameters as the
+        product listing. Responses carry ETag and Last-Modified headers, and
+        a matching ``If-None-Match`` or ``If-Modified-Since`` returns 304
+        without loading or serializing the product. Otherwise the body is
+        served from the catalogue cache when possible.
         
         Args:
             request: HTTP request object
             pk: Primary key of the product
             
         Returns:
-            Response: JSON response with product data
+            Response: JSON response with product data, or 304 Not Modified
         """
-        product = self.get_object(pk)
-        serializer = ProductSerializer(product, context={'request': request})
+        response, hit = cached_read(request, f'detail:{pk}', lambda: self.retrieve(request, pk))
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    def retrieve(self, request, pk):
+        """
+        Build a product's representation from the database.
+        """
+        serializer_class, field_names = get_product_representation(request)
+        product = self.get_object(pk, Product.objects.for_fields(field_names))
+        serializer = serializer_class(product, fields=field_names, context={'request': request})
         return Response(serializer.data)
     
     def put(self, request, pk):
@@ -123,7 +258,10 @@ class ProductDetailView(APIView):
         product = self.get_object(pk)
         serializer = ProductSerializer(product, data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            try:
+                serializer.save()
+            except Product.DoesNotExist:
+                return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
             return Response(serializer.data)
         return Response(
             serializer.errors, 
@@ -170,6 +308,8 @@ class ProductStockUpdateView(APIView):
     def patch(self, request, pk):
         """
         Update a product's stock level.
+
+        The difference is recorded in the stock ledger as a manual adjustment.
         
         Args:
             request: HTTP request object with stock level data
@@ -181,13 +321,83 @@ class ProductStockUpdateView(APIView):
         product = self.get_object(pk)
         serializer = ProductStockUpdateSerializer(product, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            if 'stock_level' in serializer.validated_data:
+                try:
+                    set_stock_level(
+                        product,
+                        serializer.validated_data['stock_level'],
+                        reference=f'user:{request.user.pk}'
+                    )
+                except Product.DoesNotExist:
+                    return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
             return Response(ProductSerializer(product, context={'request': request}).data)
         return Response(
             serializer.errors, 
             status=status.HTTP_400_BAD_REQUEST
         )
 
+class ProductBulkStockUpdateView(APIView):
+    """
+    API view for applying a stock-take to many products at once.
+
+    POST: Set counted stock levels by SKU
+    """
+
+    def post(self, request):
+        """
+        Set the stock level of many products in one transaction.
+
+        Expects ``{"items": [{"sku": ..., "stock_level": ...}, ...]}`` and an
+        optional ``reference`` recorded in the stock ledger. Unknown SKUs
+        are reported and skipped; every other product is updated.
+
+        Args:
+            request: HTTP request object with the counted levels
+
+        Returns:
+            Response: JSON summary of changed, unchanged, unknown and
+                below-reorder products, or validation errors
+        """
+        serializer = BulkStockAdjustmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        counted = {item['sku']: item['stock_level'] for item in serializer.validated_data['items']}
+        product_ids = dict(Product.objects.filter(sku__in=counted).values_list('sku', 'pk'))
+        reference = serializer.validated_data['reference'] or f'stocktake:user:{request.user.pk}'
+        results = set_stock_levels(
+            {product_ids[sku]: level for sku, level in counted.items() if sku in product_ids},
+            reference=reference,
+        )
+
+        # A product deleted between the SKU lookup and the lock is not in
+        # the results; report it as unknown rather than as counted.
+        locked = {product.pk for product, _ in results}
+        changes = [
+            {'sku': product.sku, 'previous': previous, 'stock_level': product.stock_level}
+            for product, previous in results
+            if product.stock_level != previous
+        ]
+        return Response(
+            {
+                'changed': len(changes),
+                'unchanged': len(results) - len(changes),
+                'unknown': [sku for sku in counted if product_ids.get(sku) not in locked],
+                'changes': changes,
+                'below_reorder': [
+                    {
+                        'sku': product.sku,
+                        'stock_level': product.stock_level,
+                        'reorder_point': product.reorder_point,
+                    }
+                    for product, _ in results
+                    if product.stock_level <= product.reorder_point
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 class ProductImageCreateView(APIView):
     """
     API view for uploading images for a specific product.
@@ -213,20 +423,261 @@ class ProductImageCreateView(APIView):
     def post(self, request, pk):
         """
         Upload a new image for a product.
+
+        The original is stored straight away; EXIF stripping, resized
+        WebP/JPEG derivatives and default-image selection run as a
+        background job, which can be polled at ``status_url``.
         
         Args:
             request: HTTP request object with image data
             pk: Primary key of the product
             
         Returns:
-            Response: JSON response with uploaded image or error messages
+            Response: 202 with the uploaded image and its processing job,
+                or error messages
         """
         product = self.get_object(pk)
         serializer = ProductImageSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(product=product)
-            if not product.default_image:
-                product.default_image = ProductImage.objects.filter(product=product).first()
-                product.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            with transaction.atomic():
+                image = serializer.save(product=product)
+                job = enqueue('products.process_image', image_id=image.pk, created_by=request.user)
+            return Response(
+                {
+                    'image': serializer.data,
+                    'job_id': job.pk,
+                    'status_url': request.build_absolute_uri(reverse('jobs:job-detail', args=[job.pk])),
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ProductImageBulkCreateView(APIView):
+    """
+    API view for uploading images for many products in one request.
+
+    POST: Upload images keyed by SKU
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        """
+        Spool every uploaded file to disk instead of holding small ones in memory.
+        """
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def post(self, request):
+        """
+        Upload images for many products at once.
+
+        Accepts either multipart file fields named after product SKUs (a SKU
+        may be repeated) or a zip file in the ``archive`` field whose
+        entries are keyed by folder (``SKU/front.jpg``) or file name
+        (``SKU.jpg``). Each product keeps at most four images; extra files
+        are reported in ``errors``. Images without a default get one
+        immediately, and derivatives are built by background jobs.
+
+        Args:
+            request: HTTP request object with the files
+
+        Returns:
+            Response: 202 with the created images and their jobs plus
+                per-file errors, or 400 if nothing usable was uploaded
+        """
+        errors = []
+        uploads = [
+            (sku, upload)
+            for sku in request.FILES
+            if sku != 'archive'
+            for upload in request.FILES.getlist(sku)
+        ]
+        extracted = []
+        try:
+            if 'archive' in request.FILES:
+                try:
+                    extracted, errors = archive_entries(
+                        request.FILES['archive'], max_files=BULK_UPLOAD_MAX_FILES - len(uploads)
+                    )
+                except zipfile.BadZipFile:
+                    return Response(
+                        {"error": "archive must be a zip file."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                except ArchiveTooLarge as exc:
+                    return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+                uploads.extend(extracted)
+
+            if not uploads:
+                return Response(
+                    {"error": "No images were uploaded.", "errors": errors},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if len(uploads) > BULK_UPLOAD_MAX_FILES:
+                return Response(
+                    {"error": f"At most {BULK_UPLOAD_MAX_FILES} images can be uploaded at once."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            created, rejected = save_bulk_images(uploads, created_by=request.user)
+        finally:
+            for _, upload in extracted:
+                upload.close()
+
+        return Response(
+            {'created': created, 'errors': errors + rejected},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ProductSkuLookupView(APIView):
+    """
+    API view for resolving a single scanned SKU.
+
+    GET: Retrieve the card representation of the product with a SKU
+    """
+
+    def get(self, request, sku):
+        """
+        Look up a product by SKU.
+
+        Served from an in-process LRU when the catalogue has not changed
+        since the SKU was last resolved.
+
+        Args:
+            request: HTTP request object
+            sku: SKU as scanned; matched case-insensitively
+
+        Returns:
+            Response: JSON response with the product card, or 404
+        """
+        product = lookup_skus([sku]).get(normalize_sku(sku))
+        if product is None:
+            return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(product, status=status.HTTP_200_OK)
+
+
+class ProductSkuBatchLookupView(APIView):
+    """
+    API view for resolving many scanned SKUs at once.
+
+    GET: Retrieve the product cards for a comma-separated list of SKUs
+    """
+    max_skus = 200
+
+    def get(self, request):
+        """
+        Look up several products by SKU.
+
+        Supports query parameters:
+        - skus: Comma-separated SKUs (at most 200)
+
+        Args:
+            request: HTTP request object
+
+        Returns:
+            Response: JSON response with the found products, in request
+                order, and the SKUs that matched nothing
+        """
+        skus = [sku for sku in request.query_params.get('skus', '').split(',') if sku.strip()]
+        if not skus:
+            return Response({"error": "skus is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(skus) > self.max_skus:
+            return Response(
+                {"error": f"At most {self.max_skus} SKUs can be looked up at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        found = lookup_skus(skus)
+        wanted = list(dict.fromkeys(normalize_sku(sku) for sku in skus))
+        return Response(
+            {
+                'products': [found[sku] for sku in wanted if sku in found],
+                'missing': [sku for sku in wanted if sku not in found],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ProductImportView(APIView):
+    """
+    API view for creating and updating products from a CSV or JSON Lines file.
+
+    POST: Import a product file
+    """
+    permission_classes = [IsAdminUser]
+
+    def initialize_request(self, request, *args, **kwargs):
+        """
+        Spool the uploaded file to disk instead of holding it in memory.
+        """
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def post(self, request):
+        """
+        Import products in chunks.
+
+        Expects a multipart ``file`` with the columns sku, name,
+        description, category (ID), unit_price, stock_level, reorder_point
+        and is_active. ``file_format`` ('csv' or 'jsonl') defaults to the
+        file's extension. Products are matched on SKU; existing ones keep
+        their stock level.
+
+        Args:
+            request: HTTP request object with the file
+
+        Returns:
+            Response: JSON response with created/updated counts and per-row
+                errors, with status 400 if no row could be imported
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('file_format') or format_for_name(upload.name)
+        if file_format not in FORMATS:
+            return Response(
+                {"error": f"file_format must be one of: {', '.join(FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        summary = import_products(upload.file, file_format, reference=f'import:user:{request.user.pk}')
+        if summary['errors'] and not (summary['created'] or summary['updated']):
+            return Response(summary, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+class ProductExportView(APIView):
+    """
+    API view for downloading the product catalogue.
+
+    GET: Stream all products as CSV or JSON Lines
+    """
+    permission_classes = [IsStaffUser]
+    content_types = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+    def get(self, request):
+        """
+        Stream the catalogue in the same columns the import accepts.
+
+        Supports query parameters:
+        - file_format: 'csv' (default) or 'jsonl'
+
+        Args:
+            request: HTTP request object
+
+        Returns:
+            StreamingHttpResponse: The export, generated row by row
+        """
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            return Response(
+                {"error": f"file_format must be one of: {', '.join(FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        response = StreamingHttpResponse(
+            export_products(Product.objects.all(), file_format),
+            content_type=self.content_types[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{file_format}"'
+        return response
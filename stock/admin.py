@@ -0,0 +1,7 @@
+from django.contrib import admin
+from .models import LowStockAlert, StockRecord
+
+# Register your models here.
+
+admin.site.register(StockRecord)
+admin.site.register(LowStockAlert)
@@ -0,0 +1,136 @@
+import json
+from urllib import request as urllib_request
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LowStockAlert
+
+
+def low_stock_alert(kind, source, quantity, reorder_point):
+    """
+    Build the alert for a product or item left at ``quantity``.
+    """
+    return LowStockAlert(
+        kind=kind,
+        ref_id=source.pk,
+        sku=getattr(source, 'sku', ''),
+        name=source.name,
+        quantity=quantity,
+        reorder_point=reorder_point,
+        day=timezone.localdate(),
+    )
+
+
+def queue_alerts(alerts):
+    """
+    Queue alerts, keeping only the first per product or item per day.
+
+    Costs one ``INSERT ... ON CONFLICT DO NOTHING``, and no query at all
+    when there is nothing to queue.
+    """
+    if alerts:
+        LowStockAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+
+
+def delivery_configured():
+    """
+    Whether any digest channel is configured.
+    """
+    return bool(settings.STOCK_ALERT_EMAILS or settings.STOCK_ALERT_WEBHOOK_URL)
+
+
+def build_digest(alerts):
+    """
+    Summarise alerts as a JSON-serializable digest.
+    """
+    return {
+        'generated_at': timezone.now(),
+        'count': len(alerts),
+        'alerts': [
+            {
+                'kind': alert.kind,
+                'id': alert.ref_id,
+                'sku': alert.sku,
+                'name': alert.name,
+                'quantity': alert.quantity,
+                'reorder_point': alert.reorder_point,
+                'day': alert.day,
+                'raised_at': alert.created_at,
+            }
+            for alert in alerts
+        ],
+    }
+
+
+def digest_text(digest):
+    """
+    Plain-text body of a digest e-mail.
+    """
+    lines = [f"{digest['count']} products or items are at or below their reorder point:", ""]
+    for alert in digest['alerts']:
+        label = alert['sku'] or f"{alert['kind']} {alert['id']}"
+        lines.append(
+            f"- {alert['name']} ({label}): {alert['quantity']} left, reorder point {alert['reorder_point']}"
+        )
+    return "\n".join(lines)
+
+
+def send_digest(digest):
+    """
+    Deliver a digest to every configured channel.
+
+    Raises:
+        Exception: Whatever the mail backend or webhook raised; the caller
+            keeps the alerts queued in that case
+    """
+    if settings.STOCK_ALERT_EMAILS:
+        send_mail(
+            subject=f"Low stock: {digest['count']} alerts",
+            message=digest_text(digest),
+            from_email=None,
+            recipient_list=settings.STOCK_ALERT_EMAILS,
+        )
+    if settings.STOCK_ALERT_WEBHOOK_URL:
+        body = json.dumps(digest, cls=DjangoJSONEncoder).encode()
+        webhook = urllib_request.Request(
+            settings.STOCK_ALERT_WEBHOOK_URL,
+            data=body,
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        with urllib_request.urlopen(webhook, timeout=settings.STOCK_ALERT_WEBHOOK_TIMEOUT):
+            pass
+
+
+def deliver_pending(limit=None):
+    """
+    Send the oldest pending alerts as one digest and mark them notified.
+
+    Alerts are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+    several consumers never send the same alert. If delivery fails the
+    transaction rolls back and the alerts are picked up again later.
+
+    Args:
+        limit (int): Most alerts to send, defaults to STOCK_ALERT_DIGEST_SIZE
+
+    Returns:
+        int: Number of alerts sent
+    """
+    limit = limit or settings.STOCK_ALERT_DIGEST_SIZE
+    with transaction.atomic():
+        alerts = list(
+            LowStockAlert.objects.select_for_update(skip_locked=True)
+            .filter(notified_at__isnull=True)
+            .order_by('created_at', 'pk')[:limit]
+        )
+        if not alerts:
+            return 0
+        send_digest(build_digest(alerts))
+        LowStockAlert.objects.filter(pk__in=[alert.pk for alert in alerts]).update(
+            notified_at=timezone.now()
+        )
+    return len(alerts)
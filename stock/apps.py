@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class StockConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'stock'
+
+    def ready(self):
+        from .signals import connect_stock_sources
+        connect_stock_sources()
@@ -0,0 +1,115 @@
+import random
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from categories.models import Category
+from inventory.models import Item
+from products.models import Product
+from stock.service import ITEM, PRODUCT, category_totals, check_stock, save_records
+
+
+class Command(BaseCommand):
+    """
+    Benchmark stock checks against the source tables versus the shared
+    stock table.
+
+    Everything runs inside a transaction that is rolled back at the end,
+    so the benchmark leaves no data behind.
+    """
+    help = "Report queries and latency of stock checks before and after the shared stock table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=5000,
+            help="Number of products and of inventory items to create."
+        )
+        parser.add_argument(
+            '--check-size', type=int, default=50,
+            help="Products and items requested per stock check."
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help="Number of runs timed per case."
+        )
+
+    def handle(self, *args, **options):
+        rows, size = options['rows'], options['check_size']
+
+        with transaction.atomic():
+            categories = Category.objects.bulk_create([
+                Category(name=f'Benchmark category {i}', description='') for i in range(20)
+            ])
+            products = Product.objects.bulk_create([
+                Product(
+                    category=categories[i % 20],
+                    name=f'Benchmark product {i:06d}',
+                    sku=f'BENCH-STOCK-{i:06d}',
+                    unit_price='1.00',
+                    stock_level=i % 100,
+                )
+                for i in range(rows)
+            ])
+            items = Item.objects.bulk_create([
+                Item(name=f'Benchmark item {i:06d}', category=categories[i % 20], quantity=i % 100)
+                for i in range(rows)
+            ])
+            save_records(PRODUCT, products, overwrite_quantity=True)
+            save_records(ITEM, items, overwrite_quantity=True)
+            product_ids = [product.pk for product in products]
+            item_ids = [item.pk for item in items]
+
+            def request():
+                return (
+                    {pk: 50 for pk in random.sample(product_ids, size)},
+                    {pk: 50 for pk in random.sample(item_ids, size)},
+                )
+
+            def check_before(wanted_products, wanted_items):
+                levels = dict(Product.objects.filter(pk__in=wanted_products).values_list('pk', 'stock_level'))
+                quantities = dict(Item.objects.filter(pk__in=wanted_items).values_list('pk', 'quantity'))
+                return (
+                    [pk for pk, n in wanted_products.items() if levels.get(pk, 0) < n],
+                    [pk for pk, n in wanted_items.items() if quantities.get(pk, 0) < n],
+                )
+
+            def check_after(wanted_products, wanted_items):
+                return check_stock(wanted_products, wanted_items)
+
+            def categories_before():
+                totals = defaultdict(lambda: [0, 0])
+                for category_id, level in Product.objects.values_list('category_id', 'stock_level'):
+                    totals[category_id][0] += level
+                for category_id, quantity in Item.objects.values_list('category_id', 'quantity'):
+                    totals[category_id][1] += quantity
+                return totals
+
+            cases = [
+                ('stock check', lambda: check_before(*request()), lambda: check_after(*request())),
+                ('by category', categories_before, category_totals),
+            ]
+
+            def timed(run):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    run()
+                    elapsed = (time.perf_counter() - started) * 1000
+                return elapsed, len(queries)
+
+            self.stdout.write(
+                f"{'case':<12} {'before ms':>9} {'q':>3} {'after ms':>9} {'q':>3} {'speedup':>8}"
+            )
+            for name, before, after in cases:
+                before_runs = [timed(before) for _ in range(options['repeat'])]
+                after_runs = [timed(after) for _ in range(options['repeat'])]
+                before_ms = sorted(ms for ms, _ in before_runs)[len(before_runs) // 2]
+                after_ms = sorted(ms for ms, _ in after_runs)[len(after_runs) // 2]
+                self.stdout.write(
+                    f"{name:<12} {before_ms:>9.2f} {before_runs[-1][1]:>3} "
+                    f"{after_ms:>9.2f} {after_runs[-1][1]:>3} {before_ms / after_ms:>7.1f}x"
+                )
+            self.stdout.write("Latencies are medians.")
+            transaction.set_rollback(True)
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stock.service import (
+    SOURCES,
+    drifted_records,
+    missing_records,
+    orphaned_records,
+    save_records,
+    source_fields,
+    source_model,
+)
+
+
+class Command(BaseCommand):
+    """
+    Copy product and inventory item stock into the shared stock table.
+
+    Source rows are read in primary key order, one batch per transaction,
+    and each batch is locked before its records are upserted so that
+    concurrent sales and allocations cannot interleave with the copy.
+    """
+    help = "Merge Product.stock_level and Item.quantity into the shared stock table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', choices=sorted(SOURCES), action='append',
+            help="Only merge this kind of stock (repeatable). Defaults to all."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Source rows copied per transaction."
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report missing, drifted and orphaned records."
+        )
+
+    def handle(self, *args, **options):
+        for kind in options['kind'] or sorted(SOURCES):
+            if options['check']:
+                self.report(kind)
+            else:
+                self.merge(kind, options['batch_size'])
+
+    def merge(self, kind, batch_size):
+        model = source_model(kind)
+        fields = source_fields(kind)
+        last_pk = 0
+        merged = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    model.objects.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .only(*fields)[:batch_size]
+                )
+                if not batch:
+                    break
+                merged += save_records(kind, batch, overwrite_quantity=True, batch_size=batch_size)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"{kind}: {merged} records merged")
+        removed = orphaned_records(kind).delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f"{kind}: merged {merged} records, removed {removed} orphaned records."
+        ))
+
+    def report(self, kind):
+        missing = missing_records(kind).count()
+        drifted = list(drifted_records(kind).values_list('ref_id', 'quantity', 'source_quantity'))
+        orphaned = orphaned_records(kind).count()
+        for ref_id, quantity, source_quantity in drifted:
+            self.stdout.write(f"{kind} {ref_id}: record={quantity} source={source_quantity}")
+        if missing or drifted or orphaned:
+            self.stdout.write(self.style.WARNING(
+                f"{kind}: {missing} missing, {len(drifted)} drifted, {orphaned} orphaned records."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{kind}: stock records match."))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stock.alerts import deliver_pending, delivery_configured
+
+
+class Command(BaseCommand):
+    """
+    Send queued low-stock alerts as e-mail and/or webhook digests.
+
+    Alerts are queued by stock writes and never sent from the request that
+    raised them; this consumer drains the queue in batches.
+    """
+    help = "Deliver pending low-stock alerts as digests to the configured e-mail recipients and webhook."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=60.0,
+            help="Seconds to wait between polls when no alert is pending (default: 60)",
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help="Most alerts per digest (default: STOCK_ALERT_DIGEST_SIZE)",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is empty instead of polling forever",
+        )
+
+    def handle(self, *args, **options):
+        if not delivery_configured():
+            raise CommandError(
+                "No delivery channel configured; set STOCK_ALERT_EMAILS or STOCK_ALERT_WEBHOOK_URL."
+            )
+        while True:
+            try:
+                sent = deliver_pending(options['limit'])
+            except Exception as exc:
+                if options['once']:
+                    raise CommandError(f"Sending the digest failed: {exc}") from exc
+                self.stderr.write(f"Sending the digest failed, retrying later: {exc}")
+                sent = 0
+            if sent:
+                self.stdout.write(f"Sent a digest of {sent} alerts.")
+            elif options['once']:
+                return
+            else:
+                time.sleep(options['interval'])
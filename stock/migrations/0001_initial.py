@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('categories', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Product'), ('item', 'Inventory item')], max_length=10)),
+                ('ref_id', models.BigIntegerField(help_text='Primary key of the Product or Item')),
+                ('name', models.CharField(max_length=200)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('reorder_point', models.PositiveIntegerField(blank=True, help_text='Reorder point, for sources that have one', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='categories.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'kind', 'quantity'], name='stockrecord_category_idx'), models.Index(condition=models.Q(('quantity__lte', models.F('reorder_point'))), fields=['kind', 'name'], name='stockrecord_below_reorder_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'ref_id'), name='stockrecord_unique_ref')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockrecord',
+            name='reorder_point',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Product'), ('item', 'Inventory item')], max_length=10)),
+                ('ref_id', models.BigIntegerField(help_text='Primary key of the Product or Item')),
+                ('sku', models.CharField(blank=True, max_length=50)),
+                ('name', models.CharField(max_length=200)),
+                ('quantity', models.PositiveIntegerField(help_text='Quantity left after the write that raised the alert')),
+                ('reorder_point', models.PositiveIntegerField()),
+                ('day', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('notified_at__isnull', True)), fields=['created_at'], name='lowstockalert_pending_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'ref_id', 'day'), name='lowstockalert_once_per_day')],
+            },
+        ),
+    ]
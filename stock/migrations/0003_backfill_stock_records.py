@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Source model and quantity field of each kind of stock, as in
+# stock.service.SOURCES.
+SOURCES = {
+    'product': (('products', 'Product'), 'stock_level'),
+    'item': (('inventory', 'Item'), 'quantity'),
+}
+
+
+def backfill_stock_records(apps, schema_editor):
+    """
+    Give every existing product and item its stock record, so stock checks
+    and stock movements work without running ``merge_stock`` first.
+    """
+    StockRecord = apps.get_model('stock', 'StockRecord')
+    for kind, (label, quantity_field) in SOURCES.items():
+        model = apps.get_model(*label)
+        rows = model.objects.order_by('pk').values_list(
+            'pk', 'name', 'category_id', quantity_field, 'reorder_point'
+        ).iterator()
+        batch = []
+        for ref_id, name, category_id, quantity, reorder_point in rows:
+            batch.append(StockRecord(
+                kind=kind, ref_id=ref_id, name=name, category_id=category_id,
+                quantity=quantity, reorder_point=reorder_point,
+            ))
+            if len(batch) == 1000:
+                StockRecord.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        StockRecord.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0002_lowstockalert'),
+        ('products', '0008_product_sku_trgm_idx'),
+        ('inventory', '0006_item_reorder_point'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stock_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+from django.db import models
+from django.db.models import F, Q
+from categories.models import Category
+
+# Records at or below their reorder point. Shared by the service query and
+# the partial index so the planner can match one against the other.
+BELOW_REORDER = Q(quantity__lte=F('reorder_point'))
+
+
+class StockRecord(models.Model):
+    """
+    Model holding the stock on hand of one product or inventory item.
+
+    One shared, indexed table for both stock systems, so stock checks and
+    cross-checks are single queries. Rows are written by ``stock.service``
+    in the same transaction as the owning Product or Item, which remain
+    the source of truth: sales and allocations lock and update those rows,
+    and this table mirrors them.
+    """
+    PRODUCT = 'product'
+    ITEM = 'item'
+    KIND_CHOICES = [
+        (PRODUCT, 'Product'),
+        (ITEM, 'Inventory item'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    ref_id = models.BigIntegerField(help_text="Primary key of the Product or Item")
+    name = models.CharField(max_length=200)
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    quantity = models.PositiveIntegerField(default=0)
+    reorder_point = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'ref_id'], name='stockrecord_unique_ref'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'kind', 'quantity'], name='stockrecord_category_idx'),
+            models.Index(fields=['kind', 'name'], condition=BELOW_REORDER, name='stockrecord_below_reorder_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.ref_id}: {self.quantity}"
+
+
+class LowStockAlert(models.Model):
+    """
+    Model queueing a product or item that fell to or below its reorder point.
+
+    At most one alert is kept per product or item per day. Pending alerts
+    (``notified_at`` unset) are batched into digests by the
+    ``send_stock_alerts`` command.
+    """
+    kind = models.CharField(max_length=10, choices=StockRecord.KIND_CHOICES)
+    ref_id = models.BigIntegerField(help_text="Primary key of the Product or Item")
+    sku = models.CharField(max_length=50, blank=True)
+    name = models.CharField(max_length=200)
+    quantity = models.PositiveIntegerField(help_text="Quantity left after the write that raised the alert")
+    reorder_point = models.PositiveIntegerField()
+    day = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'ref_id', 'day'], name='lowstockalert_once_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], condition=Q(notified_at__isnull=True), name='lowstockalert_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} at {self.quantity} (reorder point {self.reorder_point})"
@@ -0,0 +1,62 @@
+from rest_framework import serializers
+
+
+class IdListField(serializers.CharField):
+    """
+    A comma-separated list of primary keys, e.g. ``3,5,8``.
+    """
+
+    def __init__(self, max_ids=500, **kwargs):
+        self.max_ids = max_ids
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        values = [value.strip() for value in super().to_internal_value(data).split(',') if value.strip()]
+        if len(values) > self.max_ids:
+            raise serializers.ValidationError(f"At most {self.max_ids} IDs can be given.")
+        try:
+            return list(dict.fromkeys(int(value) for value in values))
+        except ValueError:
+            raise serializers.ValidationError("Expected a comma-separated list of IDs.")
+
+
+class StockLevelQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the stock level lookup.
+    """
+    products = IdListField(required=False)
+    items = IdListField(required=False)
+
+    def validate(self, data):
+        """
+        Require at least one product or item.
+        """
+        if not data.get('products') and not data.get('items'):
+            raise serializers.ValidationError("Give products, items or both.")
+        return data
+
+
+class StockCheckSerializer(serializers.Serializer):
+    """
+    Validates a stock check: requested quantities per product and per item.
+    """
+    products = serializers.DictField(
+        child=serializers.IntegerField(min_value=1), required=False, default=dict
+    )
+    items = serializers.DictField(
+        child=serializers.IntegerField(min_value=1), required=False, default=dict
+    )
+
+    def _ids(self, value):
+        if len(value) > 500:
+            raise serializers.ValidationError("At most 500 IDs can be checked at once.")
+        try:
+            return {int(key): quantity for key, quantity in value.items()}
+        except ValueError:
+            raise serializers.ValidationError("Keys must be IDs.")
+
+    def validate_products(self, value):
+        return self._ids(value)
+
+    def validate_items(self, value):
+        return self._ids(value)
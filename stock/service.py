@@ -0,0 +1,306 @@
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Sum, When
+from django.utils import timezone
+
+from categories.models import Category
+
+from .alerts import low_stock_alert, queue_alerts
+from .models import BELOW_REORDER, StockRecord
+
+PRODUCT = StockRecord.PRODUCT
+ITEM = StockRecord.ITEM
+
+# Where each kind of stock lives: the source model, its quantity field and
+# its reorder point field.
+SOURCES = {
+    PRODUCT: ('products.Product', 'stock_level', 'reorder_point'),
+    ITEM: ('inventory.Item', 'quantity', 'reorder_point'),
+}
+
+# Fields refreshed from the source on every save; the quantity only moves
+# through shift_stock once a record exists.
+DESCRIPTIVE_FIELDS = ['name', 'category', 'reorder_point', 'updated_at']
+
+
+def source_model(kind):
+    """
+    The model stock of the given kind is kept on.
+    """
+    return apps.get_model(SOURCES[kind][0])
+
+
+def source_fields(kind):
+    """
+    Fields to load from the source model to build its stock records.
+    """
+    _, quantity_field, reorder_field = SOURCES[kind]
+    return ['pk', 'name', 'category_id', quantity_field, reorder_field]
+
+
+def _record_for(kind, obj):
+    _, quantity_field, reorder_field = SOURCES[kind]
+    return StockRecord(
+        kind=kind,
+        ref_id=obj.pk,
+        name=obj.name,
+        category_id=obj.category_id,
+        quantity=getattr(obj, quantity_field),
+        reorder_point=getattr(obj, reorder_field),
+    )
+
+
+def save_records(kind, objects, overwrite_quantity=False, batch_size=1000):
+    """
+    Insert or refresh the stock records of products or items in one upsert.
+
+    Existing records keep their quantity unless ``overwrite_quantity`` is
+    set, so saving a stale instance never undoes a concurrent movement.
+
+    Args:
+        kind (str): PRODUCT or ITEM
+        objects (Iterable): Source instances
+        overwrite_quantity (bool): Also copy the source quantity onto
+            existing records
+        batch_size (int): Rows per INSERT statement
+
+    Returns:
+        int: Number of records written
+    """
+    records = [_record_for(kind, obj) for obj in objects]
+    if not records:
+        return 0
+    update_fields = DESCRIPTIVE_FIELDS + (['quantity'] if overwrite_quantity else [])
+    StockRecord.objects.bulk_create(
+        records,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['kind', 'ref_id'],
+        update_fields=update_fields,
+    )
+    return len(records)
+
+
+def sync_records(kind, ids, overwrite_quantity=False):
+    """
+    Create or refresh the stock records of the given products or items.
+
+    Used by writers that bypass model signals, such as ``bulk_create``.
+    Only pass ``overwrite_quantity`` with the source rows locked.
+    """
+    objects = source_model(kind).objects.filter(pk__in=ids).only(*source_fields(kind))
+    return save_records(kind, objects, overwrite_quantity=overwrite_quantity)
+
+
+def delete_records(kind, ids):
+    """
+    Drop the stock records of deleted products or items.
+    """
+    return StockRecord.objects.filter(kind=kind, ref_id__in=ids).delete()[0]
+
+
+def shift_stock(kind, deltas, sources=()):
+    """
+    Apply signed quantity changes to several records in one ``CASE`` update.
+
+    Callers lock the source rows first, so records are never moved
+    concurrently for the same product or item. Passing those locked rows
+    as ``sources`` also queues a low-stock alert for each one the change
+    takes from above its reorder point to at or below it.
+
+    Args:
+        kind (str): PRODUCT or ITEM
+        deltas (dict): Mapping of source ID to signed change
+        sources (Iterable): Locked source instances, still holding their
+            quantity from before the change
+
+    Returns:
+        int: Number of records updated
+    """
+    deltas = {ref_id: delta for ref_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    updated = StockRecord.objects.filter(kind=kind, ref_id__in=deltas).update(
+        quantity=Case(
+            *(When(ref_id=ref_id, then=F('quantity') + delta) for ref_id, delta in deltas.items()),
+            default=F('quantity'),
+            output_field=models.PositiveIntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    queue_alerts(crossings(kind, deltas, sources))
+    return updated
+
+
+def crossings(kind, deltas, sources):
+    """
+    Low-stock alerts for the sources a change takes to their reorder point.
+
+    One comparison per source, on values the caller already holds.
+    """
+    _, quantity_field, reorder_field = SOURCES[kind]
+    alerts = []
+    for source in sources:
+        level = getattr(source, quantity_field)
+        reorder_point = getattr(source, reorder_field)
+        new_level = level + deltas.get(source.pk, 0)
+        if level > reorder_point >= new_level:
+            alerts.append(low_stock_alert(kind, source, new_level, reorder_point))
+    return alerts
+
+
+def queue_if_low(kind, ref_id):
+    """
+    Queue an alert when a product or item is at or below its reorder point,
+    e.g. after its reorder point was raised.
+
+    The level is re-read with the row locked rather than taken from the
+    saved instance, whose quantity may be stale.
+    """
+    _, quantity_field, reorder_field = SOURCES[kind]
+    with transaction.atomic():
+        source = source_model(kind).objects.select_for_update().filter(pk=ref_id).first()
+        if source is None:
+            return
+        level, reorder_point = getattr(source, quantity_field), getattr(source, reorder_field)
+        if level <= reorder_point:
+            queue_alerts([low_stock_alert(kind, source, level, reorder_point)])
+
+
+def levels_for(wanted):
+    """
+    Quantities for several kinds of stock in one query.
+
+    Args:
+        wanted (dict): Mapping of kind to the source IDs to read
+
+    Returns:
+        dict: Mapping of kind to ``{source ID: quantity}``
+    """
+    levels = {kind: {} for kind in wanted}
+    condition = Q()
+    for kind, ids in wanted.items():
+        if ids:
+            condition |= Q(kind=kind, ref_id__in=ids)
+    if condition:
+        for kind, ref_id, quantity in StockRecord.objects.filter(condition).values_list(
+            'kind', 'ref_id', 'quantity'
+        ):
+            levels[kind][ref_id] = quantity
+    return levels
+
+
+def stock_levels(kind, ids):
+    """
+    Current quantity of each given product or item, by one indexed lookup.
+
+    Returns:
+        dict: Mapping of source ID to quantity; unknown IDs are left out
+    """
+    return levels_for({kind: ids})[kind]
+
+
+def check_stock(products=None, items=None):
+    """
+    Find the products and items holding less than requested, in one query.
+
+    Args:
+        products (dict): Mapping of product ID to requested quantity
+        items (dict): Mapping of item ID to requested quantity
+
+    Returns:
+        dict: ``{"products": {...}, "items": {...}}``, each mapping the IDs
+            that cannot be served to the quantity available; unknown IDs
+            count as holding nothing
+    """
+    requested = {PRODUCT: products or {}, ITEM: items or {}}
+    levels = levels_for(requested)
+    short = {
+        kind: {
+            ref_id: levels[kind].get(ref_id, 0)
+            for ref_id, quantity in wanted.items()
+            if levels[kind].get(ref_id, 0) < quantity
+        }
+        for kind, wanted in requested.items()
+    }
+    return {'products': short[PRODUCT], 'items': short[ITEM]}
+
+
+def below_reorder(kind=PRODUCT):
+    """
+    Records at or below their reorder point, served by the partial index.
+    """
+    return StockRecord.objects.filter(BELOW_REORDER, kind=kind).order_by('kind', 'name')
+
+
+def category_totals():
+    """
+    Units held per category by both stock systems.
+
+    One ``GROUP BY category, kind`` over the covering
+    ``stockrecord_category_idx`` index, plus one lookup of category names.
+
+    Returns:
+        list: One dict per category, ordered by name, with the record count
+            and units of each stock system
+    """
+    totals = {}
+    for category_id, kind, count, quantity in (
+        StockRecord.objects.order_by()
+        .values_list('category', 'kind')
+        .annotate(count=Count('pk'), quantity=Sum('quantity'))
+    ):
+        row = totals.setdefault(category_id, {
+            'category': category_id,
+            'category_name': None,
+            'product_count': 0,
+            'product_quantity': 0,
+            'item_count': 0,
+            'item_quantity': 0,
+        })
+        row[f'{kind}_count'] = count
+        row[f'{kind}_quantity'] = quantity
+    names = Category.objects.filter(pk__in=[pk for pk in totals if pk is not None])
+    for pk, name in names.values_list('pk', 'name'):
+        totals[pk]['category_name'] = name
+    return sorted(totals.values(), key=lambda row: (row['category_name'] is None, row['category_name'] or ''))
+
+
+def drifted_records(kind):
+    """
+    Records whose quantity disagrees with their source row.
+
+    Returns:
+        QuerySet: Records annotated with ``source_quantity``
+    """
+    model = source_model(kind)
+    quantity_field = SOURCES[kind][1]
+    return (
+        StockRecord.objects.filter(kind=kind)
+        .annotate(
+            source_quantity=Subquery(
+                model.objects.filter(pk=OuterRef('ref_id')).values(quantity_field)[:1]
+            )
+        )
+        .exclude(quantity=F('source_quantity'))
+        .filter(source_quantity__isnull=False)
+    )
+
+
+def missing_records(kind):
+    """
+    Products or items that have no stock record yet.
+    """
+    return source_model(kind).objects.exclude(
+        Exists(StockRecord.objects.filter(kind=kind, ref_id=OuterRef('pk')))
+    )
+
+
+def orphaned_records(kind):
+    """
+    Records whose product or item no longer exists.
+    """
+    model = source_model(kind)
+    return StockRecord.objects.filter(kind=kind).exclude(
+        Exists(model.objects.filter(pk=OuterRef('ref_id')))
+    )
@@ -0,0 +1,48 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .service import SOURCES, delete_records, queue_if_low, save_records
+
+# Saves and deletes of single rows are mirrored here. Bulk writers
+# (QuerySet.update, bulk_create) send no signals and call stock.service
+# themselves.
+
+
+def _kind_for(sender):
+    for kind, (label, _, _) in SOURCES.items():
+        if sender._meta.label == label:
+            return kind
+    return None
+
+
+def save_stock_record(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    """
+    Create the stock record of a new product or item, or refresh its name,
+    category and reorder point.
+
+    A save listing the reorder point in ``update_fields`` also raises an
+    alert if the product or item is now low on stock. Other saves leave
+    alerts to the stock movements, as the instance's quantity may be stale.
+    """
+    if not raw:
+        kind = _kind_for(sender)
+        save_records(kind, [instance], overwrite_quantity=created)
+        if not created and update_fields and SOURCES[kind][2] in update_fields:
+            queue_if_low(kind, instance.pk)
+
+
+def delete_stock_record(sender, instance, **kwargs):
+    """
+    Drop the stock record of a deleted product or item.
+    """
+    delete_records(_kind_for(sender), [instance.pk])
+
+
+def connect_stock_sources():
+    """
+    Keep stock records in step with single-row saves and deletes.
+    """
+    for label, _, _ in SOURCES.values():
+        model = apps.get_model(label)
+        post_save.connect(save_stock_record, sender=model, dispatch_uid=f'stock.save.{label}')
+        post_delete.connect(delete_stock_record, sender=model, dispatch_uid=f'stock.delete.{label}')
@@ -0,0 +1,204 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from categories.models import Category
+from inventory.lots import allocate, receive_lot
+from inventory.models import Item
+from products.models import Product
+from products.stock import decrement_stock
+from .alerts import deliver_pending
+from .models import LowStockAlert, StockRecord
+from .service import ITEM, PRODUCT, check_stock, stock_levels
+
+
+class StockServiceTests(APITestCase):
+    """
+    Tests for the shared stock table and the service keeping it in step.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='stockkeeper', password='secret')
+        cls.category = Category.objects.create(name='Dressings', description='')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(
+            category=self.category, name='Bandage', sku='BAND-1', unit_price='2.00', stock_level=12
+        )
+        self.item = Item.objects.create(name='Gauze', category=self.category, quantity=0)
+        receive_lot(self.item, 8)
+
+    def test_records_follow_saves_and_movements(self):
+        self.assertEqual(stock_levels(PRODUCT, [self.product.pk]), {self.product.pk: 12})
+        self.assertEqual(stock_levels(ITEM, [self.item.pk]), {self.item.pk: 8})
+
+        decrement_stock({self.product.pk: 5})
+        allocate(self.item, 3)
+        self.product.name = 'Elastic bandage'
+        self.product.save()
+
+        record = StockRecord.objects.get(kind=PRODUCT, ref_id=self.product.pk)
+        self.assertEqual((record.name, record.quantity, record.reorder_point), ('Elastic bandage', 7, 10))
+        self.assertEqual(stock_levels(ITEM, [self.item.pk]), {self.item.pk: 5})
+
+        self.item.delete()
+        self.assertFalse(StockRecord.objects.filter(kind=ITEM).exists())
+
+    def test_check_stock_reads_both_systems_in_one_query(self):
+        with self.assertNumQueries(1):
+            short = check_stock({self.product.pk: 20, 999: 1}, {self.item.pk: 8})
+        self.assertEqual(short, {'products': {self.product.pk: 12, 999: 0}, 'items': {}})
+
+    def test_endpoints(self):
+        levels = self.client.get(
+            reverse('stock:stock-levels'), {'products': str(self.product.pk), 'items': str(self.item.pk)}
+        )
+        self.assertEqual(levels.status_code, 200)
+        self.assertEqual(levels.data, {'products': {self.product.pk: 12}, 'items': {self.item.pk: 8}})
+        self.assertEqual(self.client.get(reverse('stock:stock-levels'), {'products': 'x'}).status_code, 400)
+
+        check = self.client.post(
+            reverse('stock:stock-check'), {'products': {str(self.product.pk): 13}}, format='json'
+        )
+        self.assertFalse(check.data['available'])
+        self.assertEqual(check.data['shortages']['products'], {self.product.pk: 12})
+
+        summary = self.client.get(reverse('stock:stock-category-summary')).data
+        self.assertEqual(summary, [{
+            'category': self.category.pk,
+            'category_name': 'Dressings',
+            'product_count': 1,
+            'product_quantity': 12,
+            'item_count': 1,
+            'item_quantity': 8,
+        }])
+
+    def test_merge_command_repairs_drift_and_orphans(self):
+        StockRecord.objects.filter(kind=PRODUCT).update(quantity=1)
+        StockRecord.objects.filter(kind=ITEM).delete()
+        StockRecord.objects.create(kind=ITEM, ref_id=424242, name='Gone')
+
+        out = StringIO()
+        call_command('merge_stock', '--check', stdout=out)
+        self.assertIn('item: 1 missing, 0 drifted, 1 orphaned records.', out.getvalue())
+        self.assertIn('product: 0 missing, 1 drifted, 0 orphaned records.', out.getvalue())
+
+        call_command('merge_stock', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(stock_levels(PRODUCT, [self.product.pk]), {self.product.pk: 12})
+        self.assertEqual(stock_levels(ITEM, [self.item.pk, 424242]), {self.item.pk: 8})
+
+
+class LowStockAlertTests(APITestCase):
+    """
+    Tests for raising low-stock alerts on writes and sending them as digests.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='buyer', password='secret')
+        cls.category = Category.objects.create(name='Syringes', description='')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(
+            category=self.category, name='Syringe 5ml', sku='SYR-5', unit_price='0.50',
+            stock_level=15, reorder_point=10,
+        )
+        self.item = Item.objects.create(name='Sharps bin', category=self.category, reorder_point=2)
+        receive_lot(self.item, 5)
+
+    def test_crossing_raises_one_alert_per_day(self):
+        decrement_stock({self.product.pk: 4})
+        self.assertFalse(LowStockAlert.objects.exists())
+
+        decrement_stock({self.product.pk: 2})
+        decrement_stock({self.product.pk: 1})
+        alert = LowStockAlert.objects.get()
+        self.assertEqual((alert.kind, alert.sku, alert.quantity, alert.reorder_point), (PRODUCT, 'SYR-5', 9, 10))
+
+        # Restocked and crossing again the same day is not reported twice.
+        self.client.patch(reverse('inventory:product-stock-update', args=[self.product.pk]), {'stock_level': 30})
+        decrement_stock({self.product.pk: 25})
+        self.assertEqual(LowStockAlert.objects.count(), 1)
+
+    def test_item_allocation_raises_alert(self):
+        allocate(self.item, 3)
+        alert = LowStockAlert.objects.get(kind=ITEM)
+        self.assertEqual((alert.ref_id, alert.quantity, alert.reorder_point), (self.item.pk, 2, 2))
+
+    def test_stock_update_endpoint_queues_instead_of_printing(self):
+        url = reverse('inventory:product-stock-update', args=[self.product.pk])
+        with mock.patch('sys.stdout', new_callable=StringIO) as stdout:
+            response = self.client.patch(url, {'stock_level': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertEqual(LowStockAlert.objects.get().quantity, 3)
+
+    def test_raising_the_reorder_point_alerts(self):
+        response = self.client.put(
+            reverse('item-detail', args=[self.item.pk]), {'reorder_point': 8}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        alert = LowStockAlert.objects.get(kind=ITEM)
+        self.assertEqual((alert.quantity, alert.reorder_point), (5, 8))
+
+    def test_restocking_a_low_product_does_not_alert(self):
+        Product.objects.filter(pk=self.product.pk).update(stock_level=2)
+        response = self.client.put(
+            reverse('inventory:product-detail', args=[self.product.pk]),
+            {
+                'category': self.category.pk, 'name': 'Syringe 5ml Luer', 'sku': 'SYR-5',
+                'unit_price': '0.50', 'stock_level': 50, 'reorder_point': 10,
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(LowStockAlert.objects.exists())
+        self.assertEqual(StockRecord.objects.get(kind=PRODUCT).name, 'Syringe 5ml Luer')
+
+    def test_raised_reorder_point_reads_the_current_level(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        decrement_stock({self.product.pk: 3})
+        stale.reorder_point = 12
+        stale.save(update_fields=['reorder_point'])
+        alert = LowStockAlert.objects.get(kind=PRODUCT)
+        self.assertEqual((alert.quantity, alert.reorder_point), (12, 12))
+
+    @override_settings(
+        STOCK_ALERT_EMAILS=['stores@example.com'],
+        STOCK_ALERT_WEBHOOK_URL='https://hooks.example.com/stock',
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_digest_sent_by_email_and_webhook(self):
+        decrement_stock({self.product.pk: 10})
+        allocate(self.item, 4)
+        with mock.patch('stock.alerts.urllib_request.urlopen') as urlopen:
+            call_command('send_stock_alerts', '--once', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Syringe 5ml (SYR-5): 5 left, reorder point 10', mail.outbox[0].body)
+        webhook = urlopen.call_args[0][0]
+        self.assertEqual(json.loads(webhook.data)['count'], 2)
+        self.assertFalse(LowStockAlert.objects.filter(notified_at__isnull=True).exists())
+        self.assertEqual(deliver_pending(), 0)
+
+    @override_settings(STOCK_ALERT_WEBHOOK_URL='https://hooks.example.com/stock')
+    def test_failed_delivery_keeps_alerts_queued(self):
+        decrement_stock({self.product.pk: 10})
+        with mock.patch('stock.alerts.urllib_request.urlopen', side_effect=OSError('down')):
+            with self.assertRaises(CommandError):
+                call_command('send_stock_alerts', '--once', stdout=StringIO())
+        self.assertTrue(LowStockAlert.objects.filter(notified_at__isnull=True).exists())
+
+    def test_consumer_requires_a_channel(self):
+        with self.assertRaises(CommandError):
+            call_command('send_stock_alerts', '--once')
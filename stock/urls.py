@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import StockCategorySummaryView, StockCheckView, StockLevelView
+
+app_name = 'stock'
+
+urlpatterns = [
+    path('levels/', StockLevelView.as_view(), name='stock-levels'),
+    path('check/', StockCheckView.as_view(), name='stock-check'),
+    path('categories/', StockCategorySummaryView.as_view(), name='stock-category-summary'),
+]
@@ -0,0 +1,67 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .serializers import StockCheckSerializer, StockLevelQuerySerializer
+from .service import ITEM, PRODUCT, category_totals, check_stock, levels_for
+
+
+class StockLevelView(APIView):
+    """
+    API view for reading the stock of products and inventory items at once.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Retrieve current quantities from the shared stock table.
+
+        Supports query parameters:
+        - products: Comma-separated product IDs
+        - items: Comma-separated inventory item IDs
+        """
+        query = StockLevelQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        levels = levels_for({PRODUCT: params.get('products', []), ITEM: params.get('items', [])})
+        return Response({
+            "products": levels[PRODUCT],
+            "items": levels[ITEM],
+        }, status=status.HTTP_200_OK)
+
+
+class StockCheckView(APIView):
+    """
+    API view for checking whether requested quantities can be served.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Check requested quantities against the shared stock table.
+
+        Expects ``{"products": {"<id>": quantity}, "items": {"<id>": quantity}}``
+        and returns the IDs that cannot be served with what they hold.
+        """
+        serializer = StockCheckSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        short = check_stock(data['products'], data['items'])
+        return Response({
+            "available": not short['products'] and not short['items'],
+            "shortages": short,
+        }, status=status.HTTP_200_OK)
+
+
+class StockCategorySummaryView(APIView):
+    """
+    API view comparing the stock both systems hold per category.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Retrieve product and inventory item totals per category.
+        """
+        return Response(category_totals(), status=status.HTTP_200_OK)
@@ -2,10 +2,13 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from django.utils.decorators import method_decorator
+from versioning.decorators import table_condition
 from .models import Supplier
 from .serializers import SupplierSerializer
 
 
+@method_decorator(table_condition('suppliers.supplier'), name='get')
 class SupplierListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -19,6 +22,8 @@ class SupplierListCreateView(APIView):
         Returns:
             Response: A JSON response containing a list of serialized supplier objects.
                       Status code 200 OK on success.
+                      Status code 304 Not Modified if the If-None-Match or If-Modified-Since
+                      header matches the current ETag or Last-Modified value.
 
         Authentication:
             Requires a valid authentication token in the Authorization header.
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class VersioningConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'versioning'
+
+    def ready(self):
+        from .signals import connect_tracked_models
+        connect_tracked_models()
@@ -0,0 +1,33 @@
+from django.views.decorators.http import condition
+
+from .versions import make_etag, table_version
+
+
+def table_condition(table):
+    """
+    Conditional-request decorator for views whose response depends only on
+    one table's rows.
+
+    ETag and Last-Modified come from the table's TableVersion, which is
+    read once per request, so a matching ``If-None-Match`` or
+    ``If-Modified-Since`` returns 304 before the view runs.
+
+    Args:
+        table (str): Model label, e.g. ``categories.category``
+    """
+    def lookup(request):
+        versions = getattr(request, '_table_versions', None)
+        if versions is None:
+            versions = request._table_versions = {}
+        if table not in versions:
+            versions[table] = table_version(table)
+        return versions[table]
+
+    def etag(request, *args, **kwargs):
+        version, updated_at = lookup(request)
+        return make_etag(table, version, updated_at, request.get_host())
+
+    def last_modified(request, *args, **kwargs):
+        return lookup(request)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class TableVersion(models.Model):
+    """
+    Model holding a counter that is bumped whenever a table's rows change.
+
+    Lets list endpoints derive ETag and Last-Modified headers without
+    reading the rows themselves.
+    """
+    table = models.CharField(max_length=100, unique=True, help_text="Model label, e.g. categories.category")
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
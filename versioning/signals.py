@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .versions import bump_table_version
+
+# Models whose list endpoints are versioned by a TableVersion row. Changes
+# made with QuerySet.update() send no signals; callers doing that must
+# bump the version themselves.
+TRACKED_MODELS = [
+    'categories.Category',
+    'suppliers.Supplier',
+]
+
+
+def _bump(sender, **kwargs):
+    if not kwargs.get('raw'):
+        bump_table_version(sender._meta.label_lower)
+
+
+def connect_tracked_models():
+    """
+    Bump a model's table version whenever one of its rows is saved or deleted.
+    """
+    for label in TRACKED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_bump, sender=model, dispatch_uid=f'versioning.save.{label}')
+        post_delete.connect(_bump, sender=model, dispatch_uid=f'versioning.delete.{label}')
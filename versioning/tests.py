@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from categories.models import Category
+from suppliers.models import Supplier
+from .versions import table_version
+
+
+class TableVersionTests(APITestCase):
+    """
+    Tests for bumping table versions on writes and the conditional list
+    responses built from them.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='purchaser', password='secret')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_committed_write_bumps_version(self):
+        version, _ = table_version('categories.category')
+        with transaction.atomic():
+            category = Category.objects.create(name='Gloves', description='Nitrile')
+        self.assertEqual(table_version('categories.category')[0], version + 1)
+
+        category.delete()
+        self.assertEqual(table_version('categories.category')[0], version + 2)
+
+    def test_rolled_back_write_keeps_version(self):
+        Category.objects.create(name='Gloves', description='Nitrile')
+        before = table_version('categories.category')
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Category.objects.create(name='Masks', description='Surgical')
+                raise RuntimeError('abort')
+        self.assertEqual(table_version('categories.category'), before)
+        self.assertFalse(Category.objects.filter(name='Masks').exists())
+
+    def test_stale_etag_gets_200_after_write(self):
+        url = reverse('supplier-list-create')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Supplier.objects.create(
+            name='MedSupply', registration_number='REG-1', email='sales@medsupply.example', phone='0700000000'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,43 @@
+import hashlib
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TableVersion
+
+
+def table_version(table):
+    """
+    Return a table's current version.
+
+    Args:
+        table (str): Model label, e.g. ``categories.category``
+
+    Returns:
+        tuple: (version, updated_at); (0, None) for a table never bumped
+    """
+    row = TableVersion.objects.filter(table=table).values_list('version', 'updated_at').first()
+    return row or (0, None)
+
+
+def bump_table_version(table):
+    """
+    Record that a table's rows changed.
+
+    Args:
+        table (str): Model label, e.g. ``categories.category``
+    """
+    now = timezone.now()
+    updated = TableVersion.objects.filter(table=table).update(version=F('version') + 1, updated_at=now)
+    if not updated:
+        TableVersion.objects.bulk_create(
+            [TableVersion(table=table, version=0, updated_at=now)], ignore_conflicts=True
+        )
+        TableVersion.objects.filter(table=table).update(version=F('version') + 1, updated_at=now)
+
+
+def make_etag(*parts):
+    """
+    Build an ETag value from the parts a representation depends on.
+    """
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()[:32]